@@ -0,0 +1,359 @@
+"""Run the real tasks and subdaemons through simulated days against local fakes, and report how they performed.
+
+The daemon ticks on a VirtualTimeLoop (see Automated_Tasker.simulation), and every client is pointed at the
+in-process fakes in fakes.py. Everything runs in a throwaway home directory, with its own vault, so it needs no
+network, credentials or terminal. The swim schedule poster, which isn't registered in production, is run too.
+
+The report covers throughput (task runs, HTTP requests and simulated seconds per wall clock second), the wall
+clock latency of each task's runs, how late tasks fired and how long pushes waited, the requests each fake got,
+the clients built, and peak RSS. It's written as JSON, by default to results/end_to_end-<commit>.json, and
+--compare prints the change from an earlier result.
+
+Usage:
+    python benchmarks/end_to_end.py [--start 2026-05-01T00:00] [--days 1] [--pools 24] [--failure-rate 0]
+                                    [--output FILE] [--compare FILE]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import getpass
+import json
+import logging
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+from urllib.parse import urlsplit
+
+from fakes import FakeServices
+
+if TYPE_CHECKING:  # Automated_Tasker is only imported once prepare_home() has run
+    from Automated_Tasker.services.container import ServiceContainer
+
+RESULTS = Path(__file__).parent / "results"
+VAULT_PASSWORD = "benchmark"
+PUSHBULLET_KEY = "o.benchmark"
+DISCORD_TOKEN = "benchmark.discord.token"
+VAULT_ENTRIES = {
+    "switchbot-token": "benchmark-token",
+    "switchbot-secret": "benchmark-secret",
+    "pushbullet-key": PUSHBULLET_KEY,
+    "google-maps-api-key": "AIza-benchmark",
+    "google-creds": json.dumps(
+        {
+            "token": "benchmark",
+            "refresh_token": "benchmark",
+            "client_id": "benchmark",
+            "client_secret": "benchmark",
+            "expiry": "2999-01-01T00:00:00Z",  # Never refreshed
+        }
+    ),
+    "home-address": "45 Rideau St, Ottawa, ON",
+    "discord-token-1322957423941648544": DISCORD_TOKEN,
+    "weather-locations": json.dumps({"home": "45.403,-75.687", "cottage": "45.100,-76.100"}),
+}
+LOCAL_HOSTS = {"127.0.0.1", "localhost", "::1"}
+HOST_TIMEZONE = "America/Toronto"  # Tasks read naive times as local ones, so the host runs on LOCAL_TIMEZONE
+LEMMAS = 500  # Words per part of speech in the stand-in WordNet index
+
+
+def percentiles(values: list[float]) -> dict[str, float]:
+    """Summarise a sample.
+
+    Args:
+        values: The sample
+
+    Returns:
+        The count, p50, p90, p99 and max of the sample
+    """
+    values = sorted(values)
+    if not values:
+        return {"count": 0}
+
+    def rank(share: float) -> float:
+        return round(values[min(len(values) - 1, int(len(values) * share))], 6)
+
+    return {"count": len(values), "p50": rank(0.5), "p90": rank(0.9), "p99": rank(0.99), "max": round(values[-1], 6)}
+
+
+def rebase(url: str, base: str) -> str:
+    """Move a URL onto another scheme and host, keeping its path and query.
+
+    Args:
+        url: The URL, e.g. https://weather.gc.ca/en/location/index.html?coords=
+        base: The new scheme and host, e.g. http://127.0.0.1:8080
+
+    Returns:
+        The moved URL
+    """
+    parts = urlsplit(url)
+    return base + url[len(f"{parts.scheme}://{parts.netloc}") :]
+
+
+def refuse_remote_hosts() -> None:
+    """Fail any name lookup that isn't local, so a client that wasn't pointed at a fake fails instead of hanging."""
+    getaddrinfo = socket.getaddrinfo
+
+    def local_getaddrinfo(host: Any, *args: Any, **kwargs: Any) -> Any:
+        if host not in LOCAL_HOSTS and not (isinstance(host, bytes) and host.decode() in LOCAL_HOSTS):
+            raise OSError(f"The benchmark is offline, refused to look up {host}")
+        return getaddrinfo(host, *args, **kwargs)
+
+    socket.getaddrinfo = local_getaddrinfo
+
+
+def prepare_home() -> Path:
+    """Point the home directory (where the vault lives) at a temporary one, answer the vault's password prompt, and
+    put the process on the daemon's timezone.
+
+    This has to happen before Automated_Tasker is imported, as its vault, caches and stores are created on import.
+
+    Returns:
+        The temporary home directory
+    """
+    home = Path(tempfile.mkdtemp(prefix="tasker-benchmark-"))
+    os.environ["HOME"] = str(home)
+    getpass.getpass = lambda prompt="": VAULT_PASSWORD
+    os.environ["TZ"] = HOST_TIMEZONE
+    if hasattr(time, "tzset"):
+        time.tzset()
+    return home
+
+
+def write_lemma_index() -> None:
+    """Write a stand-in for the WordNet lemma index, which would otherwise be downloaded for the word games."""
+    from array import array
+
+    from Automated_Tasker.utils.lemma_index import OFFSET_TYPE, PARTS_OF_SPEECH, get_index_directory
+
+    directory = get_index_directory()
+    for pos in PARTS_OF_SPEECH:
+        lemmas = [f"{pos}-word-{i}".encode() for i in range(LEMMAS)]
+        offsets = array(OFFSET_TYPE, [0])
+        for lemma in lemmas:
+            offsets.append(offsets[-1] + len(lemma))
+        (directory / f"{pos}.lemmas").write_bytes(b"".join(lemmas))
+        (directory / f"{pos}.offsets").write_bytes(offsets.tobytes())
+
+
+def install(fakes: FakeServices, services: ServiceContainer) -> None:
+    """Point every client at its fake, the Google ones through the container building them."""
+    from Automated_Tasker.services import discord, pushbullet, switchbot, weather
+    from Automated_Tasker.services.calendar import GoogleCalendarClient
+    from Automated_Tasker.services.maps import GoogleMapsClient
+    from Automated_Tasker.utils import geocode, ottawa_swimschedule
+
+    async def build_calendar(services: ServiceContainer) -> GoogleCalendarClient:
+        return await asyncio.to_thread(GoogleCalendarClient, services.vault, f"{fakes.calendar.url}/calendar/v3/")
+
+    async def build_maps(services: ServiceContainer) -> GoogleMapsClient:
+        return GoogleMapsClient(services.vault, base_url=fakes.maps.url)
+
+    switchbot.URL = f"{fakes.switchbot.url}/"
+    pushbullet.URL = f"{fakes.pushbullet.url}/"
+    discord.URL = rebase(discord.URL, fakes.discord.url)
+    weather.URL = rebase(weather.URL, fakes.weather.url)
+    geocode.URL = f"{fakes.nominatim.url}/"
+    ottawa_swimschedule.listings_url = rebase(ottawa_swimschedule.listings_url, fakes.ottawa.url)
+    ottawa_swimschedule.facility_url = rebase(ottawa_swimschedule.facility_url, fakes.ottawa.url)
+    services.register("calendar", build_calendar, healthy=lambda calendar: calendar.creds.valid)
+    services.register("maps", build_maps, close=GoogleMapsClient.close)
+
+
+async def run(start: datetime, days: float, fakes: FakeServices) -> dict[str, Any]:
+    """Replay the days with the fakes up, and gather the results."""
+    from Automated_Tasker.daemon import Daemon
+    from Automated_Tasker.services.outbox import Outbox
+    from Automated_Tasker.simulation import replay
+    from Automated_Tasker.tasklist import Tasks
+    from Automated_Tasker.tasks.swimschedule import GetSwimSchedule
+    from Automated_Tasker.utils.geocode import geocodes
+    from Automated_Tasker.utils.http_cache import http_cache
+
+    async with fakes:
+        daemon = Daemon()
+        install(fakes, daemon.services)
+        if GetSwimSchedule not in Tasks.global_tasklist:
+            Tasks.register(GetSwimSchedule)
+        Tasks.history.clear()
+        Outbox.start(daemon.services)
+
+        wall, cpu = time.perf_counter(), time.process_time()
+        await replay(daemon, start + timedelta(days=days), dry_run=False)
+        wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+        services = daemon.services.report()
+
+    runs = list(Tasks.history)
+    requests = fakes.requests()
+    total_requests = sum(fake["total"] for fake in requests.values())
+    tasks: dict[str, dict[str, Any]] = {}
+    for name in dict.fromkeys(run["name"] for run in runs):
+        named = [run for run in runs if run["name"] == name]
+        tasks[name] = {
+            "runs": len(named),
+            "failures": sum(run["failed"] for run in named),
+            "wall": percentiles([run["wall"] for run in named]),
+        }
+    return {
+        "throughput": {
+            "task_runs_per_second": round(len(runs) / wall, 3),
+            "requests_per_second": round(total_requests / wall, 3),
+            "simulated_seconds_per_second": round(days * 86400 / wall, 1),
+        },
+        "wall_seconds": round(wall, 3),
+        "cpu_seconds": round(cpu, 3),
+        "peak_rss_bytes": peak_rss(),
+        "task_runs": len(runs),
+        "task_failures": sum(run["failed"] for run in runs),
+        "task_wall": percentiles([run["wall"] for run in runs]),
+        "task_lag": percentiles([lag(run) for run in runs]),
+        "tasks": tasks,
+        "requests": requests,
+        "pushes": len(fakes.pushbullet.pushes),
+        "outbox": {key: round(value, 3) for key, value in Outbox.stats().items()},
+        "services": services,
+        "http_cache": {"hits": http_cache.hits, "misses": http_cache.misses},
+        "geocode_lookups": geocodes.lookups,
+    }
+
+
+def lag(run: dict[str, Any]) -> float:
+    """Get how many seconds after its TIME a task run started."""
+    started = run["started"]
+    midnight = datetime.combine(started.date(), datetime.min.time())
+    return (started.replace(tzinfo=None) - midnight - run["scheduled"]).total_seconds()
+
+
+def peak_rss() -> int | None:
+    """Get the peak resident set size of the process in bytes, None where the resource module is missing."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024  # Linux reports kilobytes
+
+
+def git_commit() -> str | None:
+    try:
+        command = ["git", "rev-parse", "--short", "HEAD"]
+        done = subprocess.run(command, capture_output=True, text=True, check=True, cwd=Path(__file__).parent)
+        return done.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def benchmark(start: datetime, days: float, pools: int, failure_rate: float) -> dict[str, Any]:
+    """Set up the home directory, vault and fakes, and replay the days on virtual time.
+
+    Args:
+        start: When the replay starts, on the local wall clock
+        days: How many days to replay
+        pools: The number of pools ottawa.ca lists
+        failure_rate: The share of requests the fakes answer with a 503
+
+    Returns:
+        The results, with what was run and where
+    """
+    prepare_home()
+    refuse_remote_hosts()
+
+    from Automated_Tasker.tasklist import LOCAL_TIMEZONE
+    from Automated_Tasker.utils import clock
+    from Automated_Tasker.utils.vault import vault
+
+    for tag, entry in VAULT_ENTRIES.items():
+        vault.store_entry(tag, entry)
+    write_lemma_index()
+
+    start = LOCAL_TIMEZONE.localize(start) if start.tzinfo is None else start
+    loop = clock.VirtualTimeLoop()
+    try:
+        with clock.use_clock(clock.VirtualClock(loop, start)):
+            results = loop.run_until_complete(run(start, days, FakeServices(failure_rate, pools)))
+            pending = asyncio.all_tasks(loop)  # e.g. the outbox waiting out its coalescing window
+            for task in pending:
+                task.cancel()
+            if pending:
+                loop.run_until_complete(asyncio.wait(pending))
+    finally:
+        loop.close()
+
+    return {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "parameters": {"start": start.isoformat(), "days": days, "pools": pools, "failure_rate": failure_rate},
+        **results,
+    }
+
+
+def flatten(results: dict[str, Any], prefix: str = "") -> dict[str, float]:
+    """Flatten the numbers in nested results into dotted keys."""
+    flat = {}
+    for key, value in results.items():
+        if isinstance(value, dict):
+            flat.update(flatten(value, f"{prefix}{key}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[f"{prefix}{key}"] = value
+    return flat
+
+
+def compare(baseline: dict[str, Any], results: dict[str, Any]) -> str:
+    """Tabulate how every number changed from a baseline's results.
+
+    Args:
+        baseline: Earlier results
+        results: The new results
+
+    Returns:
+        A row per number in either, with both values and the relative change
+    """
+    from tabulate import tabulate
+
+    before, after = flatten(baseline), flatten(results)
+    rows = []
+    for key in dict.fromkeys([*before, *after]):
+        old, new = before.get(key), after.get(key)
+        change = f"{(new - old) / old:+.1%}" if old and new is not None else ""
+        rows.append([key, old, new, change])
+    return tabulate(
+        rows, headers=["Metric", baseline.get("commit") or "baseline", results.get("commit") or "current", "Change"]
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--start", type=datetime.fromisoformat, default=datetime(2026, 5, 1), help="Local start time (a Friday)"
+    )
+    parser.add_argument("--days", type=float, default=1, help="How many days to replay")
+    parser.add_argument("--pools", type=int, default=24, help="How many pools ottawa.ca lists")
+    parser.add_argument("--failure-rate", type=float, default=0, help="Share of requests the fakes fail with a 503")
+    parser.add_argument("--output", type=Path, help="Where to write the results, results/end_to_end-<commit>.json")
+    parser.add_argument("--compare", type=Path, help="Earlier results to compare with")
+    parser.add_argument("--verbose", action="store_true", help="Log everything the daemon logs")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING, format="%(levelname)s %(message)s")
+    results = benchmark(args.start, args.days, args.pools, args.failure_rate)
+
+    output = args.output or RESULTS / f"end_to_end-{results['commit'] or 'unknown'}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2, default=str))
+    print(json.dumps({key: results[key] for key in ("throughput", "task_wall", "peak_rss_bytes")}, indent=2))
+    print(f"Results written to {output}")
+    if args.compare:
+        print(compare(json.loads(args.compare.read_text()), results))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,423 @@
+"""Local stand-ins for every external service the tasks talk to, so they can be benchmarked without a network.
+
+Each fake is its own aiohttp app on an ephemeral 127.0.0.1 port, started on the running loop (a VirtualTimeLoop
+included). Every request is counted by route, and a share of them can be answered with a 503 to exercise the
+clients' retries. The responses are deterministic, only as detailed as the tasks' parsers need, and shaped after
+the real APIs:
+
+- SwitchBot: devices, scenes, statuses and commands, with device state the commands change
+- Google Calendar: the events of the day asked about
+- Google Distance Matrix: a travel time per destination
+- Pushbullet: pushes
+- Discord REST: guilds, channels and messages, with rate limit headers
+- weather.gc.ca: the pages in fixtures/weather, with ETags
+- ottawa.ca: pool listings and facility pages, with ETags
+- Nominatim: a position per address, around Ottawa
+"""
+
+from __future__ import annotations
+
+import hashlib
+import random
+from collections import Counter
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Any, ClassVar, Self
+
+from aiohttp import web
+
+FIXTURES = Path(__file__).parent / "fixtures"
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+
+def _digest(text: str) -> int:
+    return int(hashlib.sha256(text.encode()).hexdigest()[:8], 16)
+
+
+def _cached_page(request: web.Request, body: str) -> web.Response:
+    etag = f'"{hashlib.sha256(body.encode()).hexdigest()[:16]}"'
+    if request.headers.get("If-None-Match") == etag:
+        return web.Response(status=304, headers={"ETag": etag})
+    return web.Response(text=body, content_type="text/html", headers={"ETag": etag})
+
+
+class Fake:
+    """An in-process HTTP service, counting the requests made to each of its routes."""
+
+    NAME = "fake"
+
+    def __init__(self, failure_rate: float = 0.0, seed: int = 0):
+        """Prepare the service's app.
+
+        Args:
+            failure_rate: The share of requests answered with a 503
+            seed: Seeds which requests fail
+        """
+        self.failure_rate = failure_rate
+        self.random = random.Random(f"{self.NAME}-{seed}")
+        self.requests: Counter[str] = Counter()
+        self.failures = 0
+        self.url = ""
+        self.app = web.Application(middlewares=[self._count])
+        self.add_routes(self.app.router)
+        self._runner: web.AppRunner | None = None
+
+    def add_routes(self, router: web.UrlDispatcher) -> None:
+        raise NotImplementedError
+
+    async def start(self) -> None:
+        """Serve the app on a free port, and set url to it."""
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, "127.0.0.1", 0).start()
+        host, port = self._runner.addresses[0][:2]
+        self.url = f"http://{host}:{port}"
+
+    async def stop(self) -> None:
+        """Stop serving."""
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    @web.middleware
+    async def _count(self, request: web.Request, handler: Any) -> web.StreamResponse:
+        resource = request.match_info.route.resource
+        self.requests[f"{request.method} {resource.canonical if resource else request.path}"] += 1
+        if self.failure_rate and self.random.random() < self.failure_rate:
+            self.failures += 1
+            return web.Response(status=503)
+        return await handler(request)
+
+
+class SwitchBotFake(Fake):
+    """The SwitchBot API, with the devices the alarm and the litter checker use."""
+
+    NAME = "switchbot"
+    CLEAN_EVERY = 12  # Litter box statuses between self-cleans
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        states = {
+            "Nespresso": {},
+            "Curtain": {"slidePosition": 100, "moving": False},
+            "Left Bulb": {"power": "off", "brightness": 1, "color": "0:0:0"},
+            "Right Bulb": {"power": "off", "brightness": 1, "color": "0:0:0"},
+            "Alarm Light": {"power": "off"},
+            "Litterbox Position": {"openState": "timeOutNotClose"},
+        }
+        self.devices = {f"D{i:04X}": (name, state) for i, (name, state) in enumerate(states.items())}
+        self.scenes = {"S0001": "Good Morning", "S0002": "Good Night"}
+        self.commands: list[tuple[str, dict[str, Any]]] = []
+        self._polls = 0
+
+    def add_routes(self, router: web.UrlDispatcher) -> None:
+        router.add_get("/v1.1/devices", self.list_devices)
+        router.add_get("/v1.1/scenes", self.list_scenes)
+        router.add_get("/v1.1/devices/{device_id}/status", self.status)
+        router.add_post("/v1.1/devices/{device_id}/commands", self.command)
+        router.add_get("/v1.1/scenes/{scene_id}/execute", self.execute)
+
+    @staticmethod
+    def _reply(body: Any) -> web.Response:
+        return web.json_response({"statusCode": 100, "body": body, "message": "success"})
+
+    async def list_devices(self, _: web.Request) -> web.Response:
+        devices = [{"deviceId": device_id, "deviceName": name} for device_id, (name, _) in self.devices.items()]
+        return self._reply({"deviceList": devices, "infraredRemoteList": []})
+
+    async def list_scenes(self, _: web.Request) -> web.Response:
+        return self._reply([{"sceneId": scene_id, "sceneName": name} for scene_id, name in self.scenes.items()])
+
+    async def status(self, request: web.Request) -> web.Response:
+        name, state = self.devices[request.match_info["device_id"]]
+        if "openState" in state:
+            self._polls += 1
+            if self._polls % self.CLEAN_EVERY == 0:
+                state["openState"] = "close" if state["openState"] != "close" else "timeOutNotClose"
+        return self._reply({"deviceId": request.match_info["device_id"], "deviceName": name, **state})
+
+    async def command(self, request: web.Request) -> web.Response:
+        name, state = self.devices[request.match_info["device_id"]]
+        payload = await request.json()
+        self.commands.append((name, payload))
+        command, parameter = payload["command"], payload.get("parameter")
+        if command in ("turnOn", "turnOff"):
+            state["power"] = "on" if command == "turnOn" else "off"
+        elif command == "setBrightness":
+            state["brightness"] = int(parameter)
+        elif command == "setColor":
+            state["color"] = parameter
+        elif command == "setPosition":
+            state["slidePosition"] = int(parameter.split(",")[-1])
+        return self._reply({})
+
+    async def execute(self, request: web.Request) -> web.Response:
+        if request.match_info["scene_id"] not in self.scenes:
+            return web.json_response({"statusCode": 190, "message": "no such scene"}, status=404)
+        return self._reply({})
+
+
+class CalendarFake(Fake):
+    """The Google Calendar events list, with the same few events every day.
+
+    There's a "-w" event with a reminder override (for SetAlarm), and events with locations (for the traffic
+    alerts)."""
+
+    NAME = "calendar"
+    EVENTS = (  # Summary, start, end, location, reminder override in minutes
+        ("-w Office", "09:00", "17:00", "100 Queen St, Ottawa, ON", 60),
+        ("Lunch", "12:00", "13:00", None, None),
+        ("Dentist", "17:45", "18:30", "1980 Ogilvie Rd, Ottawa, ON", None),
+        ("Swim", "19:30", "20:30", "2040 Ottawa St, Ottawa, ON", None),
+    )
+
+    def add_routes(self, router: web.UrlDispatcher) -> None:
+        router.add_get("/calendar/v3/calendars/{calendar_id}/events", self.list_events)
+
+    @classmethod
+    def events(cls, day: date) -> list[dict[str, Any]]:
+        events = []
+        for i, (summary, start, end, location, reminder) in enumerate(cls.EVENTS):
+            event = {
+                "kind": "calendar#event",
+                "id": f"{day:%Y%m%d}{i}",
+                "summary": summary,
+                "start": {"dateTime": f"{day}T{start}:00-05:00", "timeZone": "America/Toronto"},
+                "end": {"dateTime": f"{day}T{end}:00-05:00", "timeZone": "America/Toronto"},
+                "reminders": {"useDefault": True},
+            }
+            if location:
+                event["location"] = location
+            if reminder:
+                event["reminders"] = {"useDefault": False, "overrides": [{"method": "popup", "minutes": reminder}]}
+            events.append(event)
+        return events
+
+    async def list_events(self, request: web.Request) -> web.Response:
+        day = (datetime.fromisoformat(request.query["timeMin"]) + timedelta(hours=12)).date()
+        return web.json_response({"kind": "calendar#events", "timeZone": "America/Toronto", "items": self.events(day)})
+
+
+class DistanceMatrixFake(Fake):
+    """The Google Distance Matrix API, with a travel time between 10 and 40 minutes per destination."""
+
+    NAME = "maps"
+
+    def add_routes(self, router: web.UrlDispatcher) -> None:
+        router.add_get("/maps/api/distancematrix/json", self.distance)
+
+    async def distance(self, request: web.Request) -> web.Response:
+        origin, destination = request.query["origins"], request.query["destinations"]
+        minutes = 10 + _digest(destination) % 31
+        element = {
+            "status": "OK",
+            "distance": {"text": f"{minutes * 0.8:.1f} km", "value": minutes * 800},
+            "duration": {"text": f"{minutes} mins", "value": minutes * 60},
+        }
+        return web.json_response(
+            {
+                "status": "OK",
+                "origin_addresses": [origin],
+                "destination_addresses": [destination],
+                "rows": [{"elements": [element]}],
+            }
+        )
+
+
+class PushbulletFake(Fake):
+    """The Pushbullet API, keeping every push."""
+
+    NAME = "pushbullet"
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.pushes: list[dict[str, Any]] = []
+
+    def add_routes(self, router: web.UrlDispatcher) -> None:
+        router.add_post("/v2/pushes", self.push)
+
+    async def push(self, request: web.Request) -> web.Response:
+        push = await request.json()
+        self.pushes.append(push)
+        return web.json_response({"active": True, "iden": str(len(self.pushes)), "dismissed": False, **push})
+
+
+class DiscordFake(Fake):
+    """The Discord REST API, with one guild whose channel routes report a small rate limit bucket."""
+
+    NAME = "discord"
+    GUILD: ClassVar[dict[str, str]] = {"id": "100", "name": "Factorio & Swim Club"}
+    CHANNELS: ClassVar[list[dict[str, Any]]] = [
+        {"id": "101", "name": "general", "type": 0},
+        {"id": "102", "name": "swim-schedule", "type": 0},
+    ]
+    BUCKET = 5  # Requests per route before X-RateLimit-Remaining reaches 0
+    RESET_AFTER = 1.0  # seconds
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.messages: dict[str, list[dict[str, Any]]] = {channel["id"]: [] for channel in self.CHANNELS}
+        self._used: Counter[str] = Counter()
+
+    def add_routes(self, router: web.UrlDispatcher) -> None:
+        router.add_get("/api/v10/users/@me/guilds", self.guilds)
+        router.add_get("/api/v10/guilds/{guild_id}/channels", self.channels)
+        router.add_post("/api/v10/channels/{channel_id}/messages", self.post_message)
+        router.add_get("/api/v10/channels/{channel_id}/messages", self.get_messages)
+
+    def _limited(self, request: web.Request, body: Any) -> web.Response:
+        route = f"{request.method} {request.path}"
+        self._used[route] += 1
+        remaining = self.BUCKET - 1 - (self._used[route] - 1) % self.BUCKET
+        headers = {"X-RateLimit-Remaining": str(remaining), "X-RateLimit-Reset-After": str(self.RESET_AFTER)}
+        return web.json_response(body, headers=headers)
+
+    async def guilds(self, request: web.Request) -> web.Response:
+        return self._limited(request, [self.GUILD])
+
+    async def channels(self, request: web.Request) -> web.Response:
+        if request.match_info["guild_id"] != self.GUILD["id"]:
+            return web.json_response({"message": "Unknown Guild", "code": 10004}, status=404)
+        return self._limited(request, self.CHANNELS)
+
+    async def post_message(self, request: web.Request) -> web.Response:
+        messages = self.messages.get(request.match_info["channel_id"])
+        if messages is None:
+            return web.json_response({"message": "Unknown Channel", "code": 10003}, status=404)
+        message = {"id": str(len(messages) + 1), "content": (await request.json())["content"]}
+        messages.append(message)
+        return self._limited(request, message)
+
+    async def get_messages(self, request: web.Request) -> web.Response:
+        messages = self.messages.get(request.match_info["channel_id"])
+        if messages is None:
+            return web.json_response({"message": "Unknown Channel", "code": 10003}, status=404)
+        limit = int(request.query.get("limit", 50))
+        return self._limited(request, messages[::-1][:limit])
+
+
+class WeatherFake(Fake):
+    """weather.gc.ca location pages, served from fixtures/weather (the same page for every location)."""
+
+    NAME = "weather"
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.pages = sorted((FIXTURES / "weather").glob("*.html"))
+
+    def add_routes(self, router: web.UrlDispatcher) -> None:
+        router.add_get("/en/location/index.html", self.location)
+
+    async def location(self, request: web.Request) -> web.Response:
+        page = self.pages[_digest(request.query.get("coords", "")) % len(self.pages)]
+        return _cached_page(request, page.read_text(encoding="utf-8"))
+
+
+class OttawaFake(Fake):
+    """The ottawa.ca pool listings and facility pages, with lane and public swims on every weekday."""
+
+    NAME = "ottawa"
+    LISTING = "/en/recreation-and-parks/facilities/place-listing"
+    PER_PAGE = 10  # Pools per listing page
+    TIMES = ("6:30 - 8 am", "7 - 8:30 am", "noon - 1 pm", "11:30 am - 1 pm", "5:30 - 7 pm", "7:30 - 9 pm")
+
+    def __init__(self, *args: Any, pools: int = 24, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.pools = [(f"Pool {i + 1} Recreation Centre", f"{100 + 10 * i} Bank St") for i in range(pools)]
+
+    def add_routes(self, router: web.UrlDispatcher) -> None:
+        router.add_get(self.LISTING, self.listing)
+        router.add_get(self.LISTING + "/{slug}", self.facility)
+
+    async def listing(self, request: web.Request) -> web.Response:
+        first = int(request.query.get("page", 0)) * self.PER_PAGE
+        pools = self.pools[first : first + self.PER_PAGE]
+        if not pools:
+            return _cached_page(request, "<html><body><p>No results found.</p></body></html>")
+        rows = "".join(f"<tr><td>{name}</td><td>{address}\nOttawa, ON</td></tr>" for name, address in pools)
+        table = f'<table class="table table-bordered table-condensed cols-2"><tbody>{rows}</tbody></table>'
+        return _cached_page(request, f"<html><body>{table}</body></html>")
+
+    async def facility(self, request: web.Request) -> web.Response:
+        slug = request.match_info["slug"]
+        times = random.Random(slug)
+        headings = "".join(f"<th>{day}</th>" for day in ["Schedule", *WEEKDAYS])
+        rows = ""
+        for activity in ("Lane swim", "Public swim", "Aquafit"):
+            cells = "".join(f"<td>{times.choice(self.TIMES + ('',))}</td>" for _ in WEEKDAYS)
+            rows += f"<tr><th>{activity}</th>{cells}</tr>"
+        table = (
+            f"<table><caption>Swim and aquafit - {slug.replace('-', ' ').title()}</caption>"
+            f"<thead><tr>{headings}</tr></thead><tbody>{rows}</tbody></table>"
+        )
+        return _cached_page(request, f"<html><body><h1>{slug}</h1>{table}</body></html>")
+
+
+class NominatimFake(Fake):
+    """The Nominatim search API, placing every address somewhere in Ottawa."""
+
+    NAME = "nominatim"
+
+    def add_routes(self, router: web.UrlDispatcher) -> None:
+        router.add_get("/search", self.search)
+
+    async def search(self, request: web.Request) -> web.Response:
+        address = request.query["q"]
+        digest = _digest(address)
+        latitude, longitude = 45.30 + (digest % 2000) / 10000, -75.85 + (digest // 2000 % 3000) / 10000
+        return web.json_response([{"lat": f"{latitude:.5f}", "lon": f"{longitude:.5f}", "display_name": address}])
+
+
+class FakeServices:
+    """Every fake, started and stopped together."""
+
+    def __init__(self, failure_rate: float = 0.0, pools: int = 24, seed: int = 0):
+        """Prepare the fakes.
+
+        Args:
+            failure_rate: The share of requests each fake answers with a 503
+            pools: The number of pools ottawa.ca lists
+            seed: Seeds which requests fail
+        """
+        self.switchbot = SwitchBotFake(failure_rate, seed)
+        self.calendar = CalendarFake(failure_rate, seed)
+        self.maps = DistanceMatrixFake(failure_rate, seed)
+        self.pushbullet = PushbulletFake(failure_rate, seed)
+        self.discord = DiscordFake(failure_rate, seed)
+        self.weather = WeatherFake(failure_rate, seed)
+        self.ottawa = OttawaFake(failure_rate, seed, pools=pools)
+        self.nominatim = NominatimFake(failure_rate, seed)
+        self.fakes: list[Fake] = [
+            self.switchbot,
+            self.calendar,
+            self.maps,
+            self.pushbullet,
+            self.discord,
+            self.weather,
+            self.ottawa,
+            self.nominatim,
+        ]
+
+    async def __aenter__(self) -> Self:
+        for fake in self.fakes:
+            await fake.start()
+        return self
+
+    async def __aexit__(self, *_: object) -> None:
+        for fake in self.fakes:
+            await fake.stop()
+
+    def requests(self) -> dict[str, dict[str, Any]]:
+        """Count the requests each fake got.
+
+        Returns:
+            The requests per route of each fake, with their total and the number answered with a 503
+        """
+        return {
+            fake.NAME: {
+                "total": sum(fake.requests.values()),
+                "failed": fake.failures,
+                "routes": dict(sorted(fake.requests.items())),
+            }
+            for fake in self.fakes
+        }
@@ -0,0 +1,112 @@
+"""Benchmark parse_time_ranges against a corpus of Ottawa schedule cells.
+
+The corpus in tests/fixtures/time_ranges.json pairs each cell text with its expected (start, stop) minutes, and
+tests/test_time_ranges.py checks the parser against it. Cells from real crawls can be added from the schedule
+store with --harvest, they are added with "expected": null until someone fills the answer in, and are only
+benchmarked until then.
+
+Usage:
+    python benchmarks/time_ranges.py [--number N] [--harvest ~/vault/swim_schedule.json]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import timeit
+from pathlib import Path
+from time import strptime
+
+from Automated_Tasker.utils.time_ranges import parse_time_ranges
+
+CORPUS = Path(__file__).parent.parent / "tests" / "fixtures" / "time_ranges.json"
+
+
+def legacy_parse(time_range: str) -> list[tuple[int, int]]:
+    """The strptime based convert_time_ranges the compiled parser replaced (minus the coroutines)."""
+
+    def convert_time(time_stamp: str):
+        time_stamp = time_stamp.strip().lower().encode("ascii", "ignore").decode()
+        if ":" in time_stamp:
+            if "am" in time_stamp or "pm" in time_stamp:
+                return strptime(time_stamp, "%I:%M %p")
+            return strptime(time_stamp, "%H:%M")
+        if "am" in time_stamp or "pm" in time_stamp:
+            return strptime(time_stamp, "%I %p")
+        return strptime(time_stamp, "%H")
+
+    periods = []
+    for period in time_range.replace("–", "-").replace("noon", "12:00 pm").split(","):
+        if "pm" in period and " pm" not in period:
+            period = period.replace("pm", " pm")
+        if "am" in period and " am" not in period:
+            period = period.replace("am", " am")
+        times = period.split("-")
+        times[0], times[1] = times[0].strip(), times[1].strip()
+        if times[1].endswith("m") and not times[0].endswith("m"):
+            times[0] = times[0] + " " + times[1][-2:]
+        start, stop = convert_time(times[0]), convert_time(times[1])
+        periods.append((start.tm_hour * 60 + start.tm_min, stop.tm_hour * 60 + stop.tm_min))
+    return periods
+
+
+def harvest(store: Path, corpus: list[dict]) -> int:
+    """Add every schedule cell in a ScheduleStore file that isn't in the corpus yet."""
+    known = {case["text"] for case in corpus}
+    added = 0
+    for page in json.loads(store.read_text())["pages"].values():
+        for table in page["tables"]:
+            for row in table["rows"]:
+                for cell in row["cells"]:
+                    lines = [line.strip() for line in cell.strip().lower().split("\n") if len(line.strip()) > 4]
+                    text = (" ,".join(lines)).replace(", ,", ", ")
+                    if lines and lines[0] != "n/a" and text not in known:
+                        corpus.append({"text": text, "expected": None})
+                        known.add(text)
+                        added += 1
+    return added
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--number", type=int, default=200, help="Passes over the corpus per measurement")
+    parser.add_argument("--harvest", type=Path, help="A swim_schedule.json to add unseen cells from")
+    args = parser.parse_args()
+
+    corpus = json.loads(CORPUS.read_text(encoding="utf-8"))
+    if args.harvest:
+        print(f"Harvested {harvest(args.harvest, corpus)} new cells.")
+        CORPUS.write_text(json.dumps(corpus, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+
+    texts = [case["text"] for case in corpus]
+    legacy_failures = 0
+    for text in texts:
+        try:
+            legacy_parse(text)
+        except (ValueError, IndexError):
+            legacy_failures += 1
+
+    def run_legacy() -> None:
+        for text in texts:
+            try:
+                legacy_parse(text)
+            except (ValueError, IndexError):
+                pass
+
+    def run_compiled() -> None:
+        parse_time_ranges.cache_clear()
+        for text in texts:
+            parse_time_ranges(text)
+
+    def run_memoised() -> None:
+        for text in texts:
+            parse_time_ranges(text)
+
+    print(f"Timing {len(texts)} cells ({legacy_failures} of which the legacy parser raises on):")
+    for name, function in (("legacy", run_legacy), ("compiled", run_compiled), ("compiled (memoised)", run_memoised)):
+        seconds = timeit.timeit(function, number=args.number) / args.number / len(texts)
+        print(f"  {name:<20} {seconds * 1e6:8.2f} us/cell")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Benchmark the incremental forecast extraction against the full BeautifulSoup parse it replaced.
+
+Every page in fixtures/weather is parsed both ways and the tonight forecasts are compared. Save more pages with:
+
+    curl -s "https://weather.gc.ca/en/location/index.html?coords=45.403,-75.687" > fixtures/weather/ottawa.html
+
+Usage:
+    python benchmarks/weather_forecast.py [--number N]
+"""
+
+from __future__ import annotations
+
+import argparse
+import timeit
+from pathlib import Path
+
+from Automated_Tasker.utils.weather_forecast import extract_forecast
+
+FIXTURES = Path(__file__).parent / "fixtures" / "weather"
+
+
+def is_tonight(forecast) -> bool:
+    return "tonight" in forecast.period.lower()
+
+
+def soup_tonight(html: str) -> str | None:
+    """The original Weather.execute extraction."""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, "html.parser")
+    weather_table = soup.find("table", class_="table mrgn-bttm-md textforecast")
+    for row in weather_table.find_all("tr"):
+        columns = row.find_all("td")
+        if len(columns) > 0 and "tonight" in columns[0].get_text(strip=True).lower():
+            return columns[1].get_text(strip=True)
+    return None
+
+
+def incremental_tonight(html: str) -> str | None:
+    forecast = extract_forecast(html, until=is_tonight)
+    return forecast[-1].summary if forecast and is_tonight(forecast[-1]) else None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--number", type=int, default=50, help="Runs per measurement")
+    args = parser.parse_args()
+
+    try:
+        import bs4  # noqa: F401
+
+        candidates = {"beautifulsoup": soup_tonight}
+    except ImportError:
+        print("bs4 is not installed, only timing the incremental parser.")
+        candidates = {}
+    candidates["incremental (tonight)"] = incremental_tonight
+    candidates["incremental (all)"] = extract_forecast
+
+    for fixture in sorted(FIXTURES.glob("*.html")):
+        html = fixture.read_text(encoding="utf-8")
+        print(f"{fixture.name} ({len(html) / 1024:.0f} KiB, {len(extract_forecast(html))} periods)")
+        if "beautifulsoup" in candidates and soup_tonight(html) != incremental_tonight(html):
+            print("  MISMATCH between beautifulsoup and incremental results")
+        for name, function in candidates.items():
+            timed = lambda function=function, html=html: function(html)  # Bound, not captured (B023)
+            seconds = timeit.timeit(timed, number=args.number) / args.number
+            print(f"  {name:<22} {seconds * 1000:8.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
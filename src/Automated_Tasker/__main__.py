@@ -1,10 +1,11 @@
 from __future__ import annotations
 
-from Automated_Tasker.daemon import Daemon
 import asyncio
 
+from Automated_Tasker.daemon import Daemon
+
 
-def main():
+def main() -> None:
     app = Daemon()
     loop = asyncio.get_event_loop()
     loop.run_until_complete(app.main_loop())
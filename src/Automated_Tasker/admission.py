@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import asyncio
+import collections
+import itertools
+import logging
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from typing import Any
+
+from Automated_Tasker.utils.metrics import TASK_ADMISSION_WAIT
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_CRITICAL = 0  # Someone is waiting on it at that minute, e.g. the alarm
+PRIORITY_NORMAL = 1
+PRIORITY_BULK = 2  # Nobody minds if it's late, e.g. crawls and word games
+
+MAX_RUNNING = 4  # Tasks running at once
+CRITICAL_RESERVE = 1  # Of those, slots only critical tasks can take, so they never wait for bulk work to finish
+RESOURCE_LIMITS = {"switchbot": 2, "google": 2, "discord": 1, "cpu": 1}  # Tasks using each resource at once
+DEFAULT_LIMIT = 2  # For resource tags not in RESOURCE_LIMITS
+
+
+@dataclass(order=True)
+class _Waiting:
+    priority: int
+    sequence: int
+    name: str = field(compare=False)
+    resources: frozenset[str] = field(compare=False)
+    admitted: asyncio.Future[None] = field(compare=False)
+
+
+class AdmissionController:
+    """Decides which due tasks run now, and which wait for what they need to free up.
+
+    Tasks may declare a PRIORITY (PRIORITY_CRITICAL, PRIORITY_NORMAL or PRIORITY_BULK) and RESOURCES, tags like
+    "switchbot", "google" or "cpu" for what they use. Waiting tasks are admitted most urgent first (then in the order
+    they became due) while every one of their resources is under its limit. A task that can't be admitted holds back
+    less urgent ones needing the same resources, while those needing others go ahead."""
+
+    def __init__(
+        self,
+        limits: dict[str, int] | None = None,
+        max_running: int = MAX_RUNNING,
+        reserve: int = CRITICAL_RESERVE,
+    ) -> None:
+        self.limits = RESOURCE_LIMITS if limits is None else limits
+        self.max_running = max_running
+        self.reserve = reserve
+        self.running = 0
+        self.in_use: collections.Counter[str] = collections.Counter()
+        self.waiting: list[_Waiting] = []
+        self.tasks: set[asyncio.Task[None]] = set()
+        self._sequence = itertools.count()
+
+    def submit(self, task: Any, run: Callable[[], Awaitable[None]]) -> asyncio.Task[None]:
+        """Run a task in the background once it is admitted.
+
+        Parameters:
+            task (Any): The task, for its NAME, PRIORITY and RESOURCES
+            run (Callable[[], Awaitable[None]]): Called once admitted, to run it
+
+        Returns:
+            asyncio.Task: Done when the task has run
+        """
+        background = asyncio.create_task(self.run(task, run))
+        self.tasks.add(background)
+        background.add_done_callback(self.tasks.discard)
+        return background
+
+    async def run(self, task: Any, run: Callable[[], Awaitable[None]]) -> None:
+        """Wait for a task to be admitted, then run it.
+
+        Parameters:
+            task (Any): The task, for its NAME, PRIORITY and RESOURCES
+            run (Callable[[], Awaitable[None]]): Called once admitted, to run it
+        """
+        loop = asyncio.get_running_loop()
+        waiting = _Waiting(
+            getattr(task, "PRIORITY", PRIORITY_NORMAL),
+            next(self._sequence),
+            task.NAME,
+            frozenset(getattr(task, "RESOURCES", [])),
+            loop.create_future(),
+        )
+        self.waiting.append(waiting)
+        start = loop.time()
+        self._admit()
+        try:
+            await waiting.admitted
+        except asyncio.CancelledError:
+            if waiting in self.waiting:
+                self.waiting.remove(waiting)
+            else:  # Cancelled right as it was admitted
+                self._release(waiting)
+            raise
+        TASK_ADMISSION_WAIT.observe(loop.time() - start, task=task.NAME)
+        try:
+            await run()
+        finally:
+            self._release(waiting)
+
+    async def stop(self) -> None:
+        """Cancel the tasks submitted and wait for them to wind down."""
+        for background in self.tasks:
+            background.cancel()
+        if self.tasks:
+            await asyncio.wait(self.tasks)
+
+    def _admit(self) -> None:
+        blocked: set[str] = set()
+        for waiting in sorted(self.waiting):
+            if waiting.admitted.cancelled():  # Its task is being cancelled, and will remove it
+                continue
+            room = self.max_running - (0 if waiting.priority <= PRIORITY_CRITICAL else self.reserve)
+            if self.running >= room:
+                break  # Anything less urgent has even less room
+            if waiting.resources & blocked or not all(
+                self.in_use[resource] < self.limits.get(resource, DEFAULT_LIMIT) for resource in waiting.resources
+            ):
+                blocked |= waiting.resources  # Held for this task, ahead of anything less urgent
+                continue
+            self.waiting.remove(waiting)
+            self.running += 1
+            self.in_use.update(waiting.resources)
+            waiting.admitted.set_result(None)
+            if self.waiting:
+                logger.info(f"Admitted {waiting.name}, {len(self.waiting)} tasks waiting.")
+
+    def _release(self, waiting: _Waiting) -> None:
+        self.running -= 1
+        self.in_use.subtract(waiting.resources)
+        self._admit()
+
+
+Admission = AdmissionController()
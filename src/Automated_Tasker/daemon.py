@@ -1,11 +1,21 @@
 from __future__ import annotations
 
-from Automated_Tasker.tasklist import Tasks
-from Automated_Tasker.subdaemon import Subdaemons
-from datetime import datetime
 import asyncio
-
 import logging
+from datetime import date
+
+from Automated_Tasker.admission import Admission
+from Automated_Tasker.prefetch import Prefetch
+from Automated_Tasker.services.container import ServiceContainer, register_default_services
+from Automated_Tasker.services.outbox import Outbox
+from Automated_Tasker.subdaemon import Subdaemons
+from Automated_Tasker.tasklist import Tasks, local_now
+from Automated_Tasker.utils.http_cache import http_cache
+from Automated_Tasker.utils.loop_monitor import LoopMonitor
+from Automated_Tasker.utils.metrics import metrics
+from Automated_Tasker.utils.profiler import Profiler
+from Automated_Tasker.utils.state_store import state
+from Automated_Tasker.utils.vault import vault
 
 logger = logging.getLogger(__name__)
 
@@ -15,29 +25,58 @@ LOOP_WAIT = 15
 class Daemon:
     """The simple daemon invoking the different tasklist functions."""
 
-    def __init__(self):
-        self.day = ""
+    def __init__(self) -> None:
+        self.day: date | None = None
         logging.basicConfig(
             level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s", handlers=[logging.StreamHandler()]
         )
         logger.info("Daemon initiated.")
         Tasks.load()
         Subdaemons.load()
+        self.services = register_default_services(ServiceContainer(vault))
+        self.monitor = LoopMonitor()
+
+    async def new_day(self, day: date) -> None:
+        """Swap in the day's tasklist (built ahead of midnight when possible), and recycle yesterday's clients and data.
+
+        Parameters:
+            day (date): The day starting, on the local wall clock
+        """
+        Tasks.roll_over(day)
+        Prefetch.new_day()
+        await self.services.new_day()
 
-    def new_day(self) -> None:
-        """Generate a new list based on the global registry."""
-        Tasks.create_daily_tasklist()
+    async def tick(self) -> None:
+        """Do one round of the main loop's checks: subdaemons, the day rolling over, and due tasks."""
+        today = local_now().date()
+        Subdaemons.restart_failed()
+        if self.day != today:
+            await self.new_day(today)
+            self.day = today
+        Tasks.precompute(self.services)
+        await Tasks.execute_daily_tasks(self.services)
 
     async def main_loop(self) -> None:
         """The main loop doing regular checks on daily tasks every LOOP_WAIT seconds."""
+        Outbox.start(self.services)
+        await metrics.start()
+        self.monitor.start()
+        Profiler.install_signal()
         logger.info("Initiating subdaemons.")
-        Subdaemons.start()
+        Subdaemons.start(self.services)
+        Tasks.start_triggers(self.services)
         logger.info("Entering main loop.")
-        while True:
-            current = datetime.now().day
-            Subdaemons.restart_failed()
-            if self.day != current:
-                self.new_day()
-                self.day = current
-            await Tasks.execute_daily_tasks()
-            await asyncio.sleep(LOOP_WAIT)
+        try:
+            while True:
+                await self.tick()
+                await asyncio.sleep(LOOP_WAIT)
+        finally:
+            Tasks.stop_triggers()
+            await Admission.stop()
+            await Outbox.stop()
+            http_cache.flush()
+            logger.info(f"Closing services, construction time: {self.services.report()}")
+            await self.services.close()
+            state.close()
+            self.monitor.stop()
+            await metrics.stop()
@@ -0,0 +1,192 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections.abc import AsyncIterator, Callable
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+from typing import Any
+
+from Automated_Tasker.utils import clock
+from Automated_Tasker.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+BUFFER = 64  # Events a subscriber can fall behind by before publishers wait (or the oldest is dropped)
+PUBLISH_TIMEOUT = 30  # seconds publish() waits on a full subscriber before dropping its oldest event instead
+
+EVENTS_PUBLISHED = metrics.counter("tasker_events_published_total", "Events published on the bus.")
+EVENTS_DROPPED = metrics.counter("tasker_events_dropped_total", "Events dropped as a subscriber's buffer was full.")
+
+
+@dataclass(frozen=True, kw_only=True)
+class Event:
+    """Something that happened, published on the bus. Subclass it for each kind of event."""
+
+    at: datetime = field(default_factory=lambda: clock.now(UTC))
+
+
+@dataclass(frozen=True, kw_only=True)
+class DeviceStateChanged(Event):
+    """A device reported a different value for one of its status fields."""
+
+    device: str  # The device's name, as in SwitchBotController.devices
+    key: str  # The status field, e.g. "openState"
+    value: Any
+    previous: Any = None
+
+
+Where = Callable[[Event], bool]
+
+
+@dataclass(frozen=True)
+class Trigger:
+    """What a task subscribes to, set as its TRIGGER to run it on events instead of at a TIME.
+
+    Parameters:
+        event (type[Event]): The kind of event, subclasses included
+        where (Where | None): Only events this returns True for
+        debounce (float): Wait until no event arrived for this many seconds, then deliver everything that did
+        coalesce (float): Deliver everything arriving within this many seconds of the first event together
+        buffer (int): Events held while the task is busy, before publishers have to wait, and the most in a batch
+    """
+
+    event: type[Event]
+    where: Where | None = None
+    debounce: float = 0
+    coalesce: float = 0
+    buffer: int = BUFFER
+
+
+class Subscription:
+    """A subscriber's bounded buffer of matching events, read in batches (see Trigger for the windows)."""
+
+    def __init__(self, bus: EventBus, trigger: Trigger):
+        self.bus = bus
+        self.trigger = trigger
+        self.queue: asyncio.Queue[Event] = asyncio.Queue(trigger.buffer)
+        self.dropped = 0
+        self.closed = False
+
+    def matches(self, event: Event) -> bool:
+        """Check whether an event is one the subscriber asked for.
+
+        Parameters:
+            event (Event): The published event
+
+        Returns:
+            bool: True if it's of the trigger's type and passes its filter
+        """
+        return isinstance(event, self.trigger.event) and (self.trigger.where is None or self.trigger.where(event))
+
+    async def get(self) -> list[Event]:
+        """Wait for the next event, and for the rest of its batch.
+
+        Returns:
+            list[Event]: The events of the batch, oldest first, at most the trigger's buffer of them (the rest start
+                the next batch)
+        """
+        batch = [await self.queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.trigger.coalesce
+        while (remaining := deadline - loop.time()) > 0:
+            if not await self._get_within(batch, remaining):
+                break
+        if self.trigger.debounce:
+            while await self._get_within(batch, self.trigger.debounce):
+                pass
+        return batch
+
+    async def _get_within(self, batch: list[Event], seconds: float) -> bool:
+        if len(batch) >= self.trigger.buffer:
+            return False
+        try:
+            batch.append(await asyncio.wait_for(self.queue.get(), seconds))
+            return True
+        except TimeoutError:
+            return False
+
+    def put_nowait(self, event: Event) -> None:
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+            EVENTS_DROPPED.inc(event=type(event).__name__)
+        self.queue.put_nowait(event)
+
+    def close(self) -> None:
+        """Stop receiving events."""
+        self.closed = True
+        self.bus.unsubscribe(self)
+
+    def __aiter__(self) -> AsyncIterator[list[Event]]:
+        return self._batches()
+
+    async def _batches(self) -> AsyncIterator[list[Event]]:
+        while True:
+            yield await self.get()
+
+
+class EventBus:
+    """An in-process publish/subscribe bus, for subdaemons to tell tasks what happened as it happens.
+
+    Every subscriber gets its own bounded queue, so a slow subscriber never holds up the others' deliveries. When
+    one is full, publish() waits up to PUBLISH_TIMEOUT for it to catch up (backpressure on the publisher), while
+    publish_nowait() drops that subscriber's oldest event right away. Either way a stuck subscriber can't hang the
+    publisher.
+    """
+
+    def __init__(self) -> None:
+        self.subscriptions: list[Subscription] = []
+
+    def subscribe(self, trigger: Trigger) -> Subscription:
+        """Start buffering the events a trigger matches.
+
+        Parameters:
+            trigger (Trigger): The kind of event, filter and windows
+
+        Returns:
+            Subscription: The buffer to read the events from, close it when done
+        """
+        subscription = Subscription(self, trigger)
+        self.subscriptions.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        """Stop delivering to a subscription.
+
+        Parameters:
+            subscription (Subscription): A subscription from subscribe()
+        """
+        if subscription in self.subscriptions:
+            self.subscriptions.remove(subscription)
+
+    async def publish(self, event: Event) -> None:
+        """Deliver an event to every matching subscriber, waiting on any whose buffer is full.
+
+        Parameters:
+            event (Event): The event
+        """
+        EVENTS_PUBLISHED.inc(event=type(event).__name__)
+        for subscription in [subscription for subscription in self.subscriptions if subscription.matches(event)]:
+            if subscription.closed:  # Closed while we waited on an earlier subscriber
+                continue
+            try:
+                await asyncio.wait_for(subscription.queue.put(event), PUBLISH_TIMEOUT)
+            except TimeoutError:
+                logger.warning(f"A subscriber to {type(event).__name__} is stuck, dropping its oldest event.")
+                subscription.put_nowait(event)
+        logger.debug(f"Published {event}.")
+
+    def publish_nowait(self, event: Event) -> None:
+        """Deliver an event to every matching subscriber without waiting, dropping their oldest events if full.
+
+        Parameters:
+            event (Event): The event
+        """
+        EVENTS_PUBLISHED.inc(event=type(event).__name__)
+        for subscription in self.subscriptions:
+            if subscription.matches(event):
+                subscription.put_nowait(event)
+
+
+Bus = EventBus()
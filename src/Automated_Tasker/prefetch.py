@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections.abc import Callable, Coroutine, Iterable
+from datetime import timedelta
+from typing import Any
+
+from aiohttp import ClientError
+
+from Automated_Tasker.services.container import ServiceContainer
+from Automated_Tasker.services.weather import Forecasts
+from Automated_Tasker.utils import clock
+
+logger = logging.getLogger(__name__)
+
+PREFETCH_LEAD = timedelta(minutes=10)  # How long before its first consumer a dependency is resolved
+
+Provider = Callable[[ServiceContainer], Coroutine[Any, Any, Any]]
+
+
+class PrefetchRegistry:
+    """The data tasks can declare they depend on (with DEPENDS), and the stage resolving it ahead of them.
+
+    Every tick the scheduler hands over the day's remaining tasks, and each dependency is started once the
+    earliest task needing it is within the lead time. The consumers within the lead time share that one result,
+    which is forgotten once they have all run (see release()), so a later consumer gets a fresh one rather than
+    what was fetched hours before. A consumer asking for something that wasn't (or couldn't be) prefetched
+    resolves it then.
+    """
+
+    def __init__(self, lead: timedelta = PREFETCH_LEAD):
+        self.lead = lead
+        self.providers: dict[str, Provider] = {}
+        self.results: dict[str, asyncio.Task[Any]] = {}
+        self.consumers: dict[str, set[str]] = {}
+
+    def provider(self, name: str) -> Callable[[Provider], Provider]:
+        """Decorator registering the coroutine function that resolves a dependency.
+
+        Parameters:
+            name (str): The name tasks list in their DEPENDS
+
+        Returns:
+            Callable[[Provider], Provider]: The decorator, leaving the function unchanged
+        """
+
+        def register(provider: Provider) -> Provider:
+            self.providers[name] = provider
+            return provider
+
+        return register
+
+    def schedule(self, tasks: Iterable[Any], services: ServiceContainer, now: timedelta | None = None) -> None:
+        """Start resolving the dependencies whose earliest consumer is within the lead time.
+
+        Parameters:
+            tasks (Iterable[Any]): The tasks left to run today, in order
+            services (ServiceContainer): The shared clients handed to the providers
+            now (timedelta | None): The time into today, the current time if None
+        """
+        if now is None:
+            current = clock.now()
+            now = timedelta(hours=current.hour, minutes=current.minute, seconds=current.second)
+        for task in tasks:
+            if task.TIME - self.lead > now:
+                break
+            for name in getattr(task, "DEPENDS", []):
+                self.consumers.setdefault(name, set()).add(task.NAME)
+                if name not in self.results:
+                    logger.info(f"Prefetching {name} for {task.NAME} ({task.TIME}).")
+                    self._start(name, services)
+
+    async def get(self, name: str, services: ServiceContainer) -> Any:
+        """Get a dependency, waiting for its prefetch if it's still running.
+
+        Parameters:
+            name (str): The registered name of the dependency
+            services (ServiceContainer): The shared clients, in case it has to be resolved now
+
+        Returns:
+            Any: The resolved value, shared with every other consumer
+        """
+        result = self.results.get(name)
+        if result is None:
+            result = self._start(name, services)
+        try:
+            return await asyncio.shield(result)
+        except asyncio.CancelledError:
+            raise
+        except (ClientError, OSError):  # Only a transient failure is worth another try
+            logger.info(f"Resolving {name} again.")
+            return await asyncio.shield(self._start(name, services))
+
+    def release(self, task: Any) -> None:
+        """Mark a task as done with its dependencies, forgetting those no other upcoming task was prefetched for.
+
+        Parameters:
+            task (Any): The task that ran
+        """
+        for name in getattr(task, "DEPENDS", []):
+            consumers = self.consumers.get(name, set())
+            consumers.discard(task.NAME)
+            if not consumers:
+                self.consumers.pop(name, None)
+                self.results.pop(name, None)
+
+    def new_day(self) -> None:
+        """Forget yesterday's results."""
+        for result in self.results.values():
+            result.cancel()
+        self.results = {}
+        self.consumers = {}
+
+    def _start(self, name: str, services: ServiceContainer) -> asyncio.Task[Any]:
+        self.results[name] = asyncio.create_task(self.providers[name](services))
+        self.results[name].add_done_callback(lambda result: self._log_failure(name, result))
+        return self.results[name]
+
+    @staticmethod
+    def _log_failure(name: str, result: asyncio.Task[Any]) -> None:
+        if not result.cancelled() and result.exception():
+            logger.warning(f"Prefetching {name} failed: {result.exception()!r}")
+
+
+Prefetch = PrefetchRegistry()
+
+
+@Prefetch.provider("calendar-events")
+async def _calendar_events(services: ServiceContainer) -> list[dict[str, Any]]:
+    calendar = await services.get("calendar")
+    return await asyncio.to_thread(lambda: list(calendar.get_todays_events()))
+
+
+@Prefetch.provider("forecasts")
+async def _forecasts(services: ServiceContainer) -> dict[str, Any]:
+    return await Forecasts.get_forecasts(await services.get("session"))
@@ -1,19 +1,20 @@
 from __future__ import annotations
 
-from Automated_Tasker.utils.vault import Vault
-
-from tempfile import TemporaryDirectory
-from pathlib import Path
-from pytz import timezone
 from collections.abc import Iterator
-from typing import Any
-
 from datetime import datetime, timedelta
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import Any, ClassVar
+
+from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
-from google.auth.transport.requests import Request
+from pytz import timezone
+
+from Automated_Tasker.utils import clock
+from Automated_Tasker.utils.vault import Vault
 
 
 class GoogleCalendarClient:
@@ -22,11 +23,13 @@ class GoogleCalendarClient:
     Requires the Google Cloud Project secret token for the account under the vault entry tag 'google-secrets'.
     This will create and use the google-creds entry for your temporary access and refresh tokens."""
 
-    SCOPES = ["https://www.googleapis.com/auth/calendar.readonly"]
+    SCOPES: ClassVar[list[str]] = ["https://www.googleapis.com/auth/calendar.readonly"]
 
-    def __init__(self, vault: Vault):
-        self.service = None
+    def __init__(self, vault: Vault, api_endpoint: str | None = None):
+        self.service: Any = None
+        self.creds: Any = None
         self.vault = vault
+        self.api_endpoint = api_endpoint  # The Calendar API if None, https://www.googleapis.com/calendar/v3/
         self.authenticate()
 
     def authenticate(self) -> None:
@@ -38,28 +41,32 @@ class GoogleCalendarClient:
 
             creds = self.vault.load_entries().get("google-creds")
             if creds:
-                open(cred_filename, "wt").write(creds)
+                cred_filename.write_text(creds)
                 creds = Credentials.from_authorized_user_file(cred_filename, scopes=self.SCOPES)
 
             if not creds or not creds.valid:
                 if creds and creds.expired and creds.refresh_token:
                     creds.refresh(Request())
                 else:
-                    open(secret_filename, "wt").write(self.vault.load_entries().get("google-secrets"))
+                    secret_filename.write_text(self.vault.load_entries()["google-secrets"])
                     flow = InstalledAppFlow.from_client_secrets_file(secret_filename, scopes=self.SCOPES)
                     creds = flow.run_local_server(port=0)
                 self.vault.store_entry("google-creds", creds.to_json())
 
-            self.service = build("calendar", "v3", credentials=creds, cache_discovery=False)
+            self.creds = creds
+            client_options = {"api_endpoint": self.api_endpoint} if self.api_endpoint else None
+            self.service = build(
+                "calendar", "v3", credentials=creds, cache_discovery=False, client_options=client_options
+            )
 
-    def get_today_startstop(self) -> tuple[datetime, datetime]:
+    def get_today_startstop(self) -> tuple[str, str]:
         """Get today's start and stop (in EST timezone), to query Google Calendar with.
 
         Returns:
-            datetime: Today (EST) start time
-            datetime: Today (EST) stop time
+            str: Today (EST) start time, in RFC 3339
+            str: Today (EST) stop time, in RFC 3339
         """
-        now = datetime.now()
+        now = clock.now()
         diff = timezone("UTC").localize(now) - timezone("EST").localize(now).astimezone(timezone("UTC"))
         start = (
             now
@@ -74,7 +81,7 @@ class GoogleCalendarClient:
         stop = (datetime(now.year, now.month, now.day, 23, 59, 59) - diff).isoformat() + ".000Z"
         return start, stop
 
-    def get_todays_events(self) -> Iterator[dict[Any]]:
+    def get_todays_events(self) -> Iterator[dict[str, Any]]:
         """Get today's Google Calendar events.
 
         Yields:
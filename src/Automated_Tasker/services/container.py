@@ -0,0 +1,210 @@
+from __future__ import annotations
+
+import asyncio
+import inspect
+import logging
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from typing import Any
+
+from aiohttp import ClientError, ClientSession
+
+from Automated_Tasker.services.calendar import GoogleCalendarClient
+from Automated_Tasker.services.discord import DiscordREST
+from Automated_Tasker.services.maps import GoogleMapsClient
+from Automated_Tasker.services.pushbullet import PushbulletNotifier
+from Automated_Tasker.services.switchbot import SwitchBotController
+from Automated_Tasker.utils.vault import Vault
+
+logger = logging.getLogger(__name__)
+
+Factory = Callable[["ServiceContainer"], Awaitable[Any]]
+Check = Callable[[Any], bool | Awaitable[bool]]
+Closer = Callable[[Any], None | Awaitable[None]]
+
+DISCORD_TOKEN = "discord-token-1322957423941648544"  # The vault entry of the bot's token
+
+
+@dataclass
+class _Service:
+    factory: Factory
+    healthy: Check | None = None
+    close: Closer | None = None
+    recycle: bool = True
+    instance: Any = None
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    builds: int = 0
+    build_seconds: float = 0.0
+
+
+class ServiceContainer:
+    """The clients shared by every task and subdaemon, each built the first time it's asked for.
+
+    A client is checked before it's handed out and rebuilt if the check fails (or if it was invalidated), and
+    every client is closed at the end of the day so each day starts from fresh credentials and connections. Clients
+    registered with recycle=False, like the HTTP session the subdaemons hold on to, are kept until close().
+    The time spent building each client is tracked, see report().
+    """
+
+    def __init__(self, vault: Vault):
+        self.vault = vault
+        self._services: dict[str, _Service] = {}
+
+    def register(
+        self,
+        name: str,
+        factory: Factory,
+        *,
+        healthy: Check | None = None,
+        close: Closer | None = None,
+        recycle: bool = True,
+    ) -> None:
+        """Add a client the container can build.
+
+        Parameters:
+            name (str): The name tasks ask for the client by
+            factory (Factory): A coroutine function building the client, given the container (for the vault or
+                other clients)
+            healthy (Check | None): Tells whether a built client can still be used, it's rebuilt if not
+            close (Closer | None): Releases a client's resources
+            recycle (bool): Whether new_day() closes the client, leave it open if it's used across midnight
+        """
+        self._services[name] = _Service(factory, healthy, close, recycle)
+
+    async def get(self, name: str) -> Any:
+        """Get a client, building it if it hasn't been yet (or is no longer healthy).
+
+        Parameters:
+            name (str): The registered name of the client
+
+        Returns:
+            Any: The client
+
+        Raises:
+            KeyError: Raised if no client was registered under the name
+        """
+        service = self._services[name]
+        async with service.lock:
+            if service.instance is not None and not await self._is_healthy(name, service):
+                logger.info(f"Service {name} failed its health check, rebuilding.")
+                await self._close(name, service)
+            if service.instance is None:
+                start = time.perf_counter()
+                service.instance = await service.factory(self)
+                elapsed = time.perf_counter() - start
+                service.builds += 1
+                service.build_seconds += elapsed
+                logger.info(f"Built service {name} in {elapsed:.2f} seconds.")
+            return service.instance
+
+    async def invalidate(self, name: str) -> None:
+        """Close a client so the next get() builds a new one, e.g. after it started failing.
+
+        Parameters:
+            name (str): The registered name of the client
+        """
+        service = self._services[name]
+        async with service.lock:
+            await self._close(name, service)
+
+    async def new_day(self) -> None:
+        """Close every recycled client, so they're rebuilt as they're needed through the day."""
+        logger.info(f"Service construction so far: {self.report()}")
+        for name, service in self._services.items():
+            if service.recycle:
+                async with service.lock:
+                    await self._close(name, service)
+
+    async def close(self) -> None:
+        """Close every built client."""
+        for name, service in self._services.items():
+            async with service.lock:
+                await self._close(name, service)
+
+    def report(self) -> dict[str, dict[str, float]]:
+        """Report how often each client was built and how long building took.
+
+        Returns:
+            dict[str, dict[str, float]]: The builds and total build seconds of each client
+        """
+        return {
+            name: {"builds": service.builds, "seconds": round(service.build_seconds, 3)}
+            for name, service in self._services.items()
+        }
+
+    @staticmethod
+    async def _is_healthy(name: str, service: _Service) -> bool:
+        if service.healthy is None:
+            return True
+        try:
+            healthy = service.healthy(service.instance)
+            return await healthy if inspect.isawaitable(healthy) else healthy
+        except (AttributeError, ClientError, OSError) as e:
+            logger.warning(f"Health check of {name} raised {e!r}.")
+            return False
+
+    @staticmethod
+    async def _close(name: str, service: _Service) -> None:
+        instance, service.instance = service.instance, None
+        if instance is None or service.close is None:
+            return
+        try:
+            closed = service.close(instance)
+            if inspect.isawaitable(closed):
+                await closed
+        except (ClientError, OSError, RuntimeError) as e:
+            logger.warning(f"Could not close {name}: {e!r}")
+
+
+async def _build_session(_: ServiceContainer) -> ClientSession:
+    return ClientSession()
+
+
+async def _build_calendar(services: ServiceContainer) -> GoogleCalendarClient:
+    # Authentication is blocking (and may refresh tokens over the network), keep it off the event loop
+    return await asyncio.to_thread(GoogleCalendarClient, services.vault)
+
+
+async def _build_maps(services: ServiceContainer) -> GoogleMapsClient:
+    return GoogleMapsClient(services.vault)
+
+
+async def _build_switchbot(services: ServiceContainer) -> SwitchBotController:
+    tokens = services.vault.load_entries()
+    controller = SwitchBotController(tokens["switchbot-token"], tokens["switchbot-secret"])
+    await controller.refresh(await services.get("session"))
+    return controller
+
+
+async def _build_pushbullet(services: ServiceContainer) -> PushbulletNotifier:
+    return PushbulletNotifier(services.vault.load_entries()["pushbullet-key"])
+
+
+async def _build_discord(services: ServiceContainer) -> DiscordREST:
+    return DiscordREST(services.vault.load_entries()[DISCORD_TOKEN])
+
+
+def register_default_services(services: ServiceContainer) -> ServiceContainer:
+    """Register the clients used by the tasks and subdaemons.
+
+    Parameters:
+        services (ServiceContainer): The container to register them in
+
+    Returns:
+        ServiceContainer: The same container
+    """
+    services.register(
+        "session",
+        _build_session,
+        healthy=lambda session: not session.closed,
+        close=ClientSession.close,
+        recycle=False,  # Subdaemons are mid-request on it at midnight, and it holds no credentials to refresh
+    )
+    services.register("calendar", _build_calendar, healthy=lambda calendar: calendar.creds.valid)
+    services.register("maps", _build_maps, close=GoogleMapsClient.close)
+    services.register("switchbot", _build_switchbot, healthy=lambda controller: bool(controller.devices))
+    # Both hold their own session (and Discord its channel index), kept until close() like the shared one
+    services.register("pushbullet", _build_pushbullet, close=PushbulletNotifier.close, recycle=False)
+    services.register("discord", _build_discord, close=DiscordREST.close, recycle=False)
+    return services
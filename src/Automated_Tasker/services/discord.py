@@ -1,24 +1,166 @@
-import discord
-from discord.ext import commands
 import asyncio
+import logging
+from collections.abc import Iterable
+from typing import Any
 
+from aiohttp import ClientSession
+
+from Automated_Tasker.utils.metrics import CLIENT_RETRIES
+
+logger = logging.getLogger(__name__)
+
+URL = "https://discord.com/api/v10/"
+TEXT_CHANNEL = 0  # Discord's channel type for guild text channels
+MESSAGE_LIMIT = 2000  # Characters
+CODE_FENCE = "```"
+
+# You're gonna want these API docs:
+# https://discord.com/developers/docs/resources/channel
+# https://discord.com/developers/docs/topics/rate-limits
+
+
+def pack_code_blocks(tables: Iterable[str], limit: int = MESSAGE_LIMIT) -> list[str]:
+    """Pack tabulate tables into as few code block messages as fit under Discord's message limit.
+
+    Tables share a message where they fit, and a table too long for the space left is split between rows,
+    repeating its header (the first two lines of a tabulate table) at the top of every continuation. Lines too
+    wide for a message to hold the header and a row are cut short with an ellipsis.
+
+    Args:
+        tables: The tables to post, in order
+        limit: The maximum length of a message
+
+    Returns:
+        The messages, each a single code block
+    """
+    overhead = len(CODE_FENCE) * 2 + 1  # The fences and the newline after the first, each line counts its own
+    width = (limit - overhead) // 3 - 1  # The widest line that still fits a header and a row in a message
+    messages: list[str] = []
+    current: list[str] = []
+    length = overhead
+
+    def flush() -> None:
+        nonlocal current, length
+        if current:
+            messages.append(f"{CODE_FENCE}\n" + "\n".join(current) + f"\n{CODE_FENCE}")
+        current, length = [], overhead
+
+    def add(lines: list[str]) -> None:
+        nonlocal length
+        current.extend(lines)
+        length += sum(len(line) + 1 for line in lines)
+
+    for table in tables:
+        lines = [line if len(line) <= width else line[: width - 1] + "…" for line in table.splitlines()]
+        header, rows = lines[:2], lines[2:]
+        start = ([""] if current else []) + header + rows[:1]
+        if current and length + sum(len(line) + 1 for line in start) > limit:
+            flush()
+            start = header + rows[:1]
+        add(start)
+        for row in rows[1:]:
+            if length + len(row) + 1 > limit:
+                flush()
+                add(header)
+            add([row])
+    flush()
+    return messages
+
+
+class DiscordREST:
+    """A lightweight REST-only Discord client, for posting without a gateway login.
+
+    Channels are looked up through a cached (guild name, channel name) -> channel id index, which is
+    rebuilt whenever Discord reports that an indexed channel no longer exists (or can't be seen)."""
 
-class DiscordBot(commands.Cog):
     def __init__(self, bot_token: str):
-        intents = discord.Intents.all()
-        intents.messages = True
-        intents.guilds = True
-        intents.message_content = True
-        self.bot = commands.Bot(command_prefix="!", intents=intents)
         self.bot_token = bot_token
-        self._ready_event = asyncio.Event()
+        self.session: ClientSession | None = None
+        self.channels: dict[tuple[str, str], int] = {}
+        self.reset_at: dict[str, float] = {}
+        self._index_lock = asyncio.Lock()
+
+    async def request(self, method: str, path: str, **kwargs: Any) -> Any:
+        """Make a request to the Discord API, respecting its rate limits.
+
+        A route whose rate limit bucket was reported as exhausted is held until the bucket resets, so a burst
+        of posts is paced by Discord's headers instead of by 429 responses.
+
+        Parameters:
+            method (str): The HTTP method
+            path (str): The API path, relative to URL
+            kwargs (Any): Passed through to the aiohttp request
+
+        Returns:
+            Any: The decoded JSON response
 
-        # Add event handlers
-        @self.bot.event
-        async def on_ready():
-            self._ready_event.set()
+        Raises:
+            LookupError: Raised if the resource does not exist or can't be accessed
+            ConnectionError: Raised for any other bad response
+        """
+        if self.session is None or self.session.closed:
+            self.session = ClientSession(headers={"Authorization": f"Bot {self.bot_token}"})
+        route = f"{method} {path}"
+        loop = asyncio.get_running_loop()
+        while True:
+            wait = self.reset_at.get(route, 0) - loop.time()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            async with self.session.request(method, URL + path, **kwargs) as response:
+                if response.headers.get("X-RateLimit-Remaining") == "0":
+                    reset_after = float(response.headers.get("X-RateLimit-Reset-After", 1))
+                    self.reset_at[route] = loop.time() + reset_after
+                if response.status == 429:
+                    CLIENT_RETRIES.inc(client="discord", operation=method)
+                    await asyncio.sleep(float((await response.json())["retry_after"]))
+                    continue
+                if response.status in (403, 404):
+                    raise LookupError(f"{method} {path} returned {response.status}")
+                if not response.ok:
+                    raise ConnectionError(f"{method} {path} returned {response.status}")
+                return await response.json()
+
+    async def refresh_index(self) -> None:
+        """Rebuild the (guild name, channel name) -> channel id index from every guild the bot is in."""
+        guilds = await self.request("GET", "users/@me/guilds")
+        listings = await asyncio.gather(*(self.request("GET", f"guilds/{guild['id']}/channels") for guild in guilds))
+        self.channels = {
+            (guild["name"], channel["name"]): int(channel["id"])
+            for guild, channels in zip(guilds, listings)
+            for channel in channels
+            if channel["type"] == TEXT_CHANNEL
+        }
+
+    async def get_channel_id(self, guild_name: str, channel_name: str) -> int | None:
+        """Look up a channel id, only going to Discord if the index doesn't know the channel.
+
+        Parameters:
+            guild_name (str): The name of the server (guild)
+            channel_name (str): The name of the channel
+
+        Returns:
+            int | None: The channel id, or None if no such channel is visible to the bot
+        """
+        key = (guild_name, channel_name)
+        if key not in self.channels:
+            async with self._index_lock:  # Concurrent posts share a single rebuild
+                if key not in self.channels:
+                    await self.refresh_index()
+        return self.channels.get(key)
+
+    async def _channel_request(self, guild_name: str, channel_name: str, method: str, path: str, **kwargs: Any) -> Any:
+        for attempt in range(2):
+            channel_id = await self.get_channel_id(guild_name, channel_name)
+            if channel_id is None:
+                raise LookupError(f"No channel {channel_name} in {guild_name}")
+            try:
+                return await self.request(method, f"channels/{channel_id}/{path}", **kwargs)
+            except LookupError:
+                if attempt:
+                    raise
+                self.channels.pop((guild_name, channel_name), None)  # Stale index entry, look it up again
 
-    async def post_message(self, guild_name: str, channel_name: str, message: str):
+    async def post_message(self, guild_name: str, channel_name: str, message: str) -> None:
         """
         Posts a message to a specific channel by name in a given guild.
 
@@ -30,12 +172,26 @@ class DiscordBot(commands.Cog):
         Returns:
             None
         """
-        await self._ready_event.wait()
-        for guild in self.bot.guilds:
-            if guild.name == guild_name:
-                for channel in guild.text_channels:
-                    if channel.name == channel_name:
-                        await channel.send(message)
+        await self._channel_request(guild_name, channel_name, "POST", "messages", json={"content": message})
+
+    async def post_messages(self, guild_name: str, channel_name: str, messages: Iterable[str]) -> None:
+        """
+        Posts a series of messages, in order, to a specific channel by name in a given guild.
+
+        The posts are sequential, as Discord orders a channel's messages by when they arrive, so each goes out
+        once the previous one is accepted (or its rate limit bucket resets). The channel id comes from the index
+        after the first post. Posting to different channels can be done concurrently.
+
+        Args:
+            guild_name (str): The name of the server (guild).
+            channel_name (str): The name of the channel.
+            messages (Iterable[str]): The messages to post.
+
+        Returns:
+            None
+        """
+        for message in messages:
+            await self.post_message(guild_name, channel_name, message)
 
     async def get_most_recent_message(self, guild_name: str, channel_name: str) -> str | None:
         """
@@ -46,29 +202,16 @@ class DiscordBot(commands.Cog):
             channel_name: The name of the channel.
 
         Returns:
-            discord.Message or None: The most recent message if found, otherwise None.
+            str or None: The content of the most recent message if found, otherwise None.
         """
-        await self._ready_event.wait()
-        for guild in self.bot.guilds:
-            if guild.name == guild_name:
-                for channel in guild.text_channels:
-                    if channel.name == channel_name:
-                        try:
-                            return (await anext(channel.history(limit=1))).content
-                        except discord.Forbidden:
-                            return None
-        return None
-
-    async def start_bot(self):
-        await self.bot.start(self.bot_token)
-
-    async def close_bot(self):
-        await self.bot.close()
-
-    async def __aenter__(self):
-        asyncio.create_task(self.start_bot())
-        await self._ready_event.wait()
-        return self
-
-    async def __aexit__(self, exc_type, exc_val, exc_tb):
-        await self.close_bot()
+        try:
+            messages = await self._channel_request(guild_name, channel_name, "GET", "messages", params={"limit": 1})
+        except LookupError:
+            return None
+        return messages[0]["content"] if messages else None
+
+    async def close(self) -> None:
+        """Close the underlying HTTP session."""
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
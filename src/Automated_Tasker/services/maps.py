@@ -1,8 +1,11 @@
 from __future__ import annotations
 
-from Automated_Tasker.utils.vault import Vault
+import asyncio
+
 import googlemaps
 
+from Automated_Tasker.utils.vault import Vault
+
 
 class GoogleMapsClient:
     """A class for accessing Google Maps APIs using the oauth2 API and Google Cloud Projects.
@@ -11,19 +14,25 @@ class GoogleMapsClient:
     This is a paid service, but I'm hoping the volumes are so low the price is negligable"""
 
     URL = "/maps/api/distancematrix/json"
+    BASE_URL = "https://maps.googleapis.com"
 
-    def __init__(self, vault: Vault):
+    def __init__(self, vault: Vault, base_url: str = BASE_URL):
         """Start all the SwitchBot alarm devices.
 
         Parameters:
             vault (Vault | None): The vault with the google maps API key
+            base_url (str): The scheme and host the API is reached on
         """
         self.api_key = vault.load_entries().get("google-maps-api-key")
-        self.client = googlemaps.Client(self.api_key)
+        self.client = googlemaps.Client(self.api_key, base_url=base_url)
+
+    def close(self) -> None:
+        """Close the underlying requests session."""
+        self.client.session.close()
 
     async def get_distance(
         self, *, origin: str, destination: str, arrival_time: int, mode: str = "driving", units: str = "metric"
-    ) -> dict:
+    ) -> dict[str, str]:
         """
         Get the distance and travel time between two locations.
 
@@ -44,7 +53,8 @@ class GoogleMapsClient:
             "units": units,
             "arrival_time": arrival_time,
         }
-        data = self.client._request(GoogleMapsClient.URL, params)
+        # googlemaps is requests based, so keep the blocking call off the event loop
+        data = await asyncio.to_thread(self.client._request, GoogleMapsClient.URL, params)
 
         if "rows" not in data:
             raise ValueError("Failed to fetch data")
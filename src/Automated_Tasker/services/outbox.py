@@ -0,0 +1,246 @@
+from __future__ import annotations
+
+import asyncio
+import collections
+import json
+import logging
+import statistics
+from typing import Any
+
+from aiohttp import ClientError
+
+from Automated_Tasker.services.container import ServiceContainer
+from Automated_Tasker.utils import clock
+from Automated_Tasker.utils.metrics import CLIENT_RETRIES
+from Automated_Tasker.utils.vault import Vault
+
+logger = logging.getLogger(__name__)
+
+COALESCE_WINDOW = 45  # seconds a push waits for others, covers tasks sharing a TIME (run LOOP_WAIT apart)
+RETRY_BASE = 30  # seconds, doubled after every failed delivery
+RETRY_MAX = 60 * 60  # seconds
+MAX_ATTEMPTS = 12  # Deliveries tried before a notification is dead-lettered, some six hours of retrying
+SAVE_DELAY = 1  # seconds the queue's changes are gathered for before it's written
+LATENCY_SAMPLES = 500
+TRANSIENT_ERRORS = (ConnectionError, ClientError, TimeoutError)  # Pushbullet down or busy, may go through later
+
+
+class NotificationOutbox:
+    """An async outbox delivering every notification through the service container's Pushbullet client.
+
+    Pushes queued within COALESCE_WINDOW of the first one waiting are merged into a single digest. The queue is
+    written to the vault directory so undelivered pushes survive Pushbullet outages and restarts, and are
+    retried with exponential backoff. Pushes Pushbullet rejects, or that still fail after MAX_ATTEMPTS, are moved
+    to a dead letter file next to the queue instead. Nothing is delivered before start() hands over the services.
+
+    Requires the PushBullet API key under the vault entry tag 'pushbullet-key'"""
+
+    def __init__(self, file_name: str = "outbox.json", window: float = COALESCE_WINDOW):
+        self.file_path = Vault.get_vault_directory() / file_name
+        self.dead_letter_path = self.file_path.with_name(f"{self.file_path.stem}-dead{self.file_path.suffix}")
+        self.window = window
+        self.queue: list[dict[str, Any]] | None = None
+        self.latencies: collections.deque[float] = collections.deque(maxlen=LATENCY_SAMPLES)
+        self.delivered = 0
+        self.failures = 0
+        self.dead = 0
+        self.services: ServiceContainer | None = None
+        self._wakeup = asyncio.Event()
+        self._lock = asyncio.Lock()
+        self._worker: asyncio.Task[None] | None = None
+        self._save_timer: asyncio.TimerHandle | None = None
+
+    def start(self, services: ServiceContainer) -> None:
+        """Load the persisted queue and resume delivering anything left over from a previous run.
+
+        Parameters:
+            services (ServiceContainer): The shared clients, for Pushbullet
+        """
+        self.services = services
+        queue = self._load()
+        if queue:
+            logger.info(f"Resuming delivery of {len(queue)} queued notifications.")
+            self._ensure_worker()
+
+    async def stop(self) -> None:
+        """Try to deliver what is queued one last time, stop delivering, and write out what is left."""
+        await self.flush()
+        if self._worker is not None:
+            self._worker.cancel()
+            await asyncio.wait([self._worker])
+            self._worker = None
+        if self.queue is not None:
+            self._write()
+        self.services = None
+
+    def notify(self, title: str, message: str) -> None:
+        """Queue a notification, this never blocks on (or raises for) Pushbullet.
+
+        Without a running event loop (or before start()) the notification is only queued, and delivered once start()
+        is called on one.
+
+        Parameters:
+            title (str): The title of the notification
+            message (str): The content of the notification
+        """
+        queue = self._load()
+        now = clock.timestamp()
+        waiting = [item["due"] for item in queue if item["attempts"] == 0]  # Not backing off from a failure
+        due = min(waiting) if waiting else now + self.window  # The window runs from the first push waiting
+        queue.append({"title": title, "message": message, "created": now, "due": due, "attempts": 0})
+        self._save()
+        self._ensure_worker()
+        self._wakeup.set()
+
+    async def flush(self) -> None:
+        """Attempt to deliver everything queued right now, skipping the coalescing window and any backoff."""
+        queue = self._load()
+        if queue and self.services is not None:
+            await self._deliver(list(queue))
+
+    def stats(self) -> dict[str, float]:
+        """Summarise the delivery metrics.
+
+        Returns:
+            dict[str, float]: Delivered, queued and dead-lettered counts, failed attempts and latency percentiles
+                (seconds)
+        """
+        latencies = sorted(self.latencies)
+        stats: dict[str, float] = {
+            "delivered": self.delivered,
+            "queued": len(self.queue or []),
+            "failures": self.failures,
+            "dead": self.dead,
+        }
+        if latencies:
+            stats["latency_mean"] = statistics.fmean(latencies)
+            stats["latency_p50"] = latencies[len(latencies) // 2]
+            stats["latency_p95"] = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+            stats["latency_max"] = latencies[-1]
+        return stats
+
+    @staticmethod
+    def digest(batch: list[dict[str, Any]]) -> tuple[str, str]:
+        """Merge a batch of queued notifications into a single title and message.
+
+        Parameters:
+            batch (list[dict[str, Any]]): The queued notifications, oldest first
+
+        Returns:
+            tuple[str, str]: The title and message of the push
+        """
+        if len(batch) == 1:
+            return batch[0]["title"], batch[0]["message"]
+        title = ", ".join(item["title"] for item in batch)
+        message = "\n\n".join(f"{item['title']}\n{item['message']}" for item in batch)
+        return title, message
+
+    def _ensure_worker(self) -> None:
+        if self.services is None:
+            return  # start() picks the queue up
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return  # start() picks the queue up
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        queue = self._load()
+        while queue:
+            now = clock.timestamp()
+            due = min(item["due"] for item in queue)
+            if due > now:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), due - now)
+                except TimeoutError:
+                    pass
+                continue
+            await self._deliver([item for item in queue if item["due"] <= now])
+
+    async def _deliver(self, batch: list[dict[str, Any]]) -> None:
+        async with self._lock:
+            queue = self._load()
+            batch = [item for item in batch if item in queue]  # flush() may have beaten us to it
+            if batch:
+                await self._push(queue, batch)
+
+    async def _push(self, queue: list[dict[str, Any]], batch: list[dict[str, Any]]) -> None:
+        assert self.services is not None  # Only started by start()
+        title, message = self.digest(batch)
+        try:
+            notifier = await self.services.get("pushbullet")
+            await notifier.send_notification(title, message)
+        except TRANSIENT_ERRORS as e:
+            self.failures += 1
+            CLIENT_RETRIES.inc(client="pushbullet", operation="send_notification")
+            now = clock.timestamp()
+            for item in batch:
+                item["attempts"] += 1
+                item["due"] = now + min(RETRY_BASE * 2 ** (item["attempts"] - 1), RETRY_MAX)
+            given_up = [item for item in batch if item["attempts"] >= MAX_ATTEMPTS]
+            if given_up:
+                self._bury(queue, given_up, f"still failing after {MAX_ATTEMPTS} attempts ({e!r})")
+            if len(given_up) < len(batch):
+                logger.warning(f"Could not deliver {len(batch) - len(given_up)} notifications ({e!r}), will retry.")
+        except Exception as e:  # Rejected (a bad key or push), or a bug, retrying won't get it through
+            self.failures += 1
+            logger.exception(f"Pushbullet did not take {len(batch)} notifications.")
+            self._bury(queue, batch, repr(e))
+        else:
+            now = clock.timestamp()
+            for item in batch:
+                queue.remove(item)
+                self.latencies.append(now - item["created"])
+            self.delivered += len(batch)
+            logger.info(f"Delivered {len(batch)} notifications in one push.")
+        self._save()
+
+    def _bury(self, queue: list[dict[str, Any]], batch: list[dict[str, Any]], reason: str) -> None:
+        for item in batch:
+            queue.remove(item)
+        self.dead += len(batch)
+        logger.error(f"Dead-lettered {len(batch)} notifications to {self.dead_letter_path.name}: {reason}")
+        try:
+            with open(self.dead_letter_path) as file:
+                dead = json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            dead = []
+        try:
+            with open(self.dead_letter_path, "w") as file:
+                json.dump(dead + [{**item, "reason": reason} for item in batch], file)
+        except OSError as e:
+            logger.warning(f"Could not persist the dead letters: {e!r}")
+
+    def _load(self) -> list[dict[str, Any]]:
+        if self.queue is None:
+            try:
+                with open(self.file_path) as file:
+                    self.queue = json.load(file)
+            except (FileNotFoundError, json.JSONDecodeError):
+                self.queue = []
+        assert self.queue is not None
+        return self.queue
+
+    def _save(self) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:  # Nothing to gather the changes on, write right away
+            self._write()
+            return
+        if self._save_timer is None:
+            self._save_timer = loop.call_later(SAVE_DELAY, self._write)
+
+    def _write(self) -> None:
+        if self._save_timer is not None:
+            self._save_timer.cancel()
+            self._save_timer = None
+        try:
+            with open(self.file_path, "w") as file:
+                json.dump(self._load(), file)
+        except OSError as e:
+            logger.warning(f"Could not persist the notification outbox: {e!r}")
+
+
+Outbox = NotificationOutbox()
@@ -1,6 +1,11 @@
 from __future__ import annotations
 
-from pushbullet import Pushbullet
+from aiohttp import ClientSession
+
+URL = "https://api.pushbullet.com/"
+
+# You're gonna want these API docs:
+# https://docs.pushbullet.com/#create-push
 
 
 class PushbulletNotifier:
@@ -8,14 +13,35 @@ class PushbulletNotifier:
 
     Requires the PushBullet API key under the vault entry tag 'pushbullet-key'"""
 
-    def __init__(self, api_key):
-        self.pb = Pushbullet(api_key)
+    def __init__(self, api_key: str):
+        self.api_key = api_key
+        self.session: ClientSession | None = None
 
-    def send_notification(self, title, message):
+    async def send_notification(self, title: str, message: str) -> None:
         """Send a simple notification by pushing with pushbullet.
 
         Parameters:
             title(str): The title of the notification
             message(str): The content of the notification
+
+        Raises:
+            ConnectionError: Raised if Pushbullet could not take the push right now (a 5xx or 429), worth retrying
+            PermissionError: Raised if Pushbullet rejected the push, e.g. for a bad key
         """
-        self.pb.push_note(title, message)
+        if self.session is None or self.session.closed:
+            self.session = ClientSession()
+        async with self.session.post(
+            f"{URL}v2/pushes",
+            headers={"Access-Token": self.api_key},
+            json={"type": "note", "title": title, "body": message},
+        ) as response:
+            if response.status == 429 or response.status >= 500:
+                raise ConnectionError(f"Could not push notification ({response.status})")
+            if not response.ok:
+                raise PermissionError(f"Pushbullet rejected the notification ({response.status})")
+
+    async def close(self) -> None:
+        """Close the underlying HTTP session."""
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
@@ -1,15 +1,17 @@
 from __future__ import annotations
 
 import asyncio
-import time
+import base64
 import hashlib
 import hmac
-import base64
+import time
 import uuid
-import json
+from typing import Any
 
 from aiohttp import ClientSession
 
+from Automated_Tasker.utils.metrics import CLIENT_RETRIES
+
 NUM_RETRIES = 10
 WAIT_RETRIES = 5  # Seconds
 
@@ -34,18 +36,18 @@ class SwitchBotController:
         """
         self.token = token
         self.secret = secret
-        self.devices = {}
-        self.scenes = {}
-    
+        self.devices: dict[str, str] = {}  # Names to device IDs
+        self.scenes: dict[str, str] = {}  # Names to scene IDs
+
     def _get_headers(self) -> dict[str, str]:
         nonce = uuid.uuid4()
-        t = str(int(round(time.time() * 1000)))
-        string_to_sign = f"{self.token}{t}{nonce}".encode("utf-8")
+        t = str(round(time.time() * 1000))
+        string_to_sign = f"{self.token}{t}{nonce}".encode()
         secret_bytes = self.secret.encode("utf-8")
 
-        sign = base64.b64encode(
-            hmac.new(secret_bytes, msg=string_to_sign, digestmod=hashlib.sha256).digest()
-        ).decode("utf-8")
+        sign = base64.b64encode(hmac.new(secret_bytes, msg=string_to_sign, digestmod=hashlib.sha256).digest()).decode(
+            "utf-8"
+        )
 
         return {
             "Authorization": self.token,
@@ -79,6 +81,7 @@ class SwitchBotController:
         for _ in range(NUM_RETRIES):
             async with session.get(f"{URL}v1.1/devices", headers=self._get_headers()) as response:
                 if not response.ok:
+                    CLIENT_RETRIES.inc(client="switchbot", operation="get_devices")
                     await asyncio.sleep(WAIT_RETRIES)
                     continue
                 listings = (await response.json())["body"]["deviceList"]
@@ -98,14 +101,15 @@ class SwitchBotController:
         for _ in range(NUM_RETRIES):
             async with session.get(f"{URL}v1.1/scenes", headers=self._get_headers()) as response:
                 if not response.ok:
+                    CLIENT_RETRIES.inc(client="switchbot", operation="get_scenes")
                     await asyncio.sleep(WAIT_RETRIES)
                     continue
-                listings = (await response.json())
+                listings = await response.json()
                 self.scenes = {scene["sceneName"]: scene["sceneId"] for scene in listings["body"]}
                 return
         raise ConnectionError("Could not get scenes")
 
-    async def command(self, session: ClientSession, device: str, payload: str) -> None:
+    async def command(self, session: ClientSession, device: str, payload: dict[str, Any]) -> None:
         """Post a command to a device.
 
         Parameters:
@@ -121,6 +125,7 @@ class SwitchBotController:
                 f"{URL}v1.1/devices/{self.devices[device]}/commands", headers=self._get_headers(), json=payload
             ) as response:
                 if not response.ok:
+                    CLIENT_RETRIES.inc(client="switchbot", operation="command")
                     await asyncio.sleep(WAIT_RETRIES)
                     continue
                 return
@@ -137,8 +142,11 @@ class SwitchBotController:
             ConnectionError: Raised if only bad responses are received after NUM_RETRIES attemps
         """
         for _ in range(NUM_RETRIES):
-            async with session.get(f"{URL}v1.1/devices/{self.devices[device]}/status", headers=self._get_headers()) as response:
+            async with session.get(
+                f"{URL}v1.1/devices/{self.devices[device]}/status", headers=self._get_headers()
+            ) as response:
                 if not response.ok:
+                    CLIENT_RETRIES.inc(client="switchbot", operation="status")
                     await asyncio.sleep(WAIT_RETRIES)
                     continue
                 return (await response.json())["body"]
@@ -152,13 +160,16 @@ class SwitchBotController:
             scene: The scene pulled from the scenes dict to execute
         """
         for _ in range(NUM_RETRIES):
-            async with session.get(f"{URL}v1.1/scenes/{self.scenes[scene]}/execute", headers=self._get_headers()) as response:
+            async with session.get(
+                f"{URL}v1.1/scenes/{self.scenes[scene]}/execute", headers=self._get_headers()
+            ) as response:
                 if not response.ok:
+                    CLIENT_RETRIES.inc(client="switchbot", operation="execute")
                     await asyncio.sleep(WAIT_RETRIES)
                     continue
                 return
         raise ConnectionError("Could not execute scene")
-    
+
     async def light_bulb(
         self,
         session: ClientSession,
@@ -175,11 +186,11 @@ class SwitchBotController:
             colour: A colour defined by an 256 RGB string (i.e., R:G:B)
         """
         tasks = [
-            ("power", "on", "turnOn", "default"), 
-            ("brightness", brightness, "setBrightness", brightness), 
+            ("power", "on", "turnOn", "default"),
+            ("brightness", brightness, "setBrightness", brightness),
             ("color", colour, "setColor", colour),
         ]
-        for _ in range(0, 10):
+        for _ in range(10):
             status = await self.status(session, device)
             if all(status[key] == value for key, value, _, _ in tasks):
                 return
@@ -201,7 +212,7 @@ class SwitchBotController:
             session: An aiohttp session to be used for all the switchbot requests
             device: The device ID
         """
-        for _ in range(0, 10):
+        for _ in range(10):
             status = await self.status(session, device)
             if status["power"] == "on":
                 return
@@ -209,11 +220,7 @@ class SwitchBotController:
             await self.command(session, device, {"command": "turnOn", "commandType": "command"})
             await asyncio.sleep(5)
 
-    async def press_bot(
-            self,
-            session: ClientSession,
-            device: str
-        ) -> None:
+    async def press_bot(self, session: ClientSession, device: str) -> None:
         """Press a bot.
 
         Parameters:
@@ -223,18 +230,14 @@ class SwitchBotController:
         await self.command(session, device, {"command": "press", "commandType": "command"})
         await asyncio.sleep(5)
 
-    async def open_curtain(
-        self,
-        session: ClientSession,
-        device: str
-    ) -> None:
+    async def open_curtain(self, session: ClientSession, device: str) -> None:
         """Turn every a specefic lightbulb on (to brightness and colour).
 
         Parameters:
             session: An aiohttp session to be used for all the switchbot requests
             device: The device ID
         """
-        for _ in range(0, 10):
+        for _ in range(10):
             status = await self.status(session, device)
             if "moving" in status and status["moving"] != False:
                 await asyncio.sleep(30)
@@ -243,10 +246,14 @@ class SwitchBotController:
             if status["slidePosition"] < 10:
                 return
 
-            await self.command(session, device, {
-                "command": "setPosition",
-                "parameter": "0,1,0",
-                "mode": "1",
-                "commandType": "command",
-            })
+            await self.command(
+                session,
+                device,
+                {
+                    "command": "setPosition",
+                    "parameter": "0,1,0",
+                    "mode": "1",
+                    "commandType": "command",
+                },
+            )
             await asyncio.sleep(5)
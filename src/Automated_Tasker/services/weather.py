@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+from collections.abc import Iterable
+from datetime import datetime, timedelta
+
+from aiohttp import ClientError, ClientSession
+from pytz import timezone
+
+from Automated_Tasker.utils import clock
+from Automated_Tasker.utils.http_cache import http_cache
+from Automated_Tasker.utils.vault import Vault, vault
+from Automated_Tasker.utils.weather_forecast import ForecastPeriod, extract_forecast
+
+logger = logging.getLogger(__name__)
+
+URL = "https://weather.gc.ca/en/location/index.html?coords="
+HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/91.0.4472.124 Safari/537.36"
+    ),
+    "Accept-Language": "en-US,en;q=0.9",
+    "Accept-Encoding": "gzip, deflate, br",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
+    "Connection": "keep-alive",
+    "Upgrade-Insecure-Requests": "1",
+}
+DEFAULT_LOCATIONS = {"home": "45.403,-75.687"}
+ISSUE_TIMES = ((5, 0), (11, 0), (15, 30), (20, 0))  # Environment Canada public forecast issues (local time)
+PUBLISH_LAG = timedelta(minutes=15)  # Time for a new issue to show up on weather.gc.ca
+ISSUE_TIMEZONE = timezone("America/Toronto")
+
+
+def next_issue(now: datetime) -> datetime:
+    """Find when the forecast after now will be published, which is when a forecast fetched now goes stale.
+
+    Parameters:
+        now (datetime): A timezone aware time
+
+    Returns:
+        datetime: The (timezone aware) publication time of the next forecast issue
+    """
+    local = now.astimezone(ISSUE_TIMEZONE)
+    for days in (0, 1):
+        date = local.date() + timedelta(days=days)
+        for hour, minute in ISSUE_TIMES:
+            published: datetime = (
+                ISSUE_TIMEZONE.localize(datetime(date.year, date.month, date.day, hour, minute)) + PUBLISH_LAG
+            )
+            if published > local:
+                return published
+    raise AssertionError("There is a forecast issue every day")
+
+
+class WeatherService:
+    """A service fetching weather.gc.ca forecasts for several named locations at once.
+
+    Locations are read from the vault entry tag 'weather-locations' as a JSON object mapping a name to its
+    "latitude,longitude" (defaulting to DEFAULT_LOCATIONS). Parsed forecasts are cached per location until the
+    next Environment Canada issue is published, and concurrent readers of a location share one fetch."""
+
+    def __init__(self, vault: Vault):
+        self.vault = vault
+        self._locations: dict[str, str] | None = None
+        self.cache: dict[str, tuple[datetime, list[ForecastPeriod]]] = {}
+        self._fetches: dict[str, asyncio.Future[None]] = {}
+
+    @property
+    def locations(self) -> dict[str, str]:
+        """The named locations, mapped to their coordinates."""
+        if self._locations is None:
+            entry = self.vault.load_entries().get("weather-locations")
+            self._locations = json.loads(entry) if entry else dict(DEFAULT_LOCATIONS)
+        return self._locations
+
+    async def get_forecasts(
+        self, session: ClientSession, names: Iterable[str] | None = None
+    ) -> dict[str, list[ForecastPeriod]]:
+        """Get the forecasts for several locations, fetching every stale one concurrently.
+
+        Parameters:
+            session (ClientSession): The session to fetch with, the service container's shared one
+            names (Iterable[str] | None): The locations to get, all of them if None
+
+        Returns:
+            dict[str, list[ForecastPeriod]]: The forecast of each location (empty if it could not be fetched)
+        """
+        names = list(self.locations if names is None else names)
+        now = clock.now(ISSUE_TIMEZONE)
+        stale = [name for name in names if name not in self.cache or self.cache[name][0] <= now]
+        if stale:
+            await asyncio.gather(*(self._fetch(session, name) for name in stale))
+        return {name: self.cache[name][1] if name in self.cache else [] for name in names}
+
+    async def get_forecast(self, session: ClientSession, name: str) -> list[ForecastPeriod]:
+        """Get the forecast for a single location.
+
+        Parameters:
+            session (ClientSession): The session to fetch with, the service container's shared one
+            name (str): The location to get
+
+        Returns:
+            list[ForecastPeriod]: The forecast (empty if it could not be fetched)
+        """
+        return (await self.get_forecasts(session, [name]))[name]
+
+    async def _fetch(self, session: ClientSession, name: str) -> None:
+        if name in self._fetches:  # Someone else is already fetching this location
+            await asyncio.shield(self._fetches[name])
+            return
+        self._fetches[name] = asyncio.get_running_loop().create_future()
+        try:
+            html_content = await http_cache.get(session, URL + self.locations[name], headers=HEADERS)
+            if html_content is None:
+                logger.warning(f"Could not fetch the forecast for {name}.")
+                return
+            forecast = extract_forecast(html_content)
+            self.cache[name] = (next_issue(clock.now(ISSUE_TIMEZONE)), forecast)
+        except (ClientError, TimeoutError, ValueError) as e:  # One location shouldn't cost the others theirs
+            logger.warning(f"Could not fetch the forecast for {name}: {e!r}")
+        finally:
+            self._fetches.pop(name).set_result(None)
+
+
+Forecasts = WeatherService(vault)
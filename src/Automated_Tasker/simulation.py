@@ -0,0 +1,131 @@
+"""Replay days of scheduling on virtual time, and report when every task fired.
+
+The real Daemon.tick runs every LOOP_WAIT on a VirtualTimeLoop, with the wall clock (utils.clock) following the
+loop's time, so a week of ticks, sleeps and rollovers (some 40,000 loop iterations) replays deterministically in
+under two seconds.
+
+By default tasks are only recorded, not run (TaskRegistry.dry_run). With --run their execute is awaited too, along
+with the subdaemons and triggered tasks, so substitute any service they would reach first.
+
+Usage:
+    python -m Automated_Tasker.simulation [--start 2026-03-07T00:00] [--days 7] [--run]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Any
+
+from tabulate import tabulate
+
+from Automated_Tasker.admission import Admission
+from Automated_Tasker.daemon import LOOP_WAIT, Daemon
+from Automated_Tasker.services.outbox import Outbox
+from Automated_Tasker.subdaemon import Subdaemons
+from Automated_Tasker.tasklist import LOCAL_TIMEZONE, Tasks
+from Automated_Tasker.utils import clock
+from Automated_Tasker.utils.http_cache import http_cache
+
+logger = logging.getLogger(__name__)
+
+
+def simulate(start: datetime, days: float = 1, dry_run: bool = True) -> list[dict[str, Any]]:
+    """Run the daemon's main loop on virtual time.
+
+    Parameters:
+        start (datetime): When the replay starts, naive times are read on LOCAL_TIMEZONE
+        days (float): How many days to replay, counted on the local calendar (a day the clocks change on is 23
+            or 25 hours long)
+        dry_run (bool): Only record when tasks fire, instead of running them (and the subdaemons)
+
+    Returns:
+        list[dict[str, Any]]: Every task run, as recorded in TaskRegistry.history
+    """
+    if start.tzinfo is None:
+        start = LOCAL_TIMEZONE.localize(start)
+    local_start = start.astimezone(LOCAL_TIMEZONE).replace(tzinfo=None)
+    end = LOCAL_TIMEZONE.localize(local_start + timedelta(days=days))
+    loop = clock.VirtualTimeLoop()
+    previous_dry_run, Tasks.dry_run = Tasks.dry_run, dry_run
+    Tasks.history.clear()
+    try:
+        with clock.use_clock(clock.VirtualClock(loop, start)):
+            daemon = Daemon()
+            loop.run_until_complete(replay(daemon, end, dry_run))
+    finally:
+        Tasks.dry_run = previous_dry_run
+        loop.close()
+    return list(Tasks.history)
+
+
+async def replay(daemon: Daemon, end: datetime, dry_run: bool = True) -> None:
+    """Tick the daemon until the clock in use reaches a time, then stop its tasks, subdaemons and outbox and close its
+    services.
+
+    Parameters:
+        daemon (Daemon): The daemon to tick
+        end (datetime): The (timezone aware) time to stop at
+        dry_run (bool): Leave the subdaemons and triggered tasks stopped, for when tasks are only recorded
+    """
+    if not dry_run:
+        Subdaemons.start(daemon.services)
+        Tasks.start_triggers(daemon.services)
+    try:
+        while clock.now(LOCAL_TIMEZONE) < end:
+            await daemon.tick()
+            await asyncio.sleep(LOOP_WAIT)
+    finally:
+        Tasks.stop_triggers()
+        await Admission.stop()
+        for task in Subdaemons.subdaemons.values():
+            task.cancel()
+        await Outbox.stop()
+        http_cache.flush()
+        await daemon.services.close()
+
+
+def format_timeline(history: list[dict[str, Any]]) -> str:
+    """Tabulate task runs.
+
+    Parameters:
+        history (list[dict[str, Any]]): Task runs, as recorded in TaskRegistry.history
+
+    Returns:
+        str: A row per run, with when it was scheduled, when it fired and how long it took
+    """
+    rows = []
+    for run in history:
+        started = run["started"]
+        scheduled = datetime.combine(started.date(), datetime.min.time()) + run["scheduled"]
+        rows.append(
+            [
+                f"{started:%a %Y-%m-%d}",
+                run["name"],
+                f"{scheduled:%H:%M:%S}",
+                f"{started:%H:%M:%S %Z}",
+                f"{(started.replace(tzinfo=None) - scheduled).total_seconds():.0f}",
+                f"{run['seconds']:.1f}",
+                "failed" if run["failed"] else "",
+            ]
+        )
+    table: str = tabulate(rows, headers=["Day", "Task", "Scheduled", "Fired", "Lag (s)", "Took (s)", ""])
+    return table
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--start", type=datetime.fromisoformat, help="Local start time, now if not given")
+    parser.add_argument("--days", type=float, default=1, help="How many days to replay")
+    parser.add_argument("--run", action="store_true", help="Run the tasks and subdaemons instead of only recording")
+    args = parser.parse_args()
+
+    start = args.start or datetime.now(LOCAL_TIMEZONE)
+    history = simulate(start, args.days, dry_run=not args.run)
+    print(format_timeline(history))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,15 @@
 from __future__ import annotations
 
-from typing import Protocol, List, Final, Deque, TypeVar, Any
-import importlib
+import asyncio
 import functools
-import traceback
-from datetime import timedelta, datetime
-import collections
+import importlib
+import logging
 import pkgutil
-import asyncio
-from Automated_Tasker.utils.vault import vault
-from Automated_Tasker.services.pushbullet import PushbulletNotifier
-from pytz import timezone
-from getpass import getpass
+from typing import Any, Protocol, TypeVar
 
-import logging
+from Automated_Tasker.services.container import ServiceContainer
+from Automated_Tasker.utils.metrics import SUBDAEMON_FAILURES, SUBDAEMON_RESTARTS
+from Automated_Tasker.utils.vault import Vault, vault
 
 logger = logging.getLogger(__name__)
 
@@ -23,11 +19,12 @@ class _Subdaemon(Protocol):
 
     NAME: str
 
-    async def start(self, vault: Vault | None = None) -> None: ...
-    
+    async def start(self, vault: Vault, services: ServiceContainer) -> None: ...
+
+
 class SubdaemonRegistry:
     """
-    The registry which loads all the subdaemons in the subdaemons folder as _Subdaemons 
+    The registry which loads all the subdaemons in the subdaemons folder as _Subdaemons
     in the global_subdaemonlist.
     """
 
@@ -38,13 +35,13 @@ class SubdaemonRegistry:
         self._package_name = package
         self.global_subdaemonlist: list[Any] = []
         self.vault = vault
-        self.subdaemons = {}
+        self.services: ServiceContainer | None = None
+        self.subdaemons: dict[str, asyncio.Task[None]] = {}
 
     def load(self) -> None:
         """Invoke the _load_package() function on _package_name (if initiliazed)."""
-        if not self.loaded:
-            if self._package_name:
-                _load_package(self._package_name)
+        if not self.loaded and self._package_name:
+            _load_package(self._package_name)
         self.loaded = True
 
     def register(self, subdaemon: type[_DaemonT]) -> type[_DaemonT]:
@@ -59,27 +56,37 @@ class SubdaemonRegistry:
         self.global_subdaemonlist.append(subdaemon)
         logger.info(f"Registered {subdaemon.NAME} to global subdaemonlist.")
         return subdaemon
-    
-    def start(self) -> None:
-        """Start all the subdaemons in the registry."""
+
+    def start(self, services: ServiceContainer | None = None) -> None:
+        """Start all the subdaemons in the registry.
+
+        Parameters:
+            services (ServiceContainer | None): The shared clients handed to the subdaemons
+        """
+        self.services = services
         if self.subdaemons:
-            for name, subdaemon in self.subdaemons.items():
-                subdaemon.cancel()
+            for task in self.subdaemons.values():
+                task.cancel()
         self.subdaemons = {}
         for subdaemon in self.global_subdaemonlist:
-            self.subdaemons[subdaemon.NAME] = asyncio.create_task(subdaemon().start(self.vault))
+            self.subdaemons[subdaemon.NAME] = asyncio.create_task(subdaemon().start(self.vault, self.services))
         logger.info(f"Started {', '.join(self.subdaemons.keys())} subdaemons.")
 
     def restart_failed(self) -> None:
         """Restart all the subdaemons in the registry that are done."""
         for name, task in self.subdaemons.items():
             if task.done():
+                if not task.cancelled() and task.exception():
+                    SUBDAEMON_FAILURES.inc(subdaemon=name)
+                    logger.warning(f"{name} subdaemon stopped: {task.exception()!r}")
+                SUBDAEMON_RESTARTS.inc(subdaemon=name)
                 for subdaemon in self.global_subdaemonlist:
                     if name == subdaemon.NAME:
-                        self.subdaemons[name] = asyncio.create_task(subdaemon().start(self.vault))
+                        self.subdaemons[name] = asyncio.create_task(subdaemon().start(self.vault, self.services))
                         logger.info(f"Restarted {name} subdaemon.")
                         break
 
+
 @functools.cache
 def _load_package(package: str) -> None:
     """Walk though the package directory and load each module found inside.
@@ -93,4 +100,4 @@ def _load_package(package: str) -> None:
             importlib.import_module(module_name)
 
 
-Subdaemons = SubdaemonRegistry(package="Automated_Tasker.subdaemons")
\ No newline at end of file
+Subdaemons = SubdaemonRegistry(package="Automated_Tasker.subdaemons")
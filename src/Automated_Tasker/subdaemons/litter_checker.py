@@ -1,21 +1,25 @@
 from __future__ import annotations
 
-from Automated_Tasker.subdaemon import Subdaemons
-from Automated_Tasker.services.switchbot import SwitchBotController
-from Automated_Tasker.services.pushbullet import PushbulletNotifier
-
-from datetime import timedelta, datetime
-from aiohttp import ClientSession
-
-from typing import List
 import asyncio
-
 import logging
+from datetime import UTC, datetime, timedelta
+
+from aiohttp import ClientError
+
+from Automated_Tasker.events import Bus, DeviceStateChanged
+from Automated_Tasker.services.container import ServiceContainer
+from Automated_Tasker.services.outbox import Outbox
+from Automated_Tasker.subdaemon import Subdaemons
+from Automated_Tasker.utils import clock
+from Automated_Tasker.utils.state_store import state
+from Automated_Tasker.utils.vault import Vault
 
 logger = logging.getLogger(__name__)
 
 CHECK_PERIOD = timedelta(minutes=30)
 ALERT_PERIOD = timedelta(hours=36)
+DEVICE = "Litterbox Position"
+
 
 @Subdaemons.register
 class CheckLitterBox:
@@ -23,34 +27,52 @@ class CheckLitterBox:
 
     NAME: str = "LitterChecker"
 
-    async def start(self, vault: Vault | None = None):
-        """Check to see if the litterbox swaps between 
+    async def start(self, vault: Vault, services: ServiceContainer) -> None:
+        """Check to see if the litterbox swaps between
 
         Parameters:
-            vault (Vault | None): The vault with the switchbot token and secret
+            vault (Vault): The vault with the switchbot token and secret
+            services (ServiceContainer): The shared clients, for SwitchBot
         """
-        tokens = vault.load_entries()
-        last_status = "timeOutNotClose"
-        last_time = datetime.now()
+        now = clock.now(UTC)
+        last_status = state.get(self.NAME, "last_status")
+        last_time = _load_time(self.NAME, "last_time")
+        if last_time is None or last_time > now:  # Never stored, or stored by a clock ahead of this one
+            last_time = now
+        last_poll = _load_time(self.NAME, "last_poll")
+        if last_poll is not None and timedelta(0) <= now - last_poll < CHECK_PERIOD:  # The last reading still holds
+            await asyncio.sleep((CHECK_PERIOD - (now - last_poll)).total_seconds())
         while True:
-            async with ClientSession() as session:
-                controller = SwitchBotController(tokens["switchbot-token"], tokens["switchbot-secret"])
-                await controller.refresh(session)
-                try:
-                    status = (await controller.status(session, "Litterbox Position"))["openState"]
-                except ConnectionError:
-                    asyncio.sleep(30)
-                    continue
-                    
+            controller = await services.get("switchbot")
+            try:
+                status = (await controller.status(await services.get("session"), DEVICE))["openState"]
+            except (ConnectionError, ClientError):
+                await services.invalidate("switchbot")  # Refetch the devices on the next try
+                await asyncio.sleep(30)
+                continue
+
             if status != last_status:
-                last_time = datetime.now()
+                if last_status is not None:  # Not on the first reading, which is only what it was already
+                    await Bus.publish(
+                        DeviceStateChanged(device=DEVICE, key="openState", value=status, previous=last_status)
+                    )
+                last_time = clock.now(UTC)
                 last_status = status
-            
-            if (datetime.now()-last_time) >= ALERT_PERIOD:
-                notifier = PushbulletNotifier(vault.load_entries()["pushbullet-key"])
-                notifier.send_notification(
-                    "Litterbox alert",
-                    f"It has not self-cleaned in at least {(datetime.now()-last_time).total_seconds()//3600} hours"
+                state.set(self.NAME, "last_status", status)
+                state.set(self.NAME, "last_time", last_time.isoformat())
+
+            idle = clock.now(UTC) - last_time
+            if idle >= ALERT_PERIOD:
+                Outbox.notify(
+                    "Litterbox alert", f"It has not self-cleaned in at least {idle.total_seconds() // 3600} hours"
                 )
-                last_time = datetime.now()
+                last_time = clock.now(UTC)
+                state.set(self.NAME, "last_time", last_time.isoformat())
+            state.set(self.NAME, "last_poll", clock.now(UTC).isoformat())
             await asyncio.sleep(CHECK_PERIOD.total_seconds())
+
+
+def _load_time(scope: str, key: str) -> datetime | None:
+    value = state.get(scope, key)
+    moment = datetime.fromisoformat(value) if isinstance(value, str) else None
+    return moment if moment is not None and moment.tzinfo is not None else None  # Naive ones are ambiguous at DST
@@ -1,35 +1,77 @@
 from __future__ import annotations
 
-from typing import Protocol, List, Final, Deque, TypeVar, Any
-import importlib
-import functools
-import traceback
-from datetime import timedelta, datetime
+import asyncio
 import collections
+import functools
+import importlib
+import logging
 import pkgutil
-from Automated_Tasker.utils.vault import vault
-from Automated_Tasker.services.pushbullet import PushbulletNotifier
+import traceback
+from datetime import date, datetime, time, timedelta
+from time import perf_counter
+from typing import Any, ClassVar, Protocol, TypeVar
+
 from pytz import timezone
 
-import logging
+from Automated_Tasker.admission import Admission
+from Automated_Tasker.events import Bus, Subscription
+from Automated_Tasker.prefetch import Prefetch
+from Automated_Tasker.services.container import ServiceContainer
+from Automated_Tasker.services.outbox import Outbox
+from Automated_Tasker.utils import clock
+from Automated_Tasker.utils.metrics import TASK_DURATION, TASK_FAILURES, TASK_LAG
+from Automated_Tasker.utils.profiler import Profiler
+from Automated_Tasker.utils.vault import Vault, vault
 
 logger = logging.getLogger(__name__)
 
 SET_ALARM = (4, 30)  # Hours, Minutes to set Alarm to
 DAY_START = (6, 30)  # Hours, Minutes to notify in the morning
-DAY_END   = (23,30)  # Hours, Minutes to notify at night
+DAY_END = (23, 30)  # Hours, Minutes to notify at night
 WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+LOCAL_TIMEZONE = timezone("America/Toronto")  # The wall clock every task TIME and day is read on
+PRECOMPUTE_LEAD = timedelta(hours=1)  # How long before midnight tomorrow's tasklist starts being built
+HISTORY_SIZE = 500  # Task runs remembered in TaskRegistry.history
+
+
+def local_now() -> datetime:
+    """Get the current (timezone aware) time on the local wall clock.
+
+    Returns:
+        datetime: The time in LOCAL_TIMEZONE
+    """
+    return clock.now(LOCAL_TIMEZONE)
+
+
+@functools.lru_cache(maxsize=8)
+def local_midnight(day: date) -> datetime:
+    """Get the instant a day starts on the local wall clock, with the UTC offset in effect on that day.
+
+    Parameters:
+        day (date): The day
+
+    Returns:
+        datetime: The (timezone aware) midnight starting the day
+    """
+    midnight: datetime = LOCAL_TIMEZONE.localize(datetime.combine(day, time.min))
+    return midnight
 
 
 class _Task(Protocol):
-    """The minimum tempalte for all the tasks registered by the tasklist."""
+    """The minimum tempalte for all the tasks registered by the tasklist.
+
+    Tasks may also define `async def prepare(self, day, services)`, run when their day's tasklist is built ahead
+    of midnight. Tasks defining a TRIGGER (an events.Trigger) run on the events it matches instead of at a TIME,
+    with the batch of events as their `events` attribute. A PRIORITY and RESOURCES decide when a due task is
+    admitted to run (see admission.py)."""
 
     NAME: str
     TIME: timedelta
-    DAYS: List[str]
+    DAYS: ClassVar[list[str]]
     DAY: int
+    DEPENDS: ClassVar[list[str]]  # Names of Prefetch providers, resolved ahead of the task
 
-    async def execute(self, vault: Vault | None = None, tasklist: collections.deque | None = None) -> None: ...
+    async def execute(self, vault: Vault, services: ServiceContainer) -> None: ...
 
 
 class TaskRegistry:
@@ -42,15 +84,21 @@ class TaskRegistry:
     def __init__(self, package: str | None = None):
         self.loaded = False
         self._package_name = package
-        self.global_tasklist: Deque[Any] = collections.deque()
-        self.current_tasklist: Deque[Any] = collections.deque()
+        self.global_tasklist: collections.deque[Any] = collections.deque()
+        self.triggered_tasks: list[Any] = []
+        self.listeners: dict[str, asyncio.Task[None]] = {}
+        self.current_tasklist: collections.deque[Any] = collections.deque()
+        self.current_day: date | None = None
+        self.next_tasklist: tuple[date, collections.deque[Any]] | None = None
+        self._precompute: asyncio.Task[None] | None = None
+        self.history: collections.deque[dict[str, Any]] = collections.deque(maxlen=HISTORY_SIZE)
+        self.dry_run = False  # Record when tasks would run without running them (see simulation.py)
         self.vault = vault
 
     def load(self) -> None:
         """Invoke the _load_package() function on _package_name (if initiliazed)."""
-        if not self.loaded:
-            if self._package_name:
-                _load_package(self._package_name)
+        if not self.loaded and self._package_name:
+            _load_package(self._package_name)
         self.loaded = True
 
     def register(self, task: type[_TaskT]) -> type[_TaskT]:
@@ -62,6 +110,11 @@ class TaskRegistry:
         Returns:
             _TaskT: The unchanged but now registered _Task
         """
+        trigger = getattr(task, "TRIGGER", None)
+        if trigger is not None:
+            self.triggered_tasks.append(task)
+            logger.info(f"Registered {task.NAME} (on {trigger.event.__name__}) to triggered tasks.")
+            return task
         i = 0
         for i, set_task in enumerate(self.global_tasklist):
             if task.TIME < set_task.TIME:
@@ -70,60 +123,193 @@ class TaskRegistry:
         logger.info(f"Registered {task.NAME} ({task.TIME}) to global tasklist.")
         return task
 
-    def create_daily_tasklist(self) -> None:
-        """Decorator used to take a _Task class and add it to the global_tasklist.
+    def runs_on(self, task: type[_TaskT], day: date) -> bool:
+        """Check whether a registered task is scheduled on a day.
 
         Parameters:
-            task (_TaskT): The _Task class being defined
+            task (_TaskT): The registered _Task class
+            day (date): The day
+
+        Returns:
+            bool: True if the task's DAY and DAYS allow it
         """
-        self.current_tasklist = collections.deque()
-        today = datetime.today().astimezone(timezone("EST"))
-        weekday = WEEKDAYS[today.weekday()]
-        tasks = []
+        if task.DAY != 0 and task.DAY != day.day:
+            return False
+        return not task.DAYS or WEEKDAYS[day.weekday()] in task.DAYS
+
+    def create_daily_tasklist(self, day: date | None = None) -> None:
+        """Build a day's tasklist from the global registry and make it the current one.
+
+        Parameters:
+            day (date | None): The day to build the tasklist for, today (on the local wall clock) if None
+        """
+        day = day or local_now().date()
+        tasklist: collections.deque[Any] = collections.deque()
         for task in self.global_tasklist:
-            if task.DAY != 0 and task.DAY is not today.day:
-                continue
-            if task.DAYS and weekday not in task.DAYS:
+            if self.runs_on(task, day):
+                self._insert(tasklist, task())
+        self.current_tasklist, self.current_day = tasklist, day
+        logger.info(f"Added {', '.join(task.NAME for task in tasklist)} to daily tasklist.")
+
+    def precompute(self, services: ServiceContainer | None = None) -> None:
+        """Start building tomorrow's tasklist in the background, once midnight is within PRECOMPUTE_LEAD.
+
+        Parameters:
+            services (ServiceContainer | None): The shared clients handed to the tasks' prepare hooks
+        """
+        now = local_now()
+        tomorrow = now.date() + timedelta(days=1)
+        if self._precompute is not None or (self.next_tasklist and self.next_tasklist[0] == tomorrow):
+            return
+        if local_midnight(tomorrow) - now > PRECOMPUTE_LEAD:  # Aware arithmetic, so DST nights are the right length
+            return
+        self._precompute = asyncio.create_task(self.prepare_tasklist(tomorrow, services))
+        self._precompute.add_done_callback(self._precomputed)
+
+    async def prepare_tasklist(self, day: date, services: ServiceContainer | None = None) -> None:
+        """Build a day's tasklist a task at a time, letting the loop run in between, and keep it for roll_over.
+
+        Tasks with a `prepare(day, services)` coroutine get to compute their inputs for the day ahead of time.
+
+        Parameters:
+            day (date): The day to build the tasklist for
+            services (ServiceContainer | None): The shared clients handed to the prepare hooks
+        """
+        tasklist: collections.deque[Any] = collections.deque()
+        for task in self.global_tasklist:
+            if not self.runs_on(task, day):
                 continue
-            self.add_daily_tasklist(task())
-            tasks.append(task.NAME)
-        logger.info(f"Added {', '.join(tasks)} to daily tasklist.")
+            instance = task()
+            if hasattr(instance, "prepare") and not self.dry_run:
+                try:
+                    await instance.prepare(day, services)
+                except Exception as e:  # noqa: BLE001 - the task computes its inputs when it runs instead
+                    logger.warning(f"Could not prepare {task.NAME} for {day}: {e!r}")
+            self._insert(tasklist, instance)
+            await asyncio.sleep(0)
+        self.next_tasklist = (day, tasklist)
+        logger.info(f"Prepared {', '.join(task.NAME for task in tasklist)} for {day}.")
+
+    def roll_over(self, day: date) -> None:
+        """Make a day's tasklist the current one, swapping in the precomputed one if it was built in time.
 
-    def add_daily_tasklist(self, task: type[_TaskT]) -> None:
+        Parameters:
+            day (date): The day starting
+        """
+        if self.next_tasklist and self.next_tasklist[0] == day:
+            (self.current_day, self.current_tasklist), self.next_tasklist = self.next_tasklist, None
+            logger.info(f"Swapped in the tasklist prepared for {day}.")
+            return
+        if self._precompute is not None:
+            self._precompute.cancel()
+        self.create_daily_tasklist(day)
+
+    def add_daily_tasklist(self, task: _Task) -> None:
         """Insert a daily task into the current tasklist.
 
         Parameters:
-            task (_TaskT): The task to add to the list
+            task (_Task): The task (an instance, like the ones create_daily_tasklist() builds) to add to the list
         """
+        self._insert(self.current_tasklist, task)
+
+    @staticmethod
+    def _insert(tasklist: collections.deque[Any], task: Any) -> None:
         i = 0
-        for i, set_task in enumerate(self.current_tasklist):
+        for i, set_task in enumerate(tasklist):
             if task.TIME < set_task.TIME:
                 break
         else:
             i += 1
-        self.current_tasklist.insert(i, task)
-
-    async def execute_daily_tasks(self) -> None:
-        """Check if it is time to execute a task, and then execute."""
-        now = datetime.now()
-        current_time = timedelta(
-            hours=now.hour,
-            minutes=now.minute,
-            seconds=now.second,
-        )
-        if self.current_tasklist:
-            if self.current_tasklist[0].TIME < current_time:
-                task = self.current_tasklist.popleft()
-                logger.info(f"Executing {task.NAME}.")
-                try:
-                    await task.execute(self.vault)
-                    logger.info(f"{task.NAME} executed.")
-                except Exception as e:
-                    notifier = PushbulletNotifier(self.vault.load_entries()["pushbullet-key"])
-                    notifier.send_notification(
-                        f"Task {task.NAME} failed to execute.", f"{repr(e)}\n{traceback.format_exc()}"
-                    )
-                    logger.info(f"{task.NAME} failed to execute, notified.")
+        tasklist.insert(i, task)
+
+    def _precomputed(self, precompute: asyncio.Task[None]) -> None:
+        self._precompute = None
+        if not precompute.cancelled() and precompute.exception():
+            logger.warning(f"Could not prepare tomorrow's tasklist: {precompute.exception()!r}")
+
+    async def execute_daily_tasks(self, services: ServiceContainer | None = None) -> None:
+        """Start prefetching what upcoming tasks depend on, and hand every task that is due to admission control.
+
+        This returns once the due tasks are submitted, without waiting for them to run. Tasks due at the same tick
+        (sharing a TIME, or all the missed ones after a restart) then run concurrently, as far as admission allows.
+        They are admitted most urgent first, and in TIME order within a priority, but a later task can still finish
+        (or start, if it needs other resources) before an earlier one. Tasks needing each other's results share
+        them through Prefetch, not through their order.
+
+        Parameters:
+            services (ServiceContainer | None): The shared clients handed to the task
+        """
+        now = local_now()
+        current_time = _time_of_day(now)
+        if services is not None and not self.dry_run:
+            Prefetch.schedule(self.current_tasklist, services, current_time)
+        while self.current_tasklist and self.current_tasklist[0].TIME < current_time:
+            task = self.current_tasklist.popleft()
+            Admission.submit(task, functools.partial(self._run, task, services, task.TIME))
+
+    def start_triggers(self, services: ServiceContainer | None = None) -> None:
+        """Subscribe every triggered task to its events, and run it on each batch that arrives.
+
+        Parameters:
+            services (ServiceContainer | None): The shared clients handed to the tasks
+        """
+        self.stop_triggers()
+        for task in self.triggered_tasks:
+            subscription = Bus.subscribe(task.TRIGGER)
+            self.listeners[task.NAME] = asyncio.create_task(self._listen(task, subscription, services))
+
+    def stop_triggers(self) -> None:
+        """Unsubscribe the triggered tasks."""
+        for listener in self.listeners.values():
+            listener.cancel()
+        self.listeners = {}
+
+    async def _listen(self, task: type[_TaskT], subscription: Subscription, services: ServiceContainer | None) -> None:
+        try:
+            async for events in subscription:
+                if not self.runs_on(task, local_now().date()):
+                    continue
+                instance: Any = task()
+                instance.events = events
+                scheduled = _time_of_day(events[0].at.astimezone(LOCAL_TIMEZONE))
+                await Admission.run(instance, functools.partial(self._run, instance, services, scheduled))
+        finally:
+            subscription.close()
+
+    async def _run(self, task: Any, services: ServiceContainer | None, scheduled: timedelta) -> None:
+        now = local_now()
+        TASK_LAG.observe((_time_of_day(now) - scheduled).total_seconds(), task=task.NAME)
+        logger.info(f"Executing {task.NAME}.")
+        loop = asyncio.get_running_loop()
+        start, timer, failed = loop.time(), perf_counter(), False
+        try:
+            if not self.dry_run:
+                run = task.execute(self.vault, services)
+                await (Profiler.profile(task.NAME, run) if Profiler.wants(task.NAME) else run)
+            logger.info(f"{task.NAME} executed.")
+        except Exception as e:  # noqa: BLE001 - whatever a task raises is reported, not fatal
+            failed = True
+            TASK_FAILURES.inc(task=task.NAME)
+            Outbox.notify(f"Task {task.NAME} failed to execute.", f"{e!r}\n{traceback.format_exc()}")
+            logger.info(f"{task.NAME} failed to execute, notified.")
+        finally:
+            Prefetch.release(task)
+            seconds = loop.time() - start
+            TASK_DURATION.observe(seconds, task=task.NAME)
+            self.history.append(
+                {
+                    "name": task.NAME,
+                    "scheduled": scheduled,
+                    "started": now,
+                    "seconds": seconds,
+                    "wall": perf_counter() - timer,  # Differs from seconds on virtual time (simulation.py)
+                    "failed": failed,
+                }
+            )
+
+
+def _time_of_day(moment: datetime) -> timedelta:
+    return timedelta(hours=moment.hour, minutes=moment.minute, seconds=moment.second, microseconds=moment.microsecond)
 
 
 @functools.cache
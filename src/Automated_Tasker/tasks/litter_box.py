@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+import logging
+from datetime import timedelta
+from typing import ClassVar
+
+from Automated_Tasker.admission import PRIORITY_NORMAL
+from Automated_Tasker.events import DeviceStateChanged, Event, Trigger
+from Automated_Tasker.services.container import ServiceContainer
+from Automated_Tasker.services.outbox import Outbox
+from Automated_Tasker.subdaemons.litter_checker import CHECK_PERIOD, DEVICE
+from Automated_Tasker.tasklist import LOCAL_TIMEZONE, Tasks
+from Automated_Tasker.utils.vault import Vault
+
+logger = logging.getLogger(__name__)
+
+# A cleaning moves the box out and back, which the checker reads on consecutive polls, so the batch has to outlast
+# one CHECK_PERIOD to hold the whole cycle rather than a push per position
+SETTLE_PERIOD = (CHECK_PERIOD + timedelta(minutes=15)).total_seconds()
+
+
+@Tasks.register
+class LitterBoxCleaned:
+    """A task for letting know the litterbox cleaned itself, once it has stopped moving."""
+
+    NAME: str = "LitterBoxCleaned"
+    TIME: timedelta = timedelta(0)  # Not scheduled, runs on its TRIGGER
+    TRIGGER: Trigger = Trigger(
+        DeviceStateChanged,
+        where=lambda event: isinstance(event, DeviceStateChanged) and event.device == DEVICE,
+        debounce=SETTLE_PERIOD,
+    )
+    DAYS: ClassVar[list[str]] = []
+    DAY: int = 0
+    DEPENDS: ClassVar[list[str]] = []
+    PRIORITY: int = PRIORITY_NORMAL
+    RESOURCES: ClassVar[list[str]] = []
+
+    def __init__(self) -> None:
+        self.events: list[Event] = []  # The batch it runs on, handed over by the tasklist
+
+    async def execute(self, vault: Vault | None = None, services: ServiceContainer | None = None) -> None:
+        """Notify that the litterbox went through a cleaning.
+
+        Parameters:
+            vault (Vault | None): Unused
+            services (ServiceContainer | None): Unused
+        """
+        started, finished = (event.at.astimezone(LOCAL_TIMEZONE) for event in (self.events[0], self.events[-1]))
+        Outbox.notify(
+            "Litterbox cleaned", f"It moved {len(self.events)} times between {started:%H:%M} and {finished:%H:%M}"
+        )
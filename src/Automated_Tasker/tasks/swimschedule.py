@@ -1,16 +1,17 @@
 from __future__ import annotations
 
-from Automated_Tasker.tasklist import Tasks
-from Automated_Tasker.utils.vault import Vault
-from Automated_Tasker.utils.ottawa_swimschedule import get_lane_swims
-from Automated_Tasker.services.discord import DiscordBot
-
-from time import strptime
-from datetime import timedelta
-from typing import List
+import asyncio
 import hashlib
-
 import logging
+from datetime import timedelta
+from time import strptime
+from typing import ClassVar
+
+from Automated_Tasker.admission import PRIORITY_BULK
+from Automated_Tasker.services.container import ServiceContainer
+from Automated_Tasker.services.discord import pack_code_blocks
+from Automated_Tasker.utils.ottawa_swimschedule import Weekday, get_lane_swims, get_weekly_schedule, schedules
+from Automated_Tasker.utils.vault import Vault
 
 logger = logging.getLogger(__name__)
 
@@ -21,32 +22,42 @@ class GetSwimSchedule:
 
     NAME: str = "SwimSchedulePoster"
     TIME: timedelta = timedelta(hours=16)
-    DAYS: List[str] = ["Tuesday", "Friday"]
+    DAYS: ClassVar[list[str]] = ["Tuesday", "Friday"]
     DAY: int = 0
+    DEPENDS: ClassVar[list[str]] = []
+    PRIORITY: int = PRIORITY_BULK
+    RESOURCES: ClassVar[list[str]] = ["cpu", "discord"]
 
-    async def execute(self, vault: Vault | None = None):
+    async def execute(self, vault: Vault, services: ServiceContainer) -> None:
         """Start all the SwitchBot alarm devices.
 
         Parameters:
-            vault (Vault | None): The vault with the discord bot token
+            vault (Vault): The vault, unused as the container reads the Discord token
+            services (ServiceContainer): The shared clients, for the HTTP session and Discord
         """
         # Get schedule
-        messages = []
-        async for table in get_lane_swims(
-            "Saturday", "1980 Ogilvie Rd, Ottawa, ON", strptime("8:00", "%H:%M"), strptime("14:00", "%H:%M")
-        ):
-            message = "```"
-            message += table
-            message += "```"
-            messages.append(message)
+        day: Weekday = "Saturday"
+        location = "1980 Ogilvie Rd, Ottawa, ON"
+        session = await services.get("session")
+        schedule = await get_weekly_schedule(session)
+        tables = [
+            table
+            async for table in get_lane_swims(
+                day, location, strptime("8:00", "%H:%M"), strptime("14:00", "%H:%M"), schedule=schedule, session=session
+            )
+        ]
+        messages = pack_code_blocks(tables)
 
         # If schedule is new, post it
-        hash = "HMAC: " + hashlib.md5("".join(messages).encode()).hexdigest()
-        async with DiscordBot(vault.load_entries()["discord-token-1322957423941648544"]) as bot:
-            old_hash = await bot.get_most_recent_message("Factorio & Swim Club", "swim-schedule")
-
-            if hash != old_hash:
-                await bot.post_message("Factorio & Swim Club", "general", "New schedule alert!!!")
-                for message in messages:
-                    await bot.post_message("Factorio & Swim Club", "swim-schedule", message)
-                await bot.post_message("Factorio & Swim Club", "swim-schedule", hash)
+        key = f"{day}@{location}"
+        digest = hashlib.md5("".join(messages).encode()).hexdigest()
+        if not schedules.is_new(key, digest):
+            logger.info(f"{day}'s schedule is unchanged ({len(schedules.changed)} pool pages changed).")
+            return
+
+        bot = await services.get("discord")
+        await asyncio.gather(
+            bot.post_message("Factorio & Swim Club", "general", "New schedule alert!!!"),
+            bot.post_messages("Factorio & Swim Club", "swim-schedule", messages),
+        )
+        schedules.mark_posted(key, digest)
@@ -1,15 +1,15 @@
 from __future__ import annotations
 
-from Automated_Tasker.tasklist import Tasks, DAY_START
-from Automated_Tasker.utils.vault import Vault
-from Automated_Tasker.services.calendar import GoogleCalendarClient
-from Automated_Tasker.services.pushbullet import PushbulletNotifier
-
+import logging
 from datetime import timedelta
+from typing import ClassVar
 
-from typing import List
-
-import logging
+from Automated_Tasker.admission import PRIORITY_NORMAL
+from Automated_Tasker.prefetch import Prefetch
+from Automated_Tasker.services.container import ServiceContainer
+from Automated_Tasker.services.outbox import Outbox
+from Automated_Tasker.tasklist import DAY_START, Tasks
+from Automated_Tasker.utils.vault import Vault
 
 logger = logging.getLogger(__name__)
 
@@ -20,21 +20,22 @@ class ToDoList:
 
     NAME: str = "ToDoList"
     TIME: timedelta = timedelta(hours=DAY_START[0], minutes=DAY_START[1])
-    DAYS: List[str] = []
+    DAYS: ClassVar[list[str]] = []
     DAY: int = 0
+    DEPENDS: ClassVar[list[str]] = ["calendar-events"]
+    PRIORITY: int = PRIORITY_NORMAL
+    RESOURCES: ClassVar[list[str]] = ["google"]
 
-    async def execute(self, vault: Vault | None = None):
+    async def execute(self, vault: Vault, services: ServiceContainer) -> None:
         """Get all of today's events and tasks from Google Calendar and push it to pushbullet.
 
         Parameters:
-            vault (Vault | None): The vault with the pushbullet token and Google Calendar creds
+            vault (Vault): The vault with the pushbullet token and Google Calendar creds
+            services (ServiceContainer): The shared clients, for Google Calendar (today's events are prefetched)
         """
-        calendar = GoogleCalendarClient(vault)
-        notifier = PushbulletNotifier(vault.load_entries()["pushbullet-key"])
-
-        events = list(calendar.get_todays_events())
+        events = await Prefetch.get("calendar-events", services)
         if events:
             update = "Events - "
             for event in events:
                 update = update + f"\n{event['start']['dateTime'][11:19]} - {event['summary']}"
-            notifier.send_notification("Today's Events", update)
+            Outbox.notify("Today's Events", update)
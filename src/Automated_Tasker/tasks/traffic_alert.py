@@ -1,23 +1,34 @@
 from __future__ import annotations
 
-from Automated_Tasker.tasklist import Tasks, SET_ALARM
-from Automated_Tasker.utils.vault import Vault
-from Automated_Tasker.services.maps import GoogleMapsClient
-from Automated_Tasker.services.calendar import GoogleCalendarClient
-from Automated_Tasker.services.pushbullet import PushbulletNotifier
-
-from datetime import timedelta
 import asyncio
+import logging
+from collections.abc import Iterable, Iterator
+from datetime import datetime, timedelta
+from typing import Any, ClassVar
 from urllib import parse
 
-from typing import List, Any
-from datetime import datetime
+from googlemaps.exceptions import ApiError, Timeout, TransportError
 from pytimeparse.timeparse import timeparse
 
-import logging
+from Automated_Tasker.admission import PRIORITY_CRITICAL, PRIORITY_NORMAL
+from Automated_Tasker.prefetch import Prefetch
+from Automated_Tasker.services.container import ServiceContainer
+from Automated_Tasker.services.maps import GoogleMapsClient
+from Automated_Tasker.services.outbox import Outbox
+from Automated_Tasker.tasklist import SET_ALARM, Tasks
+from Automated_Tasker.utils.metrics import CLIENT_RETRIES
+from Automated_Tasker.utils.vault import Vault
 
 logger = logging.getLogger(__name__)
 
+CONCURRENCY = 4  # Simultaneous Distance Matrix requests while planning
+PLANNING_DEADLINE = 60 * 20  # seconds, for planning the whole day
+NUM_RETRIES = 5
+BACKOFF_BASE = 5  # seconds, doubled after every failed attempt
+TRANSIENT_STATUSES = {"OVER_QUERY_LIMIT", "UNKNOWN_ERROR"}  # The API errors worth asking again about
+TRANSPORT_ERRORS = (ConnectionError, TimeoutError, TransportError, Timeout)  # The request never got an answer
+LOOKUP_ERRORS = (ValueError, PermissionError, ApiError, *TRANSPORT_ERRORS)  # What get_travel_seconds raises
+
 
 def convert_timedelta(date: datetime) -> timedelta:
     """Convert a datetime into a timedelta showing time into today instead
@@ -35,33 +46,130 @@ def convert_timedelta(date: datetime) -> timedelta:
     )
 
 
-def directions_url(origin, destination, travel_mode="driving"):
+def directions_url(origin: str, destination: str, travel_mode: str = "driving") -> str:
     base_url = "https://www.google.com/maps/dir/?api=1"
     params = {"origin": origin, "destination": destination, "travelmode": travel_mode}
     return f"{base_url}&{parse.urlencode(params)}"
 
 
+async def get_travel_seconds(maps: GoogleMapsClient, api_dict: dict[str, Any], retries: int = NUM_RETRIES) -> int:
+    """Get the travel time for a trip, backing off exponentially between failed attempts.
+
+    Bad addresses and denied or invalid requests are not retried, as asking again will not change the answer. Only
+    transport errors and the API's TRANSIENT_STATUSES are.
+
+    Args:
+        maps: The client used to query the Distance Matrix API
+        api_dict: The keyword arguments given to GoogleMapsClient.get_distance
+        retries: The number of attempts before giving up, at least 1
+
+    Returns:
+        The travel time in seconds
+
+    Raises:
+        ValueError: Raised if there is no route between the two locations, or retries is less than 1
+        PermissionError: Raised if the API key was rejected
+        googlemaps.exceptions.ApiError: Raised if the API rejected the request (e.g. REQUEST_DENIED, INVALID_REQUEST)
+        Exception: The last of TRANSPORT_ERRORS (or a transient ApiError) if every attempt failed
+    """
+    if retries < 1:
+        raise ValueError(f"At least one attempt is needed, got {retries}.")
+    delay = BACKOFF_BASE
+    for _ in range(retries - 1):
+        try:
+            seconds: int = timeparse((await maps.get_distance(**api_dict))["duration"])
+            return seconds
+        except (ApiError, *TRANSPORT_ERRORS) as e:
+            if isinstance(e, ApiError) and e.status not in TRANSIENT_STATUSES:
+                raise
+            logger.info(f"Distance lookup failed ({e!r}), retrying in {delay} seconds.")
+            CLIENT_RETRIES.inc(client="maps", operation="get_distance")
+            await asyncio.sleep(delay)
+            delay *= 2
+    seconds = timeparse((await maps.get_distance(**api_dict))["duration"])  # The last attempt raises what it gets
+    return seconds
+
+
+class TrafficAlert:
+    """An ethereal task created for checking travel time before going somewhere."""
+
+    NAME: str = "TrafficAlert"
+    DAYS: ClassVar[list[str]] = []
+    DAY: int = 0
+    DEPENDS: ClassVar[list[str]] = []
+    PRIORITY: int = PRIORITY_CRITICAL
+    RESOURCES: ClassVar[list[str]] = ["google"]
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        api_dict: dict[str, Any],
+        recheck_time: timedelta,
+        fallback_time: timedelta,
+        arrival_time: datetime,
+    ) -> None:
+        self.TIME = recheck_time
+        self.name = name
+        self.api_dict = api_dict
+        self.fallback_time = fallback_time
+        self.arrival_time = arrival_time
+
+    async def execute(self, _: Vault, services: ServiceContainer) -> None:
+        """Push the current departure time (or the planned one if Google Maps can't be reached).
+
+        Parameters:
+            services: The shared clients, for Google Maps
+        """
+        url = directions_url(self.api_dict["origin"], self.api_dict["destination"])
+        try:
+            seconds = await get_travel_seconds(await services.get("maps"), self.api_dict)
+        except LOOKUP_ERRORS as e:
+            logger.warning(f"Could not recheck travel time for {self.name}: {e!r}")
+            seconds = None
+
+        if seconds:
+            departure_time = convert_timedelta(self.arrival_time - timedelta(seconds=seconds))
+            Outbox.notify(
+                f"ETA for {self.name}",
+                f"Leave at {departure_time} to get there for {self.arrival_time}\n{url}",
+            )
+            await asyncio.sleep(30)
+            return
+        Outbox.notify(
+            f"Fallback ETA for {self.name}",
+            f"Leave at {self.fallback_time} to get there for {self.arrival_time}\n{url}",
+        )
+        await asyncio.sleep(30)
+
+
 @Tasks.register
 class SetTrafficAlerts:
     """A task for creating an Alarm task based on Google Calendar entries for the day."""
 
     NAME: str = "SetTrafficAlerts"
     TIME: timedelta = timedelta(hours=SET_ALARM[0], minutes=SET_ALARM[1])
-    DAYS: List[str] = []
+    DAYS: ClassVar[list[str]] = []
     DAY: int = 0
+    DEPENDS: ClassVar[list[str]] = ["calendar-events"]
+    PRIORITY: int = PRIORITY_NORMAL
+    RESOURCES: ClassVar[list[str]] = ["google"]
 
-    async def execute(self, vault: Vault | None = None):
-        """Get all of today's events from Google Calendar to warn of changes to travel time.
+    @staticmethod
+    def get_trips(
+        events: Iterable[dict[str, Any]], home_address: str
+    ) -> Iterator[tuple[str, dict[str, Any], datetime]]:
+        """Turn today's events into the trips that need a travel time.
 
         Parameters:
-            vault: The vault with the pushbullet token and Google Calendar creds
-        """
-        calendar = GoogleCalendarClient(vault)
-        maps = GoogleMapsClient(vault)
-        home_address = vault.load_entries()["home-address"]
+            events: Today's Google Calendar events in chronological order
+            home_address: The address trips start from
 
+        Yields:
+            The event name, the Distance Matrix arguments and the arrival time of each trip
+        """
         previous_event = None
-        for event in calendar.get_todays_events():
+        for event in events:
             if "location" not in event:
                 continue
 
@@ -69,89 +177,61 @@ class SetTrafficAlerts:
             arrival_time -= timedelta(minutes=5)
 
             origin = home_address
-            if previous_event and "location" in previous_event:
-                end_time = datetime.strptime(event["end"]["dateTime"][:19], "%Y-%m-%dT%H:%M:%S")
-                if end_time < (arrival_time - timedelta(minutes=60)):
+            if previous_event and "location" in previous_event:  # Coming straight from it, unless it ends early
+                end_time = datetime.strptime(previous_event["end"]["dateTime"][:19], "%Y-%m-%dT%H:%M:%S")
+                if end_time >= (arrival_time - timedelta(minutes=60)):
                     origin = previous_event["location"]
 
-            api_dict = dict(
-                origin=home_address,
-                destination=event["location"],
-                arrival_time=arrival_time.timestamp(),
-            )
-
-            for _ in range(5):
-                try:  # Try five times while catching exceptions
-                    seconds = timeparse((await maps.get_distance(**api_dict))["duration"])
-                    break
-                except:
-                    await asyncio.sleep(60)  # In no rush to schedule this
-                seconds = timeparse((await maps.get_distance(**api_dict))["duration"])
+            api_dict = {
+                "origin": origin,
+                "destination": event["location"],
+                "arrival_time": arrival_time.timestamp(),
+            }
+            previous_event = event
+            yield event["summary"], api_dict, arrival_time
 
-            name = event["summary"]
+    async def execute(self, vault: Vault, services: ServiceContainer) -> None:
+        """Get all of today's events from Google Calendar to warn of changes to travel time.
 
-            fallback_time = convert_timedelta(arrival_time - (timedelta(seconds=seconds)))
-            recheck_time = convert_timedelta(arrival_time - (2 * timedelta(seconds=seconds)))
-            previous_event = event
+        Travel times are resolved concurrently (at most CONCURRENCY at a time) and each TrafficAlert is
+        scheduled as soon as its own travel time arrives. Whatever is unresolved after PLANNING_DEADLINE
+        is dropped, so one bad address can no longer hold up the rest of the day.
 
-            class TrafficAlert:
-                """An ethereal task created for checking travel time before going somewhere."""
-
-                NAME: str = "TrafficAlert"
-                TIME: timedelta = recheck_time
-                DAYS: List[str] = []
-                DAY: int = 0
-
-                def __init__(
-                    self,
-                    name: str,
-                    *,
-                    api_dict: dict[str, Any],
-                    fallback_time: datetime,
-                    arrival_time: datetime,
-                    vault: Vault,
-                ):
-                    self.name = name
-                    self.api_dict = api_dict
-                    self.vault = vault
-                    self.fallback_time = fallback_time
-                    self.arrival_time = arrival_time
-
-                async def execute(self, _: Vault | None = None):
-                    """Start all the SwitchBot alarm devices."""
-                    seconds = None
-                    notifier = PushbulletNotifier(self.vault.load_entries()["pushbullet-key"])
-                    for _ in range(5):  # Try five times while catching exceptions
-                        try:
-                            maps = GoogleMapsClient(self.vault)
-                            seconds = timeparse((await maps.get_distance(**self.api_dict))["duration"])
-                            break
-                        except:
-                            await asyncio.sleep(60)
-
-                    if seconds:
-                        departure_time = convert_timedelta(self.arrival_time - timedelta(seconds=seconds))
-                        notifier.send_notification(
-                            f"ETA for {self.name}",
-                            f"Leave at {departure_time} to get there for {self.arrival_time}\n"
-                            f"{directions_url(api_dict["origin"], api_dict["destination"])}",
-                        )
-                        await asyncio.sleep(30)
-                        return
-                    notifier.send_notification(
-                        f"Fallback ETA for {self.name}",
-                        f"Leave at {self.fallback_time} to get there for {self.arrival_time}\n"
-                        f"{directions_url(api_dict["origin"], api_dict["destination"])}",
-                    )
-                    await asyncio.sleep(30)
-
-            Tasks.add_daily_tasklist(
-                TrafficAlert(
-                    name,
-                    api_dict=api_dict,
-                    fallback_time=fallback_time,
-                    arrival_time=arrival_time,
-                    vault=vault,
-                )
+        Parameters:
+            vault: The vault with the home address
+            services: The shared clients, for Google Maps (today's events are prefetched)
+        """
+        events, maps = await asyncio.gather(Prefetch.get("calendar-events", services), services.get("maps"))
+        home_address = vault.load_entries()["home-address"]
+        semaphore = asyncio.Semaphore(CONCURRENCY)
+
+        async def plan(name: str, api_dict: dict[str, Any], arrival_time: datetime) -> TrafficAlert | None:
+            async with semaphore:
+                try:
+                    seconds = await get_travel_seconds(maps, api_dict)
+                except LOOKUP_ERRORS as e:
+                    logger.warning(f"Could not get travel time for {name}: {e!r}")
+                    return None
+
+            return TrafficAlert(
+                name,
+                api_dict=api_dict,
+                recheck_time=convert_timedelta(arrival_time - (2 * timedelta(seconds=seconds))),
+                fallback_time=convert_timedelta(arrival_time - (timedelta(seconds=seconds))),
+                arrival_time=arrival_time,
             )
-            logger.info(f"Added TrafficAlert at ({recheck_time}) to daily tasklist.")
+
+        pending = [asyncio.create_task(plan(*trip)) for trip in self.get_trips(events, home_address)]
+        try:
+            async with asyncio.timeout(PLANNING_DEADLINE):
+                for planned in asyncio.as_completed(pending):
+                    alert = await planned
+                    if alert:
+                        Tasks.add_daily_tasklist(alert)
+                        logger.info(f"Added TrafficAlert at ({alert.TIME}) to daily tasklist.")
+        except TimeoutError:
+            unfinished = sum(not task.done() for task in pending)
+            logger.warning(f"Traffic planning deadline reached, {unfinished} trips were not scheduled.")
+        finally:
+            for task in pending:
+                task.cancel()
@@ -1,16 +1,15 @@
 from __future__ import annotations
 
-from Automated_Tasker.tasklist import Tasks, DAY_START
-from Automated_Tasker.utils.vault import Vault
-from Automated_Tasker.services.pushbullet import PushbulletNotifier
-
+import logging
 from datetime import timedelta
+from typing import ClassVar
 
-from typing import List
-from bs4 import BeautifulSoup
-from aiohttp import ClientSession
-
-import logging
+from Automated_Tasker.admission import PRIORITY_NORMAL
+from Automated_Tasker.prefetch import Prefetch
+from Automated_Tasker.services.container import ServiceContainer
+from Automated_Tasker.services.outbox import Outbox
+from Automated_Tasker.tasklist import DAY_START, Tasks
+from Automated_Tasker.utils.vault import Vault
 
 logger = logging.getLogger(__name__)
 
@@ -21,46 +20,28 @@ class Weather:
 
     NAME: str = "Weather"
     TIME: timedelta = timedelta(hours=DAY_START[0], minutes=DAY_START[1])
-    DAYS: List[str] = []
+    DAYS: ClassVar[list[str]] = []
     DAY: int = 0
+    DEPENDS: ClassVar[list[str]] = ["forecasts"]
+    PRIORITY: int = PRIORITY_NORMAL
+    RESOURCES: ClassVar[list[str]] = []
 
-    async def execute(self, vault: Vault | None = None):
-        """Get the weather from weather.gc.ca and push it to pushbullet.
+    async def execute(self, vault: Vault, services: ServiceContainer) -> None:
+        """Get tonight's weather for every location from weather.gc.ca and push it to pushbullet.
 
         Parameters:
-            vault (Vault | None): The vault with the pushbullet token
+            vault (Vault): The vault with the pushbullet token
+            services (ServiceContainer): The shared clients (the forecasts are prefetched)
         """
-        notifier = PushbulletNotifier(vault.load_entries()["pushbullet-key"])
-        url = "https://weather.gc.ca/en/location/index.html?coords=45.403,-75.687"
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
-            "Accept-Language": "en-US,en;q=0.9",
-            "Accept-Encoding": "gzip, deflate, br",
-            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
-            "Connection": "keep-alive",
-            "Upgrade-Insecure-Requests": "1",
-        }
-
-        async with ClientSession() as session:
-            async with session.get(url, headers=headers) as response:
-                if response.status == 200:
-                    html_content = await response.text()
-                else:
-                    logger.warning("Did not get a 200 response from weather.gc.ca.")
-                    return
-
-        report = "No special weather statement found for today."
-        soup = BeautifulSoup(html_content, "html.parser")
-
-        # Locate the table containing the weather forecast
-        weather_table = soup.find("table", class_="table mrgn-bttm-md textforecast")
-
-        # Find the specific row for tonight's weather
-        rows = weather_table.find_all("tr")
-        for row in rows:
-            columns = row.find_all("td")
-            if len(columns) > 0 and "tonight" in columns[0].get_text(strip=True).lower():
-                report = columns[1].get_text(strip=True)
-                break
-
-        notifier.send_notification("Weather", report)
+        reports = {}
+        for name, forecast in (await Prefetch.get("forecasts", services)).items():
+            reports[name] = "No special weather statement found for today."
+            for period in forecast:
+                if "tonight" in period.period.lower():
+                    reports[name] = period.summary
+                    break
+
+        if len(reports) == 1:
+            Outbox.notify("Weather", next(iter(reports.values())))
+        else:
+            Outbox.notify("Weather", "\n".join(f"{name}: {report}" for name, report in reports.items()))
@@ -1,42 +1,43 @@
 from __future__ import annotations
 
-from Automated_Tasker.tasklist import Tasks, DAY_START, DAY_END
-from Automated_Tasker.utils.vault import Vault
-from Automated_Tasker.services.pushbullet import PushbulletNotifier
-
-import random
-import nltk
-from datetime import datetime, timedelta
-from nltk.corpus import wordnet
-from datetime import timedelta
-
-from typing import List
-
+import asyncio
 import logging
+import random
+from datetime import date, datetime, time, timedelta
+from typing import ClassVar
+
+from Automated_Tasker.admission import PRIORITY_BULK
+from Automated_Tasker.services.container import ServiceContainer
+from Automated_Tasker.services.outbox import Outbox
+from Automated_Tasker.tasklist import DAY_END, DAY_START, Tasks
+from Automated_Tasker.utils import clock
+from Automated_Tasker.utils.lemma_index import get_index
+from Automated_Tasker.utils.vault import Vault
 
 logger = logging.getLogger(__name__)
 
-# Download necessary datasets
-nltk.download('wordnet', quiet=True)
 
-def get_words(target_date: datetime = datetime.now(), count: int = 8, category='mixed', mode='random'):
+def get_words(
+    target_date: datetime | None = None, count: int = 8, category: str = "mixed", mode: str = "random"
+) -> list[str]:
+    target_date = target_date or clock.now()
     seed_value = int(target_date.strftime("%Y%m%d"))
-    random.seed(seed_value)
+    rng = random.Random(seed_value)  # Seeded like the module's, without racing the other word game's thread
 
     mapping = {
-        'noun': wordnet.NOUN,
-        'adj': wordnet.ADJ,
-        'adv': wordnet.ADV,
-        'verb': wordnet.VERB,
+        "noun": "n",
+        "adj": "a",
+        "adv": "r",
+        "verb": "v",
     }
 
-    words_out = []
+    words_out: list[str] = []
 
     if category in mapping:
         active_cats = [mapping[category]]
-    elif mode == 'random':
-        active_cats = [random.choice(list(mapping.values()))]
-    elif mode == 'even':
+    elif mode == "random":
+        active_cats = [rng.choice(list(mapping.values()))]
+    elif mode == "even":
         cat_list = list(mapping.values())
         active_cats = [cat_list[i % len(cat_list)] for i in range(count)]
     else:
@@ -44,32 +45,50 @@ def get_words(target_date: datetime = datetime.now(), count: int = 8, category='
 
     for cat_type in active_cats:
         needed = count if len(active_cats) == 1 else 1
-        
-        all_synsets = list(wordnet.all_synsets(cat_type))
-        selected = random.sample(all_synsets, needed)
-        
-        for syn in selected:
-            words_out.append(syn.lemmas()[0].name().replace('_', ' '))
+
+        # Sampling indices draws the same numbers as sampling the synset list did, so the words are unchanged
+        lemmas = get_index(cat_type)
+        selected = rng.sample(range(len(lemmas)), needed)
+
+        for i in selected:
+            words_out.append(lemmas[i])
 
     return words_out
 
+
 @Tasks.register
 class MorningWordGame:
     """A task for pushing today's calendar events and tasks through PushBullet."""
 
     NAME: str = "MorningWordGame"
     TIME: timedelta = timedelta(hours=DAY_START[0], minutes=DAY_START[1])
-    DAYS: List[str] = []
+    DAYS: ClassVar[list[str]] = []
     DAY: int = 0
+    DEPENDS: ClassVar[list[str]] = []
+    PRIORITY: int = PRIORITY_BULK
+    RESOURCES: ClassVar[list[str]] = ["cpu"]
+    words: list[str] | None = None
 
-    async def execute(self, vault: Vault | None = None):
+    async def prepare(self, day: date, _: ServiceContainer | None = None) -> None:
+        """Pick the words ahead of time, while the tasklist for the day is built.
+
+        Parameters:
+            day (date): The day the task will run on
+        """
+        # The first call may download WordNet and build the index, kept off the loop
+        self.words = await asyncio.to_thread(get_words, datetime.combine(day - timedelta(days=1), time.min))
+
+    async def execute(self, vault: Vault | None = None, _: ServiceContainer | None = None) -> None:
         """Get all of today's events and tasks from Google Calendar and push it to pushbullet.
 
         Parameters:
             vault (Vault | None): The vault with the pushbullet token and Google Calendar creds
         """
-        notifier = PushbulletNotifier(vault.load_entries()["pushbullet-key"])
-        notifier.send_notification("Yesterday's Words", "\n".join(get_words(datetime.now()-timedelta(hours=24))))
+        words = self.words
+        if not words:
+            words = await asyncio.to_thread(get_words, clock.now() - timedelta(hours=24))
+        Outbox.notify("Yesterday's Words", "\n".join(words))
+
 
 @Tasks.register
 class NightWordGame:
@@ -77,14 +96,28 @@ class NightWordGame:
 
     NAME: str = "NightWordGame"
     TIME: timedelta = timedelta(hours=DAY_END[0], minutes=DAY_END[1])
-    DAYS: List[str] = []
+    DAYS: ClassVar[list[str]] = []
     DAY: int = 0
+    DEPENDS: ClassVar[list[str]] = []
+    PRIORITY: int = PRIORITY_BULK
+    RESOURCES: ClassVar[list[str]] = ["cpu"]
+    words: list[str] | None = None
+
+    async def prepare(self, day: date, _: ServiceContainer | None = None) -> None:
+        """Pick the words ahead of time, while the tasklist for the day is built.
+
+        Parameters:
+            day (date): The day the task will run on
+        """
+        self.words = await asyncio.to_thread(get_words, datetime.combine(day, time.min))
 
-    async def execute(self, vault: Vault | None = None):
+    async def execute(self, vault: Vault | None = None, _: ServiceContainer | None = None) -> None:
         """Get all of today's events and tasks from Google Calendar and push it to pushbullet.
 
         Parameters:
             vault (Vault | None): The vault with the pushbullet token and Google Calendar creds
         """
-        notifier = PushbulletNotifier(vault.load_entries()["pushbullet-key"])
-        notifier.send_notification("Today's Words", "\n".join(get_words(datetime.now())))
\ No newline at end of file
+        words = self.words
+        if not words:
+            words = await asyncio.to_thread(get_words, clock.now())
+        Outbox.notify("Today's Words", "\n".join(words))
@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import asyncio
+import selectors
+from collections.abc import Callable, Iterator, Mapping
+from concurrent.futures import Executor
+from contextlib import contextmanager
+from datetime import UTC, datetime, timedelta, tzinfo
+from typing import TYPE_CHECKING, Any, Protocol, TypeVar, TypeVarTuple
+
+if TYPE_CHECKING:
+    from _typeshed import FileDescriptorLike
+
+_T = TypeVar("_T")
+_Ts = TypeVarTuple("_Ts")
+
+
+class Clock(Protocol):
+    """Where the scheduler and tasks read the time of day from."""
+
+    def now(self, tz: tzinfo | None = None) -> datetime: ...
+
+
+class SystemClock:
+    """The real wall clock."""
+
+    def now(self, tz: tzinfo | None = None) -> datetime:
+        return datetime.now(tz)
+
+
+class VirtualClock:
+    """A wall clock driven by an event loop's time, so it moves with a VirtualTimeLoop."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, start: datetime):
+        """Start the clock.
+
+        Args:
+            loop: The loop whose time() drives the clock
+            start: The (timezone aware) moment the loop's current time stands for
+        """
+        self.loop = loop
+        self._origin = start.astimezone(UTC) - timedelta(seconds=loop.time())
+        self._last: tuple[float, tzinfo | None, datetime] | None = None
+
+    def now(self, tz: tzinfo | None = None) -> datetime:
+        seconds = self.loop.time()
+        if self._last is not None and self._last[0] == seconds and self._last[1] is tz:
+            return self._last[2]  # Time only moves between callbacks, and a tick asks for it several times
+        moment = self._origin + timedelta(seconds=seconds)
+        moment = moment.astimezone(tz) if tz else moment.astimezone().replace(tzinfo=None)
+        self._last = (seconds, tz, moment)
+        return moment
+
+
+_clock: Clock = SystemClock()
+
+
+def now(tz: tzinfo | None = None) -> datetime:
+    """Get the current time from the clock in use, in place of datetime.now().
+
+    Args:
+        tz: The timezone to return the time in, naive local time if None
+
+    Returns:
+        The current time
+    """
+    return _clock.now(tz)
+
+
+def timestamp() -> float:
+    """Get the current time from the clock in use as a POSIX timestamp, in place of time.time().
+
+    Returns:
+        The seconds since the epoch
+    """
+    return _clock.now(UTC).timestamp()
+
+
+@contextmanager
+def use_clock(clock: Clock) -> Iterator[Clock]:
+    """Read the time from another clock for the duration of the block.
+
+    Args:
+        clock: The clock to use
+
+    Yields:
+        The clock
+    """
+    global _clock
+    previous, _clock = _clock, clock
+    try:
+        yield clock
+    finally:
+        _clock = previous
+
+
+class _VirtualSelector(selectors.BaseSelector):
+    """A selector that doesn't wait for timers: when there is no I/O ready it moves the loop's time on to its next
+    timer. While work is running in the loop's executor it waits for real, as that work is what will wake it."""
+
+    def __init__(self, selector: selectors.BaseSelector, loop: VirtualTimeLoop):
+        self._selector = selector
+        self._loop = loop
+
+    def register(self, fileobj: FileDescriptorLike, events: int, data: Any = None) -> selectors.SelectorKey:
+        return self._selector.register(fileobj, events, data)
+
+    def unregister(self, fileobj: FileDescriptorLike) -> selectors.SelectorKey:
+        return self._selector.unregister(fileobj)
+
+    def modify(self, fileobj: FileDescriptorLike, events: int, data: Any = None) -> selectors.SelectorKey:
+        return self._selector.modify(fileobj, events, data)
+
+    def select(self, timeout: float | None = None) -> list[tuple[selectors.SelectorKey, int]]:
+        if timeout is None:  # No timers at all, only real I/O (e.g. a thread finishing) can wake the loop
+            return self._selector.select(None)
+        events = self._selector.select(timeout if self._loop.in_executor else 0)
+        if not events and timeout > 0:
+            self._loop.advance(timeout)
+        return events
+
+    def close(self) -> None:
+        self._selector.close()
+
+    def get_map(self) -> Mapping[FileDescriptorLike, selectors.SelectorKey]:
+        return self._selector.get_map()
+
+
+class VirtualTimeLoop(asyncio.SelectorEventLoop):
+    """An event loop on virtual time, which jumps straight to the next timer whenever it would otherwise wait.
+
+    asyncio.sleep, wait_for, call_later and timeouts all run on the loop's time(), so a day of LOOP_WAIT ticks,
+    ten minute alarm sleeps and half hour subdaemon checks replays in as long as the code itself takes to run.
+    Use it with a VirtualClock so the wall clock moves too.
+    """
+
+    def __init__(self) -> None:
+        self._virtual_time = 0.0
+        self.in_executor = 0  # Calls running in threads (e.g. asyncio.to_thread), which virtual time waits for
+        super().__init__(_VirtualSelector(selectors.DefaultSelector(), self))
+
+    def time(self) -> float:
+        return self._virtual_time
+
+    def run_in_executor(self, executor: Executor | None, func: Callable[[*_Ts], _T], *args: *_Ts) -> asyncio.Future[_T]:
+        future = super().run_in_executor(executor, func, *args)
+        self.in_executor += 1
+        future.add_done_callback(self._executor_done)
+        return future
+
+    def _executor_done(self, _: asyncio.Future[Any]) -> None:
+        self.in_executor -= 1
+
+    def advance(self, seconds: float) -> None:
+        """Move the loop's time forward.
+
+        Args:
+            seconds: How far
+        """
+        self._virtual_time += seconds
@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import re
+import time
+
+from aiohttp import ClientError, ClientSession
+
+from Automated_Tasker.utils import clock
+from Automated_Tasker.utils.vault import Vault
+
+logger = logging.getLogger(__name__)
+
+URL = "https://nominatim.openstreetmap.org/"
+USER_AGENT = "pools_locator"
+REQUEST_INTERVAL = 1  # seconds between Nominatim requests, as their usage policy asks
+MISS_TTL = 7 * 24 * 60 * 60  # seconds an address Nominatim couldn't place is not asked about again
+
+# You're gonna want these API docs:
+# https://nominatim.org/release-docs/latest/api/Search/
+
+
+def normalise_address(address: str) -> str:
+    """Reduce an address to the form used as its key, so trivial differences share an entry.
+
+    Args:
+        address: The address as written
+
+    Returns:
+        The lowercased address with its whitespace and comma spacing collapsed
+    """
+    return re.sub(r"\s*,\s*", ", ", re.sub(r"\s+", " ", address.strip().lower()))
+
+
+class GeocodeStore:
+    """A disk-persisted store of geocoded addresses, keyed by normalised address.
+
+    Nominatim is only asked about addresses the store hasn't seen, one request at a time and at most once per
+    REQUEST_INTERVAL. Addresses Nominatim can't place are remembered for MISS_TTL, so they aren't asked about on
+    every crawl but still get placed once Nominatim learns them. Failed requests aren't remembered at all."""
+
+    def __init__(self, file_name: str = "geocodes.json"):
+        self.file_path = Vault.get_vault_directory() / file_name
+        self.positions: dict[str, tuple[float, float]] | None = None
+        self.misses: dict[str, float] = {}  # Address to when Nominatim couldn't place it
+        self.lookups = 0
+        self._lock = asyncio.Lock()
+        self._last_request = 0.0
+
+    async def get_position(self, session: ClientSession, address: str) -> tuple[float | None, float | None]:
+        """Get the position of the address
+
+        Args:
+            session: The session used if Nominatim has to be asked
+            address: The address to look up
+
+        Returns:
+            The latitude and longitude tuple, or double None if it failed
+        """
+        self._load()
+        assert self.positions is not None
+        key = normalise_address(address)
+        if key in self.positions:
+            return self.positions[key]
+        if clock.timestamp() - self.misses.get(key, -MISS_TTL) < MISS_TTL:
+            return None, None
+
+        async with self._lock:
+            if key in self.positions:  # Looked up while we were waiting for our turn
+                return self.positions[key]
+
+            wait = self._last_request + REQUEST_INTERVAL - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            try:
+                self.lookups += 1
+                async with session.get(
+                    f"{URL}search",
+                    params={"q": address, "format": "json", "limit": 1},
+                    headers={"User-Agent": USER_AGENT},
+                ) as response:
+                    if not response.ok:
+                        logger.warning(f"Could not geocode {address} ({response.status}).")
+                        return None, None
+                    results = await response.json()
+            except (ClientError, TimeoutError, ValueError) as e:
+                logger.warning(f"Could not geocode {address} ({e!r}).")
+                return None, None
+            finally:
+                self._last_request = time.monotonic()
+
+        if results:
+            self.positions[key] = float(results[0]["lat"]), float(results[0]["lon"])
+            self.misses.pop(key, None)
+        else:
+            self.misses[key] = clock.timestamp()
+        self._save()
+        return self.positions.get(key, (None, None))
+
+    def _load(self) -> None:
+        if self.positions is not None:
+            return
+        try:
+            with open(self.file_path, "r") as file:
+                stored = json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            stored = {}
+        if "positions" not in stored:  # Written before misses expired, every address at the top level
+            stored = {"positions": {key: position for key, position in stored.items() if None not in position}}
+        self.positions = {key: (position[0], position[1]) for key, position in stored["positions"].items()}
+        self.misses = stored.get("misses", {})
+
+    def _save(self) -> None:
+        with open(self.file_path, "w") as file:
+            json.dump({"positions": self.positions, "misses": self.misses}, file)
+
+
+geocodes = GeocodeStore()
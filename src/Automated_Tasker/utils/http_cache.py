@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+from typing import Any
+
+from aiohttp import ClientSession
+
+from Automated_Tasker.utils import clock
+from Automated_Tasker.utils.vault import Vault
+
+logger = logging.getLogger(__name__)
+
+CACHE_LIMIT = 64 * 1024 * 1024  # bytes of cached bodies kept on disk
+SAVE_DELAY = 1  # seconds the index's changes are gathered for before it's written
+
+
+class HTTPCache:
+    """An on-disk cache for the pages we scrape, revalidated with conditional GETs.
+
+    Bodies are stored next to their ETag and Last-Modified validators, and every later fetch sends them back
+    as If-None-Match and If-Modified-Since. An unchanged page then costs a 304 with no body, and the cached
+    copy is returned instead. The least recently used bodies are evicted once the cache outgrows its limit.
+
+    The index is written SAVE_DELAY after its first change, so a crawl's hits share a single write, see flush()."""
+
+    def __init__(self, directory_name: str = "http_cache", limit: int = CACHE_LIMIT):
+        self.directory = Vault.get_vault_directory() / directory_name
+        self.index_path = self.directory / "index.json"
+        self.limit = limit
+        self.index: dict[str, dict[str, Any]] | None = None
+        self.hits = 0
+        self.misses = 0
+        self._save_timer: asyncio.TimerHandle | None = None
+
+    async def get(self, session: ClientSession, url: str, headers: dict[str, str] | None = None) -> str | None:
+        """GET the text of a page, going through the cache.
+
+        Parameters:
+            session (ClientSession): The session to make the request with
+            url (str): The page to fetch
+            headers (dict[str, str] | None): Any extra request headers
+
+        Returns:
+            str | None: The body of the page, or None if the server did not return it
+        """
+        index = self._load()
+        entry = index.get(url)
+        body_path = self.directory / self._file_name(url)
+        if entry and not body_path.exists():
+            entry = None
+
+        request_headers = dict(headers or {})
+        if entry:
+            if entry.get("etag"):
+                request_headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                request_headers["If-Modified-Since"] = entry["last_modified"]
+
+        async with session.get(url, headers=request_headers) as response:
+            if response.status == 304 and entry:
+                self.hits += 1
+                entry["accessed"] = clock.timestamp()
+                self._save()
+                return body_path.read_text(encoding="utf-8")
+
+            if response.status != 200:
+                logger.warning(f"Got a {response.status} response from {url}.")
+                return None
+
+            self.misses += 1
+            body = await response.text()
+            etag, last_modified = response.headers.get("ETag"), response.headers.get("Last-Modified")
+
+        if etag or last_modified:  # Without validators there is nothing to revalidate against
+            encoded = body.encode("utf-8")
+            body_path.write_bytes(encoded)
+            index[url] = {
+                "etag": etag,
+                "last_modified": last_modified,
+                "size": len(encoded),
+                "accessed": clock.timestamp(),
+            }
+            self._evict()
+            self._save()
+        return body
+
+    def flush(self) -> None:
+        """Write the index now if it has changes waiting, e.g. before shutting down."""
+        if self._save_timer is not None:
+            self._write()
+
+    def _evict(self) -> None:
+        index = self._load()
+        total = sum(entry["size"] for entry in index.values())
+        for url, entry in sorted(index.items(), key=lambda item: item[1]["accessed"]):
+            if total <= self.limit:
+                break
+            (self.directory / self._file_name(url)).unlink(missing_ok=True)
+            del index[url]
+            total -= entry["size"]
+
+    @staticmethod
+    def _file_name(url: str) -> str:
+        return hashlib.sha256(url.encode()).hexdigest()
+
+    def _load(self) -> dict[str, dict[str, Any]]:
+        if self.index is None:
+            self.directory.mkdir(exist_ok=True)
+            try:
+                with open(self.index_path, "r") as file:
+                    self.index = json.load(file)
+            except (FileNotFoundError, json.JSONDecodeError):
+                self.index = {}
+        assert self.index is not None
+        return self.index
+
+    def _save(self) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:  # Nothing to gather the changes on, write right away
+            self._write()
+            return
+        if self._save_timer is None:
+            self._save_timer = loop.call_later(SAVE_DELAY, self._write)
+
+    def _write(self) -> None:
+        if self._save_timer is not None:
+            self._save_timer.cancel()
+            self._save_timer = None
+        try:
+            with open(self.index_path, "w") as file:
+                json.dump(self.index, file)
+        except OSError as e:
+            logger.warning(f"Could not write the HTTP cache index: {e!r}")
+
+
+http_cache = HTTPCache()
@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import functools
+import logging
+import mmap
+import os
+import threading
+from array import array
+from pathlib import Path
+from typing import Literal
+
+from Automated_Tasker.utils.vault import Vault
+
+logger = logging.getLogger(__name__)
+
+PARTS_OF_SPEECH = ["n", "a", "r", "v"]  # wordnet.NOUN, ADJ, ADV and VERB
+OFFSET_TYPE: Literal["I"] = "I"  # 4 byte unsigned offsets into the lemma blob
+
+_build_lock = threading.Lock()  # The word games prepare on separate threads, only one of them builds
+
+
+def get_index_directory() -> Path:
+    """Get (and create if it doesn't exists) the directory for the lemma index files.
+
+    Returns:
+        Path: The Path of the directory
+    """
+    directory = Vault.get_vault_directory() / "wordnet"
+    directory.mkdir(exist_ok=True)
+    return directory
+
+
+def build_index(directory: Path | None = None) -> None:
+    """Write the first lemma of every WordNet synset, per part of speech, as a packed blob plus offsets.
+
+    Lemmas are stored in wordnet.all_synsets order, so sampling indices gives the same words as sampling
+    the synsets did.
+
+    Parameters:
+        directory (Path | None): Where to write the index, get_index_directory() if None
+    """
+    import nltk
+
+    nltk.download("wordnet", quiet=True)
+    from nltk.corpus import wordnet
+
+    directory = directory or get_index_directory()
+    for pos in PARTS_OF_SPEECH:
+        offsets = array(OFFSET_TYPE, [0])
+        blob = bytearray()
+        for synset in wordnet.all_synsets(pos):
+            blob += synset.lemmas()[0].name().replace("_", " ").encode()
+            offsets.append(len(blob))
+
+        for suffix, data in (("lemmas", bytes(blob)), ("offsets", offsets.tobytes())):
+            temp = directory / f"{pos}.{suffix}.tmp"
+            temp.write_bytes(data)
+            os.replace(temp, directory / f"{pos}.{suffix}")
+        logger.info(f"Indexed {len(offsets) - 1} '{pos}' lemmas.")
+
+
+class LemmaIndex:
+    """A read-only, memory-mapped sequence of the lemmas for one part of speech."""
+
+    def __init__(self, pos: str, directory: Path | None = None):
+        directory = directory or get_index_directory()
+        with open(directory / f"{pos}.lemmas", "rb") as file:
+            self._blob = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        with open(directory / f"{pos}.offsets", "rb") as file:
+            self._offsets_map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._offsets = memoryview(self._offsets_map).cast(OFFSET_TYPE)
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, i: int) -> str:
+        return self._blob[self._offsets[i] : self._offsets[i + 1]].decode()
+
+
+@functools.cache
+def get_index(pos: str) -> LemmaIndex:
+    """Get the lemma index for a part of speech, building every index first if it hasn't been yet.
+
+    Building downloads WordNet and walks every synset, so call this off the event loop (asyncio.to_thread).
+
+    Parameters:
+        pos (str): The WordNet part of speech (one of PARTS_OF_SPEECH)
+
+    Returns:
+        LemmaIndex: The memory-mapped index
+    """
+    directory = get_index_directory()
+    with _build_lock:
+        if not (directory / f"{pos}.offsets").exists():
+            logger.info("Building the WordNet lemma index.")
+            build_index(directory)
+    return LemmaIndex(pos, directory)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    build_index()
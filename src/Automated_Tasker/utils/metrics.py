@@ -0,0 +1,194 @@
+from __future__ import annotations
+
+import logging
+import math
+from bisect import bisect_left
+from collections.abc import Sequence
+
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+METRICS_HOST = "127.0.0.1"  # Only exposed locally, point a Prometheus scraper (or curl) at it
+METRICS_PORT = 9464
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LAG_BUCKETS = (0.5, 1, 5, 15, 30, 60, 120, 300, 600, 1800)  # seconds
+DURATION_BUCKETS = (0.05, 0.25, 1, 5, 15, 60, 300, 900, 1800, 3600)  # seconds
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(labels: dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in sorted(labels.items())) + "}"
+
+
+def _number(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Counter:
+    """A monotonically increasing count, one per label set."""
+
+    TYPE = "counter"
+
+    def __init__(self, name: str, documentation: str):
+        self.name = name
+        self.documentation = documentation
+        self.values: dict[tuple[tuple[str, str], ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        """Add to the count of a label set.
+
+        Args:
+            amount: How much to add
+            labels: The label values, e.g. task="SetAlarm"
+        """
+        key = tuple(sorted(labels.items()))
+        self.values[key] = self.values.get(key, 0) + amount
+
+    def samples(self) -> list[str]:
+        return [f"{self.name}{_labels(dict(key))} {_number(value)}" for key, value in self.values.items()]
+
+
+class Histogram:
+    """Observations counted into cumulative buckets, one set of buckets per label set."""
+
+    TYPE = "histogram"
+
+    def __init__(self, name: str, documentation: str, buckets: Sequence[float]):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(sorted(buckets))
+        self.values: dict[tuple[tuple[str, str], ...], tuple[list[int], list[float]]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        """Record an observation.
+
+        Args:
+            value: The observed value
+            labels: The label values, e.g. task="SetAlarm"
+        """
+        key = tuple(sorted(labels.items()))
+        counts, total = self.values.setdefault(key, ([0] * (len(self.buckets) + 1), [0.0]))
+        counts[bisect_left(self.buckets, value)] += 1
+        total[0] += value
+
+    def samples(self) -> list[str]:
+        lines = []
+        for key, (counts, total) in self.values.items():
+            labels = dict(key)
+            cumulative = 0
+            for bound, count in zip((*self.buckets, math.inf), counts):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_labels({**labels, 'le': _number(bound)})} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(labels)} {_number(total[0])}")
+            lines.append(f"{self.name}_count{_labels(labels)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """The process's metrics, rendered in the Prometheus text exposition format on a local HTTP endpoint."""
+
+    def __init__(self) -> None:
+        self.metrics: dict[str, Counter | Histogram] = {}
+        self._runner: web.AppRunner | None = None
+
+    def counter(self, name: str, documentation: str) -> Counter:
+        """Get (creating it the first time) a counter.
+
+        Args:
+            name: The metric name, e.g. tasker_task_failures_total
+            documentation: The HELP text
+
+        Returns:
+            The counter
+
+        Raises:
+            TypeError: If the name is already taken by another kind of metric
+        """
+        metric = self.metrics.setdefault(name, Counter(name, documentation))
+        if not isinstance(metric, Counter):
+            raise TypeError(f"{name} is already registered as a {metric.TYPE}, not a counter")
+        return metric
+
+    def histogram(self, name: str, documentation: str, buckets: Sequence[float] = DURATION_BUCKETS) -> Histogram:
+        """Get (creating it the first time) a histogram.
+
+        Args:
+            name: The metric name, e.g. tasker_task_duration_seconds
+            documentation: The HELP text
+            buckets: The upper bounds of the buckets (+Inf is added)
+
+        Returns:
+            The histogram
+
+        Raises:
+            TypeError: If the name is already taken by another kind of metric
+        """
+        metric = self.metrics.setdefault(name, Histogram(name, documentation, buckets))
+        if not isinstance(metric, Histogram):
+            raise TypeError(f"{name} is already registered as a {metric.TYPE}, not a histogram")
+        return metric
+
+    def render(self) -> str:
+        """Render every metric.
+
+        Returns:
+            The metrics in the Prometheus text format
+        """
+        lines = []
+        for metric in self.metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.TYPE}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+    async def start(self, host: str = METRICS_HOST, port: int = METRICS_PORT) -> None:
+        """Serve the metrics on http://host:port/metrics.
+
+        Args:
+            host: The interface to listen on
+            port: The port to listen on
+        """
+        app = web.Application()
+        app.router.add_get("/metrics", self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        try:
+            await web.TCPSite(self._runner, host, port).start()
+        except OSError as e:
+            logger.warning(f"Could not serve metrics on {host}:{port}: {e!r}")
+            await self.stop()
+            return
+        logger.info(f"Serving metrics on http://{host}:{port}/metrics.")
+
+    async def stop(self) -> None:
+        """Stop serving the metrics."""
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def _handle(self, _: web.Request) -> web.Response:
+        return web.Response(body=self.render().encode(), headers={"Content-Type": CONTENT_TYPE})
+
+
+metrics = MetricsRegistry()
+
+TASK_LAG = metrics.histogram(
+    "tasker_task_start_lag_seconds", "How long after its scheduled TIME a task started.", LAG_BUCKETS
+)
+TASK_ADMISSION_WAIT = metrics.histogram(
+    "tasker_task_admission_wait_seconds", "How long a due task waited to be admitted.", LAG_BUCKETS
+)
+TASK_DURATION = metrics.histogram("tasker_task_duration_seconds", "How long a task's execute took.")
+TASK_FAILURES = metrics.counter("tasker_task_failures_total", "Tasks whose execute raised.")
+SUBDAEMON_RESTARTS = metrics.counter("tasker_subdaemon_restarts_total", "Subdaemons restarted after stopping.")
+SUBDAEMON_FAILURES = metrics.counter("tasker_subdaemon_failures_total", "Subdaemons that stopped on an exception.")
+CLIENT_RETRIES = metrics.counter("tasker_client_retries_total", "Requests service clients had to try again.")
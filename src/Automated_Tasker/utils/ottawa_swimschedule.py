@@ -1,213 +1,377 @@
-from aiohttp import ClientSession
-from asyncio import run as run_async
-from asyncio import sleep as asleep
+import hashlib
+import json
+import logging
+from asyncio import Semaphore, as_completed, create_task, gather
+from collections.abc import AsyncIterator
+from time import strptime, struct_time
+from typing import Any, Literal
 from urllib.parse import quote
+
+from aiohttp import ClientError, ClientSession
 from bs4 import BeautifulSoup
-from geopy.geocoders import Nominatim
-from geopy.distance import geodesic
-from typing import Literal, AsyncIterator
-from functools import cache
-from Automated_Tasker.tasklist import WEEKDAYS
 from tabulate import tabulate
-from time import struct_time, strptime
 
-listings_url = "https://ottawa.ca/en/recreation-and-parks/facilities/place-listing?place_facets%5B0%5D=place_type%3A4285&place_facets%5B1%5D=place_type%3A2235821"
-facility_url = "https://ottawa.ca/en/recreation-and-parks/facilities/place-listing/"
+from Automated_Tasker.tasklist import WEEKDAYS
+from Automated_Tasker.utils.geocode import geocodes
+from Automated_Tasker.utils.http_cache import http_cache
+from Automated_Tasker.utils.time_ranges import format_minutes, parse_time_ranges
+from Automated_Tasker.utils.vault import Vault
+from Automated_Tasker.utils.weekly_schedule import Slot, WeeklySchedule
 
+logger = logging.getLogger(__name__)
 
-@cache
-def get_position(geolocator: Nominatim, address: str) -> tuple[str | None, str | None]:
-    """Get the position of the address
+listings_url = "https://ottawa.ca/en/recreation-and-parks/facilities/place-listing?place_facets%5B0%5D=place_type%3A4285&place_facets%5B1%5D=place_type%3A2235821"
+facility_url = "https://ottawa.ca/en/recreation-and-parks/facilities/place-listing/"
 
-    Args:
-        geolocator: The geolocator used to find the latitude and longitude
-        address: The address to look up in the Nominatim lookup
+CONCURRENCY = 8  # Requests in flight to ottawa.ca
+MAX_LISTING_PAGES = 100
+PAGE_VERSION = 2  # Bumped when parse_facility_page changes, so stored pages are parsed again
+WEEKLY_SCHEDULE_FILE = "weekly_schedule.json"
+DAY_START = strptime("00:00", "%H:%M")
+DAY_STOP = strptime("23:59", "%H:%M")
 
-    Returns:
-        The latitude and longitude tuple, or double None if it failed
-    """
-    geocoded_location = geolocator.geocode(address)
-    if not geocoded_location:
-        return None, None
-    return geocoded_location.latitude, geocoded_location.longitude
+Weekday = Literal["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
 
 
-async def get_pools(geolocator: Nominatim) -> list[dict[str, str]]:
-    """Get all the pools listed on the City of Ottawa page
+def parse_facility_page(body: str) -> list[dict[str, Any]]:
+    """Extract the schedule tables of a facility page
 
     Args:
-        geolocator: The geolocator used to find the latitude and longitude
+        body: The facility page
 
     Returns:
-        A dict containing all the fields related to a pool that could be useful
+        Each table's caption, column headings and rows, with the header and the text of every cell of a row
+    """
+    tables = []
+    for table in BeautifulSoup(body, "html.parser").find_all("table"):
+        caption, thead, tbody = table.find("caption"), table.find("thead"), table.find("tbody")
+        if not caption or not tbody:
+            continue
+        columns = [column.text.strip() for column in thead.find_all("th")] if thead else []
+        rows = []
+        for row in tbody.find_all("tr"):
+            header = row.find("th")
+            if header:
+                rows.append({"header": header.text, "cells": [cell.text for cell in row.find_all("td")]})
+        tables.append({"caption": caption.text.strip().replace("–", "-"), "columns": columns, "rows": rows})
+    return tables
+
+
+class ScheduleStore:
+    """The parsed facility pages, persisted between crawls along with a fingerprint of each page.
+
+    A page is only parsed again when its fingerprint changes, and a page that couldn't be fetched falls back on
+    its last parsed tables. The store also remembers the digest of what was last posted for each schedule, so
+    deciding whether a schedule is new needs nothing but the store.
     """
-    pools = []
-    for i in range(100):
-        async with ClientSession() as session:
-            async with session.get(listings_url + "&page=" + str(i)) as response:
-                body = await response.text()
-
-        soup = BeautifulSoup(body, "html.parser")
-        pool_entries = soup.find("table", class_="table table-bordered table-condensed cols-2")
-
-        if not pool_entries:  # Break when we reach an empty page
-            break
-
-        pool_entries = pool_entries.find("tbody").findAll("tr")
-
-        for entry in pool_entries:
-            await asleep(
-                1
-            )  # Pause this loop for geopy not to be overwhelmed with requests while proceeding with other code
-            values = entry.findAll("td")
-            name = values[0].text
-            address = values[1].text.split("\n")[0] + ", Ottawa, ON"
-            latitude, longitude = get_position(geolocator, address)
-            pools.append({"name": name, "address": address, "latitude": latitude, "longitude": longitude})
-
-    return pools
-
-
-async def get_times(
-    pools: list[dict[str, str]],
-    day: Literal["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"],
-) -> list[dict[str, str | int]]:
-    """Find the tables for lane swims for a pool and extract the values on a weekday
-
-    Args:
-        pools: A list of all the dicts returned in the get_pools function
-        day: Day of the week to extract the column from (assumes the order given in the Literal)
 
-    Returns:
-        Returns all the tables in all the given pool webpages that include a Lane Swim
+    def __init__(self, file_name: str = "swim_schedule.json"):
+        self.file_path = Vault.get_vault_directory() / file_name
+        self.pages: dict[str, dict[str, Any]] = {}
+        self.posted: dict[str, str] = {}
+        self.changed: set[str] = set()
+
+    def load(self) -> None:
+        """Read the store from disk, forgetting which pages changed in the last crawl."""
+        try:
+            with open(self.file_path, "r") as file:
+                stored = json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            stored = {}
+        self.pages = stored.get("pages", {})
+        self.posted = stored.get("posted", {})
+        self.changed = set()
+
+    def save(self) -> None:
+        """Write the store to disk."""
+        with open(self.file_path, "w") as file:
+            json.dump({"pages": self.pages, "posted": self.posted}, file)
+
+    def get_tables(self, url: str, body: str | None) -> list[dict[str, Any]]:
+        """Get the tables of a facility page, parsing it only if it changed since it was last seen
+
+        Args:
+            url: The page's URL
+            body: The page, or None if it couldn't be fetched
+
+        Returns:
+            The tables, as returned by parse_facility_page
+        """
+        page = self.pages.get(url)
+        if body is None:
+            return page["tables"] if page else []
+
+        fingerprint = hashlib.sha256(body.encode()).hexdigest()
+        if page and page["fingerprint"] == fingerprint and page.get("version") == PAGE_VERSION:
+            tables: list[dict[str, Any]] = page["tables"]
+            return tables
+
+        tables = parse_facility_page(body)
+        self.pages[url] = {"fingerprint": fingerprint, "version": PAGE_VERSION, "tables": tables}
+        self.changed.add(url)
+        return tables
+
+    def is_new(self, key: str, digest: str) -> bool:
+        """Check whether a schedule differs from the one last posted under the same key
+
+        Args:
+            key: What the schedule is for (e.g. the day and location)
+            digest: A digest of the schedule
+
+        Returns:
+            True if the schedule was never posted
+        """
+        return self.posted.get(key) != digest
+
+    def mark_posted(self, key: str, digest: str) -> None:
+        """Remember a schedule as posted
+
+        Args:
+            key: What the schedule is for (e.g. the day and location)
+            digest: A digest of the schedule
+        """
+        self.posted[key] = digest
+        self.save()
+
+
+schedules = ScheduleStore()
+
+
+class PoolCrawler:
+    """A crawler for the City of Ottawa pool pages, sharing one session between every request.
+
+    Listing pages are fetched CONCURRENCY at a time, and each pool's facility page is requested as soon as the
+    pool shows up in a listing, so facility pages download while the remaining listings are still coming in.
     """
-    slots = []
-    for pool in pools:
+
+    def __init__(self, session: ClientSession, concurrency: int = CONCURRENCY):
+        """Prepare the crawler.
+
+        Args:
+            session: The session used for every request
+            concurrency: The maximum number of requests in flight
+        """
+        self.session = session
+        self.concurrency = concurrency
+        self.semaphore = Semaphore(concurrency)
+
+    async def fetch(self, url: str) -> str | None:
+        """Get a page through the HTTP cache, waiting for a free request slot
+
+        Args:
+            url: The page to get
+
+        Returns:
+            The body of the page, or None if it couldn't be fetched
+        """
+        async with self.semaphore:
+            try:
+                return await http_cache.get(self.session, url)
+            except (ClientError, TimeoutError) as e:
+                logger.warning(f"Could not fetch {url} ({e!r}).")
+                return None
+
+    async def get_pools(self) -> AsyncIterator[dict[str, str]]:
+        """Get all the pools listed on the City of Ottawa page
+
+        Yields:
+            A dict with the name and address of a pool
+
+        Raises:
+            ConnectionError: If a listing page couldn't be fetched, as the pools would be cut short
+        """
+        for first in range(0, MAX_LISTING_PAGES, self.concurrency):
+            pages = [
+                create_task(self.fetch(listings_url + "&page=" + str(i)))
+                for i in range(first, min(first + self.concurrency, MAX_LISTING_PAGES))
+            ]
+            try:
+                for i, page in enumerate(pages, first):
+                    body = await page
+                    if body is None:
+                        raise ConnectionError(f"Could not fetch listing page {i}.")
+                    soup = BeautifulSoup(body, "html.parser")
+                    pool_entries = soup.find("table", class_="table table-bordered table-condensed cols-2")
+
+                    if not pool_entries:  # Stop when we reach an empty page
+                        return
+
+                    tbody = pool_entries.find("tbody")
+                    for entry in tbody.find_all("tr") if tbody else []:
+                        values = entry.find_all("td")
+                        name = values[0].text
+                        address = values[1].text.split("\n")[0] + ", Ottawa, ON"
+                        yield {"name": name, "address": address}
+            finally:
+                for page in pages:
+                    page.cancel()
+
+    async def get_slots(self, pool: dict[str, str]) -> list[Slot]:
+        """Extract every slot of every day from a pool's schedule tables
+
+        The pool is geocoded while its page downloads. A page that couldn't be fetched falls back on its last
+        parsed tables, and a pool that couldn't be geocoded has no position.
+
+        Args:
+            pool: A dict yielded by get_pools
+
+        Returns:
+            The slots of each row of each table, for every weekday the table has a column for
+        """
+        slots = []
         name = pool["name"]
         url = (
             name.replace("-", "").replace("  ", " ").strip().lower().replace(" ", "-")
         )  # Catches all the cases I've found so far
 
-        async with ClientSession() as session:
-            async with session.get(facility_url + quote(url)) as response:
-                body = await response.text()
-
-        soup = BeautifulSoup(body, "html.parser")
-        tables = soup.find_all("table")
-        for table in tables:
-            caption = table.find("caption").text.strip().replace("–", "-")
-            rows = table.find("tbody").findAll("tr")
-            for row in rows:
-                entries = row.findAll("td")
-                header = row.find("th").text.lower()
-                if "public" in header and "swim" in header:
-                    if len(entries) == 7:
-                        entry = entries[WEEKDAYS.index(day)].text.strip().lower()
-                        subtimes = entry.split("\n")
-                        entry = []
-                        for subtime in subtimes:
-                            temp = subtime.strip()
-                            if len(temp) > 4:
-                                entry.append(temp)
-                        if entry and entry[0] != "n/a":
-                            name = pool["name"].split("-")[0].strip()
-                            name = name.replace("Recreation", "Rec")
-                            name = name.replace("and Pool", "")
-                            name = name.replace("and Wave Pool", "")
-                            slots.append(
-                                dict(
-                                    pool=name,
-                                    address=pool["address"],
-                                    latitude=pool["latitude"],
-                                    longitude=pool["longitude"],
-                                    desc=caption.split("-")[-1].strip(),
-                                    time=(" ,".join(entry)).replace(", ,", ", "),
-                                )
-                            )
-                    else:
-                        continue
-    return slots
-
+        url = facility_url + quote(url)
+        body, (latitude, longitude) = await gather(
+            self.fetch(url), geocodes.get_position(self.session, pool["address"])
+        )
 
-async def convert_time(time_stamp: str) -> struct_time:
-    """Convert the plethora of Ottawa webpage formats to a time
+        name = pool["name"].split("-")[0].strip()
+        name = name.replace("Recreation", "Rec")
+        name = name.replace("and Pool", "")
+        name = name.replace("and Wave Pool", "")
+        for table in schedules.get_tables(url, body):
+            desc = table["caption"].split("-")[-1].strip()
+            for row in table["rows"]:
+                days = get_weekday_columns(table.get("columns", []), len(row["cells"]))
+                for day, cell in zip(days, row["cells"]):
+                    if day is None:
+                        continue
+                    for start, stop in parse_time_ranges(cell.lower()):
+                        slots.append(
+                            Slot(
+                                pool=name,
+                                address=pool["address"],
+                                latitude=latitude,
+                                longitude=longitude,
+                                table=desc,
+                                activity=row["header"].strip(),
+                                weekday=day,
+                                start=start,
+                                stop=stop,
+                            )
+                        )
+        return slots
+
+    async def crawl(self) -> AsyncIterator[list[Slot]]:
+        """Stream the slots of every pool, starting each facility page as soon as its pool is listed
+
+        Yields:
+            The slots of one pool at a time, in the order their pages finish
+        """
+        schedules.load()
+        pending = set()
+        try:
+            async for pool in self.get_pools():
+                pending.add(create_task(self.get_slots(pool)))
+                finished = {task for task in pending if task.done()}
+                pending -= finished
+                for task in finished:
+                    yield task.result()
+            for completed in as_completed(pending):
+                yield await completed
+        finally:
+            for task in pending:
+                task.cancel()
+            schedules.save()
+
+
+def get_weekday_columns(columns: list[str], count: int) -> list[str | None]:
+    """Work out the weekday of each cell of a row
+
+    Cells line up with the last columns of the table (the first heading is over the row headers). Tables without
+    recognisable headings are assumed to run Monday to Sunday when a row has seven cells.
 
     Args:
-        time_stamp: A string containing a single time of day
+        columns: The table's column headings, e.g. ["Schedule", "Monday", ..., "Sunday"] or ["Activity", "Sat Mar 2"]
+        count: The number of cells in the row
 
     Returns:
-        A time struct of the value to be used for filtering and cleaner printing
+        The weekday (one of WEEKDAYS) of each cell, or None where the column isn't a day
     """
-    time_stamp = time_stamp.strip().lower().encode("ascii", "ignore").decode()
+    days = []
+    for column in columns[-count:] if count <= len(columns) else []:
+        column = column.strip().lower()
+        days.append(next((day for day in WEEKDAYS if column.startswith(day[:3].lower())), None))
+    if not any(days):
+        return list(WEEKDAYS) if count == len(WEEKDAYS) else [None] * count
+    return days
 
-    if ":" in time_stamp:
-        if "am" in time_stamp or "pm" in time_stamp:
-            return strptime(time_stamp, "%I:%M %p")
-        return strptime(time_stamp, "%H:%M")
-    if "am" in time_stamp or "pm" in time_stamp:
-        return strptime(time_stamp, "%I %p")
-    return strptime(time_stamp, "%H")
 
+async def get_weekly_schedule(session: ClientSession | None = None) -> WeeklySchedule:
+    """Crawl every pool once and build the week's schedule, which is also saved to the vault
 
-async def convert_time_ranges(time_range: str) -> AsyncIterator[tuple[struct_time, struct_time]]:
-    """_summary_
+    If the pools can't all be listed, the schedule saved by the last complete crawl is returned instead.
 
     Args:
-        time_range: A string containing the values in the Ottawa website tables
+        session: The session to crawl with, a new one if None
 
-    Yields:
-        A tuple of start and stop time structs
+    Returns:
+        The schedule of every pool, activity and day
+
+    Raises:
+        ConnectionError: If the pools can't all be listed and no crawl was ever saved
     """
-    for period in time_range.replace("–", "-").replace("noon", "12:00 pm").split(","):
-        if "pm" in period and not " pm" in period:
-            period = period.replace("pm", " pm")
-        if "am" in period and not " am" in period:
-            period = period.replace("am", " am")
+    if session is None:
+        async with ClientSession() as new_session:
+            return await get_weekly_schedule(new_session)
 
-        times = period.split("-")
-        times[0], times[1] = times[0].strip(), times[1].strip()
-        if times[1].endswith("m") and not times[0].endswith("m"):
-            times[0] = times[0] + " " + times[1][-2:]
-        yield await convert_time(times[0]), await convert_time(times[1])
+    file_path = Vault.get_vault_directory() / WEEKLY_SCHEDULE_FILE
+    slots = []
+    try:
+        async for pool_slots in PoolCrawler(session).crawl():
+            slots.extend(pool_slots)
+    except ConnectionError as e:
+        if not file_path.exists():
+            raise
+        logger.warning(f"Crawl aborted ({e}), keeping the last saved schedule.")
+        return WeeklySchedule.load(file_path)
+    schedule = WeeklySchedule(slots)
+    schedule.save(file_path)
+    return schedule
 
 
 async def get_lane_swims(
-    day: Literal["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"],
+    day: Weekday,
     location: str,
-    start: struct_time = strptime("00:00", "%H:%M"),
-    stop: struct_time = strptime("23:59", "%H:%M"),
+    start: struct_time = DAY_START,
+    stop: struct_time = DAY_STOP,
+    schedule: WeeklySchedule | None = None,
+    activity: str = "public swim",
+    session: ClientSession | None = None,
 ) -> AsyncIterator[str]:
-    """Create and return a series of tables to be used to display the data.
+    """Create and return the tables to be used to display the data.
 
-    Weird to make it an Iterator but here we are.
+    Weird to make it an Iterator but here we are. Tables are not split, see pack_code_blocks for that.
 
     Args:
         day: Day of the week
         location: The starting point from which to calculate pool distances from
         start: Start time if you don't want 12:00 AM
         stop: Stop time if you don't want 11:59 PM
+        schedule: A schedule from get_weekly_schedule, so several days can be asked of one crawl (crawls if None)
+        activity: Words the activities shown must contain
+        session: The session used to geocode the location (and crawl), a new one if None
 
     Yields:
-        First, a pool location table.  Then a series of tables describing the pool times.
+        First, a pool location table.  Then a table describing the pool times.
     """
-    geolocator = Nominatim(user_agent="pools_locator")
-    lat, long = get_position(geolocator, location)
-    pools = await get_pools(geolocator)
-    times = await get_times(pools, day)
-
-    entries = []
-    for time in times:
-        distance = geodesic((lat, long), (time["latitude"], time["longitude"])).km
-        entries.append(
-            [
-                time["pool"],
-                time["desc"],
-                distance,
-                time["address"].split(",")[0],
-                time["time"],
-            ]
-        )
-    entries = sorted(entries, key=lambda x: x[2], reverse=True)
+    if session is None:
+        async with ClientSession() as new_session:
+            async for table in get_lane_swims(day, location, start, stop, schedule, activity, new_session):
+                yield table
+        return
+
+    start_minute, stop_minute = start.tm_hour * 60 + start.tm_min, stop.tm_hour * 60 + stop.tm_min
+    origin = await geocodes.get_position(session, location)
+    if schedule is None:  # Not `or`, an empty schedule is still the one asked for
+        schedule = await get_weekly_schedule(session)
+
+    # Pools without a position first, then the furthest
+    entries = schedule.query(days=[day], activity=activity, origin=origin)[::-1]
 
     # Pool Locations
     headers = [
@@ -215,15 +379,10 @@ async def get_lane_swims(
         "Dist. (km)",
         "Address",
     ]
-    rows = []
-    for entry in entries:
-        pool = [
-            entry[0],
-            entry[2],
-            entry[3],
-        ]
-        if pool not in rows:
-            rows.append(pool)
+    pools: dict[tuple[str, str], list[Any]] = {}
+    for slot, distance in entries:
+        pools.setdefault((slot.pool, slot.address), [slot.pool, distance, slot.address.split(",")[0]])
+    rows = list(pools.values())
     rows.append(
         [
             "Starting Point",
@@ -243,23 +402,11 @@ async def get_lane_swims(
         "Table",
         "Time",
     ]
-    rows = []
-    for entry in entries:
-        async for time in convert_time_ranges(entry[4]):
-            if stop > time[0] and start < time[1]:
-                rows.append(
-                    [
-                        entry[0],
-                        entry[1],
-                        f"{time[0].tm_hour:02d}:{time[0].tm_min:02d}-{time[1].tm_hour:02d}:{time[1].tm_min:02d}",
-                    ]
-                )
-            if len(rows) == 25:
-                yield tabulate(
-                    rows,
-                    headers=headers,
-                )
-                rows = []
+    rows = [
+        [slot.pool, slot.table, f"{format_minutes(slot.start)}-{format_minutes(slot.stop)}"]
+        for slot, _ in entries
+        if slot.overlaps(start_minute, stop_minute)
+    ]
     if rows:
         yield tabulate(
             rows,
@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+from collections.abc import Iterable
+from typing import Any
+
+import numpy as np
+
+EARTH_RADIUS = 6371.0088  # km, the mean radius (haversine stays within ~0.5% of geodesic distances)
+
+
+def to_radians(points: Iterable[tuple[float | None, float | None]]) -> np.ndarray:
+    """Convert (latitude, longitude) pairs in degrees into an (N x 2) array in radians.
+
+    Args:
+        points: The pairs, either of which may be None if the place wasn't geocoded
+
+    Returns:
+        The array, with NaN for missing coordinates
+    """
+    coordinates = [(np.nan, np.nan) if None in point else point for point in points]
+    radians: np.ndarray = np.radians(np.array(coordinates, dtype=float).reshape(-1, 2))
+    return radians
+
+
+class PoolIndex:
+    """A spatial index of pools, with their coordinates held in NumPy arrays.
+
+    The distances from an origin to every pool are computed in one vectorised haversine call over the arrays,
+    so ranking the pools costs a single pass however many slots each of them has.
+    """
+
+    def __init__(self, pools: Iterable[dict[str, Any]]):
+        """Index the pools.
+
+        Args:
+            pools: Dicts with (at least) a latitude and a longitude, which may be None if the pool wasn't geocoded
+        """
+        self.pools = list(pools)
+        self.latitudes, self.longitudes = to_radians((pool["latitude"], pool["longitude"]) for pool in self.pools).T
+
+    def distances(self, origin: tuple[float, float]) -> np.ndarray:
+        """Compute the distance from an origin to every pool.
+
+        Args:
+            origin: The (latitude, longitude) of the origin, in degrees
+
+        Returns:
+            The distance in km to each pool, NaN where the pool has no coordinates
+        """
+        latitude, longitude = to_radians([origin])[0]
+        a = (
+            np.sin((self.latitudes - latitude) / 2) ** 2
+            + np.cos(latitude) * np.cos(self.latitudes) * np.sin((self.longitudes - longitude) / 2) ** 2
+        )
+        distances: np.ndarray = 2 * EARTH_RADIUS * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+        return distances
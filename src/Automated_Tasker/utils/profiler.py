@@ -0,0 +1,182 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import signal
+import sys
+import threading
+import time
+from collections import Counter
+from collections.abc import Coroutine
+from datetime import datetime
+from pathlib import Path
+from types import FrameType
+from typing import Any
+
+from Automated_Tasker.utils.vault import Vault
+
+logger = logging.getLogger(__name__)
+
+PROFILE_ENV = "TASKER_PROFILE"  # Comma separated task NAMEs to profile on every run, or * for every task
+SAMPLE_INTERVAL = 0.005  # seconds between samples
+KEEP_PROFILES = 50  # Profiles kept in the directory, the oldest are removed
+MAX_DEPTH = 64  # Frames followed down an await chain
+
+
+def _label(frame: FrameType) -> str:
+    return f"{frame.f_code.co_name} ({os.path.basename(frame.f_code.co_filename)}:{frame.f_lineno})".replace(";", ",")
+
+
+def awaited_stack(coro: Any) -> list[str]:
+    """Follow a suspended coroutine down to what it's waiting on, through coroutines, generators and Tasks.
+
+    Args:
+        coro: The outermost coroutine
+
+    Returns:
+        A label per frame of the chain, outermost first, ending with the awaited object's type if it isn't code
+    """
+    stack = []
+    for _ in range(MAX_DEPTH):
+        if isinstance(coro, asyncio.Task):
+            stack.append("[Task]")
+            coro = coro.get_coro()
+        frame = getattr(coro, "cr_frame", None) or getattr(coro, "gi_frame", None) or getattr(coro, "ag_frame", None)
+        if frame is None:
+            if coro is not None:
+                stack.append(f"[{type(coro).__name__}]")
+            break
+        stack.append(_label(frame))
+        coro = getattr(coro, "cr_await", None) or getattr(coro, "gi_yieldfrom", None) or getattr(coro, "ag_await", None)
+    return stack
+
+
+def running_stack(frame: FrameType | None, root: FrameType) -> list[str] | None:
+    """Get the part of a thread's stack from a coroutine's frame down to the innermost frame.
+
+    Args:
+        frame: The thread's innermost frame
+        root: The coroutine's frame
+
+    Returns:
+        A label per frame, outermost first, or None if the coroutine's frame isn't on the stack
+    """
+    stack = []
+    while frame is not None:
+        stack.append(_label(frame))
+        if frame is root:
+            return stack[::-1]
+        frame = frame.f_back
+    return None
+
+
+class TaskProfiler:
+    """An opt-in sampling profiler for single task runs, writing a collapsed stack file per run.
+
+    While a profiled task runs, a thread samples it every SAMPLE_INTERVAL. When the task's coroutine is executing,
+    the loop thread's stack is sampled under [cpu]; when it's suspended, the chain of coroutines it's awaiting is
+    sampled under [await] instead, so time spent waiting on the network shows up at the call that waits for it.
+    Files go in the vault's profiles directory and can be opened with speedscope or flamegraph.pl.
+
+    Tasks are profiled when named in the TASKER_PROFILE environment variable, and SIGUSR1 (where available)
+    profiles the next run of any task.
+    """
+
+    def __init__(self, directory_name: str = "profiles", interval: float = SAMPLE_INTERVAL, keep: int = KEEP_PROFILES):
+        self.directory_name = directory_name
+        self.interval = interval
+        self.keep = keep
+        self.tasks = {name.strip() for name in os.environ.get(PROFILE_ENV, "").split(",") if name.strip()}
+        self.armed = False
+
+    def install_signal(self) -> None:
+        """Profile the next task run whenever SIGUSR1 is received."""
+        if not hasattr(signal, "SIGUSR1"):
+            return
+        try:
+            asyncio.get_running_loop().add_signal_handler(signal.SIGUSR1, self.arm)
+        except (NotImplementedError, RuntimeError):
+            pass
+
+    def arm(self) -> None:
+        """Profile the next task run, whichever task it is."""
+        self.armed = True
+        logger.info("Profiling the next task run.")
+
+    def wants(self, name: str) -> bool:
+        """Check whether a task's run should be profiled.
+
+        Args:
+            name: The task's NAME
+
+        Returns:
+            True if it's configured, or the profiler was armed
+        """
+        return self.armed or "*" in self.tasks or name in self.tasks
+
+    async def profile(self, name: str, coro: Coroutine[Any, Any, Any]) -> Any:
+        """Run a coroutine (a task's execute) while sampling it.
+
+        Args:
+            name: The task's NAME, the root of every stack
+            coro: The coroutine to run
+
+        Returns:
+            Whatever the coroutine returns
+        """
+        self.armed = False
+        samples: Counter[str] = Counter()
+        done = threading.Event()
+        loop_thread = threading.get_ident()
+        sampler = threading.Thread(
+            target=self._sample, args=(name, coro, loop_thread, samples, done), name="task-profiler", daemon=True
+        )
+        start = time.perf_counter()
+        sampler.start()
+        try:
+            return await coro
+        finally:
+            done.set()
+            seconds = time.perf_counter() - start
+            await asyncio.to_thread(self._finish, sampler, name, samples, seconds)  # Joining and writing both block
+
+    def _finish(self, sampler: threading.Thread, name: str, samples: Counter[str], seconds: float) -> None:
+        sampler.join()
+        self._write(name, samples, seconds)
+
+    def _sample(self, name: str, coro: Any, loop_thread: int, samples: Counter[str], done: threading.Event) -> None:
+        while not done.wait(self.interval):
+            root = coro.cr_frame
+            if root is None:
+                continue
+            stack = None
+            if coro.cr_running:
+                stack = running_stack(sys._current_frames().get(loop_thread), root)
+                kind = "[cpu]"
+            if stack is None:  # Suspended (or it just yielded)
+                stack, kind = awaited_stack(coro), "[await]"
+            samples[";".join([name, kind, *stack])] += 1
+
+    def _write(self, name: str, samples: Counter[str], seconds: float) -> None:
+        directory = Vault.get_vault_directory() / self.directory_name
+        directory.mkdir(exist_ok=True)
+        file_path = directory / f"{datetime.now():%Y%m%d-%H%M%S-%f}-{name}.folded"  # Runs can end in the same second
+        with open(file_path, "w") as file:
+            file.writelines(f"{stack} {count}\n" for stack, count in samples.most_common())
+
+        total = sum(samples.values()) or 1
+        cpu = sum(count for stack, count in samples.items() if stack.startswith(f"{name};[cpu]"))
+        logger.info(
+            f"Profiled {name} for {seconds:.2f} seconds ({cpu / total:.0%} on the loop, {1 - cpu / total:.0%} awaiting)"
+            f", written to {file_path}."
+        )
+        self._rotate(directory)
+
+    def _rotate(self, directory: Path) -> None:
+        profiles = sorted(directory.glob("*.folded"), key=lambda path: (path.stat().st_mtime, path.name))
+        for path in profiles[: max(len(profiles) - self.keep, 0)]:
+            path.unlink(missing_ok=True)
+
+
+Profiler = TaskProfiler()
@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import sqlite3
+from typing import Any
+
+from Automated_Tasker.utils.vault import Vault
+
+logger = logging.getLogger(__name__)
+
+FLUSH_DELAY = 5  # seconds without a write before the pending ones are committed
+FLUSH_MAX_DELAY = 60  # seconds a write can wait at most, however often others keep arriving
+
+_MISSING = object()
+
+
+class StateStore:
+    """A small key-value store for subdaemons to resume where they left off, kept in SQLite (WAL mode) in the vault
+    directory.
+
+    Values are anything JSON can hold, scoped by the subdaemon's NAME. Reads come from memory, each scope being
+    loaded once. Writes are debounced: they are held in memory and committed together in one transaction once
+    FLUSH_DELAY passes without another, or FLUSH_MAX_DELAY after the first, and on close()."""
+
+    def __init__(
+        self, file_name: str = "state.sqlite3", delay: float = FLUSH_DELAY, max_delay: float = FLUSH_MAX_DELAY
+    ):
+        self.file_path = Vault.get_vault_directory() / file_name
+        self.delay = delay
+        self.max_delay = max_delay
+        self.values: dict[str, dict[str, Any]] = {}
+        self.pending: dict[tuple[str, str], str] = {}
+        self.flushes = 0
+        self._connection: sqlite3.Connection | None = None
+        self._timer: asyncio.TimerHandle | None = None
+        self._first_write: float | None = None
+
+    def get(self, scope: str, key: str, default: Any = None) -> Any:
+        """Get a value, as last set (whether it was committed yet or not).
+
+        Args:
+            scope: The subdaemon's NAME
+            key: The value's name
+            default: What to return if it was never set
+
+        Returns:
+            The value, or default
+        """
+        return self._scope(scope).get(key, default)
+
+    def set(self, scope: str, key: str, value: Any) -> None:
+        """Set a value, to be committed with the next batch.
+
+        Args:
+            scope: The subdaemon's NAME
+            key: The value's name
+            value: The value, must be JSON serialisable
+        """
+        values = self._scope(scope)
+        if values.get(key, _MISSING) == value:
+            return
+        values[key] = value
+        self.pending[(scope, key)] = json.dumps(value)
+        self._schedule()
+
+    def flush(self) -> None:
+        """Commit every pending write now, in one transaction.
+
+        Raises:
+            sqlite3.Error: If the commit failed, the writes are still pending for the next flush
+        """
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer, self._first_write = None, None
+        if not self.pending:
+            return
+        with self._connect() as connection:  # Rolled back if it raises
+            connection.executemany(
+                "INSERT INTO state (scope, key, value) VALUES (?, ?, ?) "
+                "ON CONFLICT (scope, key) DO UPDATE SET value = excluded.value",
+                [(scope, key, value) for (scope, key), value in self.pending.items()],
+            )
+        count, self.pending = len(self.pending), {}
+        self.flushes += 1
+        logger.debug(f"Committed {count} state values.")
+
+    def close(self) -> None:
+        """Commit what is pending and close the database."""
+        self.flush()
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def _schedule(self) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:  # Nothing to debounce on, commit right away
+            self.flush()
+            return
+        now = loop.time()
+        if self._first_write is None:
+            self._first_write = now
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = loop.call_at(min(now + self.delay, self._first_write + self.max_delay), self._flush_later)
+
+    def _flush_later(self) -> None:
+        try:
+            self.flush()
+        except sqlite3.Error as e:
+            logger.warning(f"Could not commit {len(self.pending)} state values ({e!r}), will retry.")
+            self._schedule()
+
+    def _scope(self, scope: str) -> dict[str, Any]:
+        if scope not in self.values:
+            rows = self._connect().execute("SELECT key, value FROM state WHERE scope = ?", (scope,))
+            self.values[scope] = {key: json.loads(value) for key, value in rows}
+        return self.values[scope]
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None:
+            self._connection = sqlite3.connect(self.file_path)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")  # Enough for WAL to survive a crash of the daemon
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS state (scope TEXT, key TEXT, value TEXT, PRIMARY KEY (scope, key))"
+            )
+        return self._connection
+
+
+state = StateStore()
@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import logging
+import re
+from functools import lru_cache
+
+logger = logging.getLogger(__name__)
+
+# A time of day as the City of Ottawa writes them: "9", "9:30", "9.30", "9 am", "9:30 p.m.", "noon", ...
+_TIME = r"(noon|midnight|(?<!\d)(\d{1,2})(?:[:.h](\d{2}))?(?!\d)\s*(?:([ap])\.?\s*m\b\.?)?)"
+PERIOD = re.compile(rf"{_TIME}\s*(?:-|to)\s*{_TIME}")
+# A time outside of a range, one that can't be a note: with am/pm or minutes, or a word
+LONE_TIME = re.compile(r"noon|midnight|(?<!\d)\d{1,2}(?:(?:[:.h]\d{2})?\s*[ap]\.?\s*m\b|:\d{2}(?!\d))")
+_DASHES = str.maketrans({"–": "-", "—": "-", "‑": "-", "\xa0": " "})
+
+DAY_MINUTES = 24 * 60
+
+
+def _to_minutes(hour: int, minute: int, meridiem: str | None) -> int:
+    if meridiem:
+        hour = hour % 12 + (12 if meridiem == "p" else 0)
+    return hour * 60 + minute
+
+
+def _split(groups: tuple[str | None, ...]) -> tuple[int, int, str | None] | None:
+    word, hour_text, minute_text, meridiem = groups
+    if word is None:
+        return None
+    if word == "noon":
+        return 12, 0, "p"
+    if word == "midnight":
+        return 12, 0, "a"
+    hour, minute = int(hour_text or 0), int(minute_text or 0)  # The word was the whole time, so there's an hour
+    if hour > 24 or minute > 59:  # Not a time, e.g. a pool length
+        return None
+    return hour, minute, meridiem
+
+
+@lru_cache(maxsize=4096)
+def parse_time_ranges(text: str) -> tuple[tuple[int, int], ...]:
+    """Parse the free-form times of an Ottawa schedule cell in a single regex pass.
+
+    Each period is a range ("9 - 10:30 am", "noon to 1 pm"). Numbers outside of one are notes, not times ("lane 6
+    closed", "(2 lanes)", "closed Mar 10"), and zero length ranges are dropped. A lone time ("9 am", "from noon")
+    has no stop to make a period of, it is dropped too but logged as a warning, being a schedule we can't read. A range's start takes its end's
+    am/pm when it has none, unless that would put it after the end ("11 - 1 pm"). Times with no am/pm anywhere
+    are read as 24 hour times, and "midnight" ends a day at 1440.
+
+    Args:
+        text: The cell text, with periods separated by commas (or anything else that isn't a time)
+
+    Returns:
+        The (start, stop) minute of day of every period, in order
+    """
+    periods = []
+    text = text.lower().translate(_DASHES)
+    if LONE_TIME.search(PERIOD.sub(" ", text)):
+        logger.warning(f"Dropping a time that isn't part of a range in {text!r}.")
+    for match in PERIOD.finditer(text):
+        start, stop = _split(match.groups()[:4]), _split(match.groups()[4:])
+        if start is None or stop is None:
+            continue
+
+        stop_minutes = _to_minutes(*stop)
+        if match.group(5) == "midnight" or (stop_minutes == 0 and stop[2] == "a" and stop[0] == 12):
+            stop_minutes = DAY_MINUTES
+        if start[2] or not stop[2]:
+            start_minutes = _to_minutes(*start)
+        else:
+            start_minutes = _to_minutes(start[0], start[1], stop[2])
+            if start_minutes > stop_minutes:
+                start_minutes = _to_minutes(start[0], start[1], "a" if stop[2] == "p" else "p")
+        if start_minutes != stop_minutes:
+            periods.append((start_minutes, stop_minutes))
+    return tuple(periods)
+
+
+def format_minutes(minutes: int) -> str:
+    """Format a minute of day as HH:MM.
+
+    Args:
+        minutes: The minute of day
+
+    Returns:
+        The 24 hour time
+    """
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
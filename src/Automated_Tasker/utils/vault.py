@@ -1,19 +1,21 @@
-from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
-from cryptography.hazmat.primitives import hashes
-from cryptography.hazmat.primitives.ciphers.aead import AESGCM
-from cryptography.hazmat.backends import default_backend
 import base64
 import json
-from pathlib import Path
 import random
 from getpass import getpass
+from pathlib import Path
+
+from cryptography.hazmat.backends import default_backend
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 
 vault_password = getpass("Vault password: ")
 
+
 class Vault:
     """A class for storing various sensitive pieces of data encrypted with a provided password."""
 
-    def __init__(self, file_name="entries.json"):
+    def __init__(self, file_name: str = "entries.json") -> None:
         self.password = vault_password
         self.file_path = self.get_vault_directory() / file_name
 
@@ -55,14 +57,14 @@ class Vault:
         """
         return bytes([random.randint(0, 255) for _ in range(size)])
 
-    def encrypt_data(self, data: bytes) -> bytes:
+    def encrypt_data(self, data: str) -> str:
         """The actual encryption function using AESGCM.
 
         Parameters:
-            data (bytes): The plaintext entry
+            data (str): The plaintext entry
 
         Returns:
-            bytes: The ciphertext entry
+            str: The ciphertext entry, base64 encoded
         """
         salt = self.generate_random_bytes(16)
         key = self.derive_key(self.password, salt)
@@ -71,19 +73,19 @@ class Vault:
         encrypted_data = aesgcm.encrypt(nonce, data.encode(), None)
         return base64.b64encode(salt + nonce + encrypted_data).decode()
 
-    def decrypt_data(self, encrypted_data: bytes) -> bytes:
+    def decrypt_data(self, encrypted_data: str) -> str:
         """The actual decryption function using AESGCM.
 
         Parameters:
-            encrypted_data (bytes): The ciphertext entry
+            encrypted_data (str): The ciphertext entry, base64 encoded
 
         Returns:
-            bytes: The plaintext entry
+            str: The plaintext entry
         """
-        encrypted_data = base64.b64decode(encrypted_data)
-        salt = encrypted_data[:16]
-        nonce = encrypted_data[16:28]
-        ciphertext = encrypted_data[28:]
+        decoded = base64.b64decode(encrypted_data)
+        salt = decoded[:16]
+        nonce = decoded[16:28]
+        ciphertext = decoded[28:]
         key = self.derive_key(self.password, salt)
         aesgcm = AESGCM(key)
         return aesgcm.decrypt(nonce, ciphertext, None).decode()
@@ -124,11 +126,11 @@ class Vault:
         with open(self.file_path, "w") as file:
             json.dump(entries, file)
 
-    def load_entries(self) -> dict[str, bytes]:
+    def load_entries(self) -> dict[str, str]:
         """Load (and decrypt) all the entries in the vault.
 
         Returns:
-            dict[str,bytes]: A dict mapping tags to entries
+            dict[str, str]: A dict mapping tags to entries
         """
         try:
             with open(self.file_path, "r") as file:
@@ -143,8 +145,9 @@ class Vault:
                 decrypted_entries[tag] = decrypted_entry
             except Exception as e:
                 print(f"Error decrypting entry for tag '{tag}': {e}")
-                raise e
+                raise
 
         return decrypted_entries
 
-vault = Vault()
\ No newline at end of file
+
+vault = Vault()
@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+from collections.abc import Callable
+from dataclasses import dataclass
+from html.parser import HTMLParser
+
+FORECAST_CLASS = "textforecast"  # The class of weather.gc.ca's forecast table
+FEED_SIZE = 1024  # Characters given to HTMLParser.feed at once, so parsing stops soon after the table ends
+
+
+@dataclass(frozen=True)
+class ForecastPeriod:
+    """A single row of the weather.gc.ca text forecast."""
+
+    period: str  # e.g. "Tonight", "Sat", "Sat night"
+    summary: str
+
+
+class ForecastParser(HTMLParser):
+    """An incremental parser that only collects the rows of the text forecast table.
+
+    Everything before the table is skipped without building any tree, and the parser reports itself done
+    when the table closes (or once a row matching `until` is read), so the rest of the page is never fed.
+
+    Cell text follows BeautifulSoup's get_text(strip=True): each text node is stripped, then joined."""
+
+    def __init__(self, until: Callable[[ForecastPeriod], bool] | None = None):
+        super().__init__()
+        self.until = until
+        self.periods: list[ForecastPeriod] = []
+        self.done = False
+        self._depth = 0  # Table nesting depth inside the forecast table
+        self._row: list[str] | None = None
+        self._cell: list[str] | None = None
+        self._text: list[str] = []
+
+    def handle_starttag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
+        if self.done:
+            return
+        self._end_text()
+        if tag == "table":
+            if self._depth or FORECAST_CLASS in (dict(attrs).get("class") or "").split():
+                self._depth += 1
+        elif not self._depth:
+            return
+        elif tag == "tr":
+            self._row = []
+        elif tag == "td" and self._row is not None:
+            self._cell = []
+
+    def handle_endtag(self, tag: str) -> None:
+        if self.done or not self._depth:
+            return
+        self._end_text()
+        if tag == "td" and self._cell is not None and self._row is not None:
+            self._row.append("".join(self._cell))
+            self._cell = None
+        elif tag == "tr" and self._row is not None:
+            self._end_row()
+        elif tag == "table":
+            self._depth -= 1
+            if not self._depth:
+                self.done = True
+
+    def handle_data(self, data: str) -> None:
+        if self._cell is not None and not self.done:
+            self._text.append(data)  # A text node can arrive in pieces when split across feeds
+
+    def _end_text(self) -> None:
+        if self._cell is not None:
+            text = "".join(self._text).strip()
+            if text:
+                self._cell.append(text)
+        self._text = []
+
+    def _end_row(self) -> None:
+        row, self._row = self._row, None
+        if row is None or len(row) < 2:
+            return
+        period = ForecastPeriod(period=row[0], summary=row[1])
+        self.periods.append(period)
+        if self.until and self.until(period):
+            self.done = True
+
+
+def extract_forecast(
+    page: str, until: Callable[[ForecastPeriod], bool] | None = None, feed_size: int = FEED_SIZE
+) -> list[ForecastPeriod]:
+    """Parse the forecast table out of a weather.gc.ca page, stopping as soon as it has what it needs.
+
+    The page is only searched (not parsed) for the forecast table's class, parsing starts at the <table> tag
+    holding it, and the rest is fed feed_size characters at a time until the table closes. The page itself is
+    already in memory (it comes through the HTTP cache), what this saves is parsing the rest of it.
+
+    Args:
+        page: The page
+        until: Stop after the first period this returns True for, instead of at the end of the table
+        feed_size: The characters given to the parser at once
+
+    Returns:
+        The forecast periods read, empty if the page has no forecast table
+    """
+    marker = page.find(FORECAST_CLASS)
+    if marker < 0:
+        return []
+    parser = ForecastParser(until)
+    for i in range(max(page.rfind("<table", 0, marker), 0), len(page), feed_size):
+        parser.feed(page[i : i + feed_size])
+        if parser.done:
+            return parser.periods
+    parser.close()
+    return parser.periods
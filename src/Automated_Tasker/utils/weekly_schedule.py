@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+import json
+from collections.abc import Iterable
+from dataclasses import asdict, dataclass
+from math import inf, isnan, nan
+from pathlib import Path
+from typing import Any
+
+from Automated_Tasker.tasklist import WEEKDAYS
+from Automated_Tasker.utils.pool_index import PoolIndex
+from Automated_Tasker.utils.time_ranges import DAY_MINUTES
+
+
+@dataclass(frozen=True)
+class Slot:
+    """One period of one activity at one pool, on one weekday."""
+
+    pool: str
+    address: str
+    latitude: float | None
+    longitude: float | None
+    table: str  # The schedule table it's from, e.g. "Lane swim" or "Leisure pool"
+    activity: str  # The row of the table, e.g. "Public swim"
+    weekday: str  # One of WEEKDAYS
+    start: int  # Minute of day
+    stop: int
+
+    def overlaps(self, start: int, stop: int) -> bool:
+        """Check whether the slot overlaps a window of the day
+
+        Args:
+            start: The first minute of the window
+            stop: The last minute of the window
+
+        Returns:
+            True if any part of the slot falls in the window
+        """
+        return stop > self.start and start < self.stop
+
+
+class WeeklySchedule:
+    """Every slot of every pool for a week, as produced by a single crawl.
+
+    The schedule is plain data (it round trips through JSON), and any day, time window, activity or location
+    can be asked of it without going back to the city's site.
+    """
+
+    def __init__(self, slots: Iterable[Slot]):
+        """Hold the slots, ordered by pool so the schedule doesn't depend on the order pages were crawled in.
+
+        Args:
+            slots: The slots, in the order of the tables on each pool's page
+        """
+        self.slots = sorted(slots, key=lambda slot: (slot.pool, slot.address))
+        self._index: PoolIndex | None = None
+        self._pool_ids: dict[tuple[str, str], int] = {}
+
+    def __len__(self) -> int:
+        return len(self.slots)
+
+    def pools(self) -> list[dict[str, Any]]:
+        """Get the pools in the schedule
+
+        Returns:
+            A dict with the name, address, latitude and longitude of each pool
+        """
+        pools: dict[tuple[str, str], dict[str, Any]] = {}
+        for slot in self.slots:
+            pools.setdefault(
+                (slot.pool, slot.address),
+                {"pool": slot.pool, "address": slot.address, "latitude": slot.latitude, "longitude": slot.longitude},
+            )
+        return list(pools.values())
+
+    def query(
+        self,
+        days: Iterable[str] | None = None,
+        start: int = 0,
+        stop: int = DAY_MINUTES,
+        activity: str | None = None,
+        origin: tuple[float | None, float | None] | None = None,
+        radius: float = inf,
+    ) -> list[tuple[Slot, float]]:
+        """Find the slots matching every filter given
+
+        Args:
+            days: The weekdays to include, all of them if None
+            start: The first minute of the window of the day the slots must overlap
+            stop: The last minute of that window
+            activity: Words that must all appear in the slot's activity (e.g. "public swim"), case-insensitively
+            origin: A (latitude, longitude) to measure distances from and sort by, closest first
+            radius: The maximum distance in km from the origin, pools without a position are always kept
+
+        Returns:
+            The (slot, distance in km) pairs, with a NaN distance when there is no origin or position
+        """
+        days = set(days) if days is not None else set(WEEKDAYS)
+        words = activity.lower().split() if activity else []
+        matches = [
+            slot
+            for slot in self.slots
+            if slot.weekday in days
+            and slot.overlaps(start, stop)
+            and all(word in slot.activity.lower() for word in words)
+        ]
+
+        latitude, longitude = origin or (None, None)
+        if latitude is None or longitude is None:
+            return [(slot, nan) for slot in matches]
+
+        distances = self._pool_distances((latitude, longitude))
+        results = [(slot, distances[self._pool_ids[(slot.pool, slot.address)]]) for slot in matches]
+        results = [result for result in results if isnan(result[1]) or result[1] <= radius]
+        return sorted(results, key=lambda result: (isnan(result[1]), result[1]))
+
+    def _pool_distances(self, origin: tuple[float, float]) -> list[float]:
+        if self._index is None:
+            pools = self.pools()
+            self._pool_ids = {(pool["pool"], pool["address"]): i for i, pool in enumerate(pools)}
+            self._index = PoolIndex(pools)
+        distances: list[float] = self._index.distances(origin).tolist()
+        return distances
+
+    def to_dict(self) -> dict[str, Any]:
+        """Get the schedule as JSON-serialisable data
+
+        Returns:
+            The slots, as dicts
+        """
+        return {"slots": [asdict(slot) for slot in self.slots]}
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> WeeklySchedule:
+        """Rebuild a schedule from the output of to_dict
+
+        Args:
+            data: The serialised schedule
+
+        Returns:
+            The schedule
+        """
+        return cls(Slot(**slot) for slot in data["slots"])
+
+    def save(self, file_path: Path) -> None:
+        """Write the schedule to a JSON file
+
+        Args:
+            file_path: Where to write it
+        """
+        with open(file_path, "w") as file:
+            json.dump(self.to_dict(), file)
+
+    @classmethod
+    def load(cls, file_path: Path) -> WeeklySchedule:
+        """Read a schedule written by save
+
+        Args:
+            file_path: Where it was written
+
+        Returns:
+            The schedule
+        """
+        with open(file_path, "r") as file:
+            return cls.from_dict(json.load(file))
@@ -0,0 +1,44 @@
+"""The tests run in a throwaway home directory, as the vault, caches and stores are created there on import.
+
+This has to happen before Automated_Tasker is imported, which unittest discovery guarantees by importing this
+package first.
+"""
+
+from __future__ import annotations
+
+import getpass
+import os
+import tempfile
+import time
+from collections.abc import Awaitable, Callable
+from datetime import datetime
+from typing import TypeVar
+
+HOME = tempfile.mkdtemp(prefix="tasker-tests-")
+os.environ["HOME"] = HOME
+os.environ["TZ"] = "America/Toronto"  # Tasks read naive times as local ones, so the host runs on LOCAL_TIMEZONE
+if hasattr(time, "tzset"):
+    time.tzset()
+getpass.getpass = lambda prompt="": "tests"
+
+T = TypeVar("T")
+
+
+def run_virtual(test: Callable[[], Awaitable[T]], start: datetime) -> T:
+    """Run a coroutine on virtual time, so sleeps and timeouts take no time at all.
+
+    Args:
+        test: The coroutine function to run
+        start: The (timezone aware) time the run starts at
+
+    Returns:
+        What the coroutine returned
+    """
+    from Automated_Tasker.utils import clock
+
+    loop = clock.VirtualTimeLoop()
+    try:
+        with clock.use_clock(clock.VirtualClock(loop, start)):
+            return loop.run_until_complete(test())
+    finally:
+        loop.close()
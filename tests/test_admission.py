@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import asyncio
+import unittest
+from datetime import UTC, datetime
+
+from Automated_Tasker.admission import PRIORITY_BULK, PRIORITY_CRITICAL, PRIORITY_NORMAL, AdmissionController
+from tests import run_virtual
+
+START = datetime(2026, 3, 9, 8, 30, tzinfo=UTC)
+
+
+def task(name: str, priority: int = PRIORITY_NORMAL, *resources: str) -> type:
+    return type(name, (), {"NAME": name, "PRIORITY": priority, "RESOURCES": list(resources)})
+
+
+async def run_all(admission: AdmissionController, tasks: list[tuple[type, float]]) -> list[tuple[str, float]]:
+    """Submit every task at once, each taking its seconds, and return when each one started."""
+    loop = asyncio.get_running_loop()
+    started: list[tuple[str, float]] = []
+
+    def runner(task: type, seconds: float):
+        async def run() -> None:
+            started.append((task.NAME, loop.time()))
+            await asyncio.sleep(seconds)
+
+        return run
+
+    for submitted, seconds in tasks:
+        admission.submit(submitted, runner(submitted, seconds))
+    await asyncio.wait(admission.tasks)
+    return started
+
+
+class TestAdmissionController(unittest.TestCase):
+    def test_most_urgent_first(self):
+        async def test():
+            admission = AdmissionController(limits={}, max_running=1, reserve=0)
+            tasks = [(task("Crawl", PRIORITY_BULK), 10), (task("ToDo"), 10), (task("Alarm", PRIORITY_CRITICAL), 10)]
+            tasks += [(task("Weather"), 10)]
+            return await run_all(admission, tasks)
+
+        # Crawl was admitted before the others were submitted, then urgency, then the order they became due
+        self.assertEqual(run_virtual(test, START), [("Crawl", 0), ("Alarm", 10), ("ToDo", 20), ("Weather", 30)])
+
+    def test_resource_limits(self):
+        async def test():
+            admission = AdmissionController(limits={"switchbot": 1, "cpu": 1}, max_running=4, reserve=0)
+            tasks = [
+                (task("Alarm", PRIORITY_NORMAL, "switchbot"), 10),
+                (task("Curtain", PRIORITY_NORMAL, "switchbot"), 10),
+                (task("Weather", PRIORITY_NORMAL, "cpu"), 5),
+                (task("Crawl", PRIORITY_NORMAL, "cpu"), 5),
+            ]
+            return await run_all(admission, tasks)
+
+        self.assertEqual(
+            sorted(run_virtual(test, START), key=lambda run: run[1]),
+            [("Alarm", 0), ("Weather", 0), ("Crawl", 5), ("Curtain", 10)],
+        )
+
+    def test_blocked_tasks_hold_back_less_urgent_ones(self):
+        async def test():
+            admission = AdmissionController(limits={"google": 1}, max_running=4, reserve=0)
+            tasks = [
+                (task("Calendar", PRIORITY_NORMAL, "google"), 10),
+                (task("Traffic", PRIORITY_NORMAL, "google"), 10),
+                (task("Crawl", PRIORITY_BULK, "google", "cpu"), 10),
+                (task("Game", PRIORITY_BULK, "cpu"), 10),
+                (task("Digest", PRIORITY_BULK, "discord"), 10),
+            ]
+            return await run_all(admission, tasks)
+
+        # Crawl waits behind Traffic for google, and the cpu it needs is held for it meanwhile, so Game can't take it
+        self.assertEqual(
+            sorted(run_virtual(test, START), key=lambda run: run[1]),
+            [("Calendar", 0), ("Digest", 0), ("Traffic", 10), ("Crawl", 20), ("Game", 20)],
+        )
+
+    def test_critical_reserve(self):
+        async def test():
+            admission = AdmissionController(limits={}, max_running=2, reserve=1)
+            tasks = [(task(f"Bulk{i}", PRIORITY_BULK), 10) for i in range(3)]
+            tasks += [(task("Alarm", PRIORITY_CRITICAL), 10), (task("Crawl", PRIORITY_BULK), 10)]
+            return await run_all(admission, tasks)
+
+        # Only one slot for the rest, the other is kept for the alarm
+        self.assertEqual(
+            run_virtual(test, START),
+            [("Bulk0", 0), ("Alarm", 0), ("Bulk1", 10), ("Bulk2", 20), ("Crawl", 30)],
+        )
+
+    def test_stop_releases_running_and_waiting_tasks(self):
+        async def test():
+            admission = AdmissionController(limits={"google": 1}, max_running=1, reserve=0)
+            admission.submit(task("Long", PRIORITY_NORMAL, "google"), lambda: asyncio.sleep(3600))
+            admission.submit(task("Short", PRIORITY_NORMAL, "google"), lambda: asyncio.sleep(1))
+            await asyncio.sleep(1)
+            waiting = [waiting.name for waiting in admission.waiting]
+            await admission.stop()
+            return waiting, admission.running, admission.waiting, +admission.in_use, admission.tasks
+
+        self.assertEqual(run_virtual(test, START), (["Short"], 0, [], {}, set()))
+
+
+if __name__ == "__main__":
+    unittest.main()
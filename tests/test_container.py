@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import unittest
+from datetime import UTC, datetime
+
+from aiohttp import ClientSession
+
+from Automated_Tasker.services.container import DISCORD_TOKEN, ServiceContainer, register_default_services
+from Automated_Tasker.utils.vault import vault
+from tests import run_virtual
+
+START = datetime(2026, 3, 10, 4, 59, tzinfo=UTC)
+
+
+class Client:
+    def __init__(self):
+        self.closed = False
+
+    def close(self) -> None:
+        self.closed = True
+
+
+async def build(_: ServiceContainer) -> Client:
+    return Client()
+
+
+class TestServiceContainer(unittest.TestCase):
+    def test_new_day_keeps_clients_not_recycled(self):
+        async def test():
+            services = ServiceContainer(vault)
+            services.register(
+                "session", build, healthy=lambda client: not client.closed, close=Client.close, recycle=False
+            )
+            services.register("calendar", build, close=Client.close)
+            session, calendar = await services.get("session"), await services.get("calendar")
+            await services.new_day()
+            kept = session is await services.get("session") and not session.closed
+            rebuilt = calendar.closed and calendar is not await services.get("calendar")
+            await services.close()
+            return kept, rebuilt, session.closed
+
+        self.assertEqual(run_virtual(test, START), (True, True, True))
+
+    def test_notification_clients_are_closed_with_the_container(self):
+        vault.store_entry("pushbullet-key", "o.tests")
+        vault.store_entry(DISCORD_TOKEN, "tests.discord.token")
+
+        async def test():
+            services = register_default_services(ServiceContainer(vault))
+            pushbullet, discord = await services.get("pushbullet"), await services.get("discord")
+            pushbullet.session, discord.session = ClientSession(), ClientSession()  # As their first request would
+            sessions = pushbullet.session, discord.session
+            await services.new_day()
+            kept = pushbullet is await services.get("pushbullet") and discord is await services.get("discord")
+            await services.close()
+            return pushbullet.api_key, discord.bot_token, kept, [session.closed for session in sessions]
+
+        self.assertEqual(run_virtual(test, START), ("o.tests", "tests.discord.token", True, [True, True]))
+
+
+if __name__ == "__main__":
+    unittest.main()
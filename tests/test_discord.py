@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import asyncio
+import unittest
+from datetime import UTC, datetime
+from typing import Any, Self
+
+from tabulate import tabulate
+
+from Automated_Tasker.services import discord
+from Automated_Tasker.services.discord import MESSAGE_LIMIT, TEXT_CHANNEL, DiscordREST, pack_code_blocks
+from tests import run_virtual
+
+START = datetime(2026, 3, 10, 20, 0, tzinfo=UTC)
+GUILDS = [{"id": "100", "name": "Swim Club"}]
+CHANNELS = [{"id": "101", "name": "general", "type": TEXT_CHANNEL}, {"id": "102", "name": "voice", "type": 2}]
+MOVED = [{"id": "103", "name": "general", "type": TEXT_CHANNEL}]
+HEADER = ["Pool".ljust(99), "-" * 99]  # 100 characters a line, with its newline
+
+
+class FakeResponse:
+    def __init__(self, status: int, body: Any = None, headers: dict[str, str] | None = None):
+        self.status, self.ok, self.body, self.headers = status, status < 400, body, headers or {}
+
+    async def __aenter__(self) -> Self:
+        return self
+
+    async def __aexit__(self, *_: object) -> None:
+        pass
+
+    async def json(self) -> Any:
+        return self.body
+
+
+class FakeSession:
+    """Answers each route ("GET guilds/100/channels") with the next of its responses, keeping when each was asked."""
+
+    closed = False
+
+    def __init__(self, routes: dict[str, list[FakeResponse]]):
+        self.routes = routes
+        self.requests: list[tuple[str, float]] = []
+
+    def request(self, method: str, url: str, **_: Any) -> FakeResponse:
+        route = f"{method} {url.removeprefix(discord.URL)}"
+        self.requests.append((route, asyncio.get_running_loop().time()))
+        return self.routes[route].pop(0)
+
+
+class TestPackCodeBlocks(unittest.TestCase):
+    def test_messages_fill_to_the_limit(self):
+        rows = ["x" * 99] * 17 + ["y" * 92]  # 2000 characters with the fences
+        self.assertEqual([len(message) for message in pack_code_blocks(["\n".join(HEADER + rows)])], [2000])
+
+        rows[-1] += "y"
+        messages = pack_code_blocks(["\n".join(HEADER + rows)])
+        self.assertEqual([len(message) for message in messages], [1907, 7 + 200 + 94])
+        self.assertEqual(messages[1], "```\n" + "\n".join(HEADER + rows[-1:]) + "\n```")
+
+    def test_tables_share_messages(self):
+        first, second = "\n".join(HEADER + ["x" * 99] * 8), "\n".join(HEADER + ["y" * 99] * 7 + ["y" * 91])
+        messages = pack_code_blocks([first, second])  # A blank line between them, 2000 characters
+        self.assertEqual(messages, ["```\n" + first + "\n\n" + second + "\n```"])
+        self.assertEqual(len(pack_code_blocks([first, second + "y"])), 2)
+
+    def test_rows_longer_than_a_message(self):
+        table = tabulate([["Example Rec Complex", "Swim " * 1000], ["Other Pool", "Swim"]], headers=["Pool", "Notes"])
+        width = (MESSAGE_LIMIT - 7) // 3 - 1  # Room for the header and one row
+        cut = "\n".join(line if len(line) <= width else line[: width - 1] + "…" for line in table.splitlines())
+        self.assertEqual(pack_code_blocks([table, table]), [f"```\n{cut}\n```"] * 2)
+        self.assertEqual([len(line) for line in cut.splitlines()[1:3]], [width, width])
+
+
+class TestDiscordREST(unittest.TestCase):
+    def run_client(self, routes: dict[str, list[FakeResponse]], test: Any) -> tuple[Any, list[tuple[str, float]]]:
+        """Run test(client) with the client on a fake session, returning its result and the requests made."""
+        session = FakeSession(routes)
+
+        async def run() -> tuple[Any, list[tuple[str, float]]]:
+            client = DiscordREST("token")
+            client.session = session  # type: ignore[assignment]
+            start = asyncio.get_running_loop().time()
+            result = await test(client)
+            return result, [(route, at - start) for route, at in session.requests]
+
+        return run_virtual(run, START)
+
+    def test_too_many_requests_are_retried_after(self):
+        routes = {"POST channels/101/messages": [FakeResponse(429, {"retry_after": 2.5}), FakeResponse(200, {})]}
+        result, requests = self.run_client(routes, lambda client: client.request("POST", "channels/101/messages"))
+        self.assertEqual(result, {})
+        self.assertEqual(requests, [("POST channels/101/messages", 0), ("POST channels/101/messages", 2.5)])
+
+    def test_exhausted_buckets_are_waited_out(self):
+        exhausted = {"X-RateLimit-Remaining": "0", "X-RateLimit-Reset-After": "3"}
+        routes = {
+            "POST channels/101/messages": [FakeResponse(200, {}, exhausted), FakeResponse(200, {})],
+            "POST channels/102/messages": [FakeResponse(200, {})],
+        }
+
+        async def test(client: DiscordREST) -> None:
+            await client.request("POST", "channels/101/messages")
+            await client.request("POST", "channels/102/messages")  # Another bucket, not held
+            await client.request("POST", "channels/101/messages")
+
+        _, requests = self.run_client(routes, test)
+        self.assertEqual([at for _, at in requests], [0, 0, 3])
+
+    def test_missing_resources(self):
+        for status, error in ((403, LookupError), (404, LookupError), (500, ConnectionError)):
+            with self.subTest(status=status), self.assertRaises(error):
+                self.run_client(
+                    {"GET messages": [FakeResponse(status)]}, lambda client: client.request("GET", "messages")
+                )
+
+    def test_channel_index_is_built_once(self):
+        routes = {
+            "GET users/@me/guilds": [FakeResponse(200, GUILDS), FakeResponse(200, GUILDS)],
+            "GET guilds/100/channels": [FakeResponse(200, CHANNELS), FakeResponse(200, CHANNELS)],
+        }
+
+        async def test(client: DiscordREST) -> list[int | None]:
+            looked_up = await asyncio.gather(*(client.get_channel_id("Swim Club", "general") for _ in range(3)))
+            return looked_up + [await client.get_channel_id("Swim Club", "voice")]  # Not a text channel, rebuilds
+
+        ids, requests = self.run_client(routes, test)
+        self.assertEqual(ids, [101, 101, 101, None])
+        self.assertEqual(len(requests), 4)
+
+    def test_stale_channels_are_looked_up_again(self):
+        routes = {
+            "GET users/@me/guilds": [FakeResponse(200, GUILDS), FakeResponse(200, GUILDS)],
+            "GET guilds/100/channels": [FakeResponse(200, CHANNELS), FakeResponse(200, MOVED)],
+            "POST channels/101/messages": [FakeResponse(200, {}), FakeResponse(404)],
+            "POST channels/103/messages": [FakeResponse(200, {})],
+        }
+
+        async def test(client: DiscordREST) -> None:
+            await client.post_message("Swim Club", "general", "Before")
+            await client.post_message("Swim Club", "general", "After it was recreated")
+
+        _, requests = self.run_client(routes, test)
+        self.assertEqual(
+            [route for route, _ in requests],
+            [
+                "GET users/@me/guilds",
+                "GET guilds/100/channels",
+                "POST channels/101/messages",
+                "POST channels/101/messages",
+                "GET users/@me/guilds",
+                "GET guilds/100/channels",
+                "POST channels/103/messages",
+            ],
+        )
+
+    def test_unknown_channels(self):
+        routes = {
+            "GET users/@me/guilds": [FakeResponse(200, GUILDS)],
+            "GET guilds/100/channels": [FakeResponse(200, [])],
+        }
+        with self.assertRaises(LookupError):
+            self.run_client(routes, lambda client: client.post_message("Swim Club", "general", "Nobody home"))
+
+
+if __name__ == "__main__":
+    unittest.main()
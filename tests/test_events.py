@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+import asyncio
+import collections
+import unittest
+from datetime import UTC, datetime
+from typing import Any, ClassVar
+from unittest import mock
+
+from Automated_Tasker.events import PUBLISH_TIMEOUT, DeviceStateChanged, EventBus, Trigger
+from Automated_Tasker.tasklist import TaskRegistry
+from Automated_Tasker.tasks.litter_box import LitterBoxCleaned
+from tests import run_virtual
+
+START = datetime(2026, 3, 9, 9, 30, tzinfo=UTC)
+
+
+def change(value: Any, device: str = "Litterbox Position") -> DeviceStateChanged:
+    return DeviceStateChanged(device=device, key="openState", value=value)
+
+
+async def publish_at(bus: EventBus, schedule: list[tuple[float, Any]]) -> None:
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    for at, value in schedule:
+        await asyncio.sleep(started + at - loop.time())
+        await bus.publish(change(value))
+
+
+async def read_batches(bus: EventBus, trigger: Trigger, schedule: list[tuple[float, Any]], count: int):
+    subscription = bus.subscribe(trigger)
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    publisher = asyncio.create_task(publish_at(bus, schedule))
+    batches = []
+    for _ in range(count):
+        batch = await subscription.get()
+        batches.append((loop.time() - started, [event.value for event in batch]))
+    await publisher
+    subscription.close()
+    return batches
+
+
+class TestEventBus(unittest.TestCase):
+    def test_debounce_waits_for_quiet(self):
+        async def test():
+            trigger = Trigger(DeviceStateChanged, debounce=60)
+            return await read_batches(EventBus(), trigger, [(0, 1), (30, 2), (80, 3), (200, 4)], 2)
+
+        self.assertEqual(run_virtual(test, START), [(140, [1, 2, 3]), (260, [4])])
+
+    def test_batches_are_capped_at_the_buffer(self):
+        async def test():
+            trigger = Trigger(DeviceStateChanged, debounce=60, buffer=3)
+            return await read_batches(EventBus(), trigger, [(at, at // 10) for at in range(0, 50, 10)], 2)
+
+        self.assertEqual(run_virtual(test, START), [(20, [0, 1, 2]), (100, [3, 4])])
+
+    def test_coalesce_windows_from_the_first_event(self):
+        async def test():
+            trigger = Trigger(DeviceStateChanged, coalesce=60)
+            return await read_batches(EventBus(), trigger, [(0, 1), (30, 2), (90, 3)], 2)
+
+        self.assertEqual(run_virtual(test, START), [(60, [1, 2]), (150, [3])])
+
+    def test_where_filters_events(self):
+        async def test():
+            bus = EventBus()
+            subscription = bus.subscribe(Trigger(DeviceStateChanged, where=lambda event: event.device == "Curtain"))
+            await bus.publish(change("open"))
+            await bus.publish(change("closed", device="Curtain"))
+            return [event.value for event in await subscription.get()]
+
+        self.assertEqual(run_virtual(test, START), ["closed"])
+
+    def test_full_buffer(self):
+        async def test():
+            bus = EventBus()
+            subscription = bus.subscribe(Trigger(DeviceStateChanged, buffer=2))
+            for value in range(4):
+                bus.publish_nowait(change(value))
+            dropped = subscription.dropped
+            blocked = asyncio.create_task(bus.publish(change(4)))  # Waits for the subscriber to catch up
+            await asyncio.sleep(1)
+            waited = not blocked.done()
+            received = [event.value for event in await subscription.get()]
+            await blocked
+            for _ in range(2):
+                received += [event.value for event in await subscription.get()]
+            return dropped, waited, received
+
+        self.assertEqual(run_virtual(test, START), (2, True, [2, 3, 4]))
+
+    def test_stuck_and_closed_subscribers_do_not_hang_publishers(self):
+        async def test():
+            bus = EventBus()
+            stuck, closed = (bus.subscribe(Trigger(DeviceStateChanged, buffer=1)) for _ in range(2))
+            bus.publish_nowait(change(0))
+            loop = asyncio.get_running_loop()
+            started = loop.time()
+            publisher = asyncio.create_task(bus.publish(change(1)))
+            await asyncio.sleep(1)
+            closed.close()
+            await publisher
+            return loop.time() - started, stuck.dropped, closed.dropped, stuck.queue.get_nowait().value
+
+        with self.assertLogs("Automated_Tasker", "WARNING"):
+            self.assertEqual(run_virtual(test, START), (PUBLISH_TIMEOUT, 1, 0, 1))
+
+
+class TestTriggeredTasks(unittest.TestCase):
+    def test_task_runs_on_its_events(self):
+        bus = EventBus()
+        registry = TaskRegistry()
+        runs: list[list[Any]] = []
+
+        @registry.register
+        class Cleaned:
+            NAME = "Cleaned"
+            TRIGGER = Trigger(DeviceStateChanged, debounce=60)
+            DAYS: ClassVar[list[str]] = []
+            DAY = 0
+            DEPENDS: ClassVar[list[str]] = []
+
+            async def execute(self, vault=None, services=None):
+                runs.append([event.value for event in self.events])
+
+        async def test():
+            with mock.patch("Automated_Tasker.tasklist.Bus", bus):
+                registry.start_triggers()
+                await publish_at(bus, [(0, "open"), (20, "closed")])
+                await asyncio.sleep(120)
+                registry.stop_triggers()
+                await asyncio.sleep(0)
+
+        run_virtual(test, START)
+        self.assertEqual(registry.global_tasklist, collections.deque())
+        self.assertEqual(runs, [["open", "closed"]])
+        self.assertEqual([run["name"] for run in registry.history], ["Cleaned"])
+        self.assertEqual(bus.subscriptions, [])
+
+    def test_litter_box_cleanings(self):
+        bus = EventBus()
+        registry = TaskRegistry()
+        registry.register(LitterBoxCleaned)
+        poll = 30 * 60
+        # Two cleanings, each read as the box moving out then back on consecutive polls
+        cleanings = [(0, "open"), (poll, "closed"), (8 * poll, "open"), (9 * poll, "closed")]
+
+        async def test():
+            with (
+                mock.patch("Automated_Tasker.tasklist.Bus", bus),
+                mock.patch("Automated_Tasker.tasks.litter_box.Outbox") as outbox,
+            ):
+                registry.start_triggers()
+                await publish_at(bus, cleanings)
+                await asyncio.sleep(2 * poll)
+                registry.stop_triggers()
+                await asyncio.sleep(0)
+                return outbox.notify.call_args_list
+
+        self.assertEqual(
+            run_virtual(test, START),
+            [
+                mock.call("Litterbox cleaned", "It moved 2 times between 05:30 and 06:00"),
+                mock.call("Litterbox cleaned", "It moved 2 times between 09:30 and 10:00"),
+            ],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import unittest
+from datetime import UTC, datetime
+from typing import Any, Self
+
+from aiohttp import ClientError
+
+from Automated_Tasker.utils.geocode import MISS_TTL, GeocodeStore
+from tests import run_virtual
+
+START = datetime(2026, 3, 10, 20, 0, tzinfo=UTC)
+OTTAWA = [{"lat": "45.4", "lon": "-75.6"}]
+
+
+class FakeResponse:
+    def __init__(self, status: int, results: list[dict[str, str]]):
+        self.status, self.ok, self.results = status, status < 400, results
+
+    async def __aenter__(self) -> Self:
+        return self
+
+    async def __aexit__(self, *_: object) -> None:
+        pass
+
+    async def json(self) -> list[dict[str, str]]:
+        return self.results
+
+
+class FakeSession:
+    """Answers each request with the next of its responses, raising the exceptions among them."""
+
+    def __init__(self, *responses: FakeResponse | Exception):
+        self.responses = list(responses)
+        self.requests = 0
+
+    def get(self, url: str, **_: Any) -> FakeResponse:
+        self.requests += 1
+        response = self.responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+
+class TestGeocodeStore(unittest.TestCase):
+    def setUp(self):
+        self.store = GeocodeStore(f"{self.id()}.json")
+
+    def lookups(self, session: FakeSession, *waits: float) -> list[tuple[float | None, float | None]]:
+        async def test():
+            positions = []
+            for wait in waits:
+                await asyncio.sleep(wait)
+                positions.append(await self.store.get_position(session, "1 Example St,  Ottawa"))
+            return positions
+
+        return run_virtual(test, START)
+
+    def test_positions_are_kept(self):
+        session = FakeSession(FakeResponse(200, OTTAWA))
+        self.assertEqual(self.lookups(session, 0, MISS_TTL * 2), [(45.4, -75.6)] * 2)
+        self.assertEqual(session.requests, 1)
+        with open(self.store.file_path) as file:
+            self.assertEqual(json.load(file)["positions"], {"1 example st, ottawa": [45.4, -75.6]})
+
+    def test_misses_expire(self):
+        session = FakeSession(FakeResponse(200, []), FakeResponse(200, OTTAWA))
+        self.assertEqual(self.lookups(session, 0, MISS_TTL - 1, 2), [(None, None), (None, None), (45.4, -75.6)])
+        self.assertEqual(session.requests, 2)
+        self.assertEqual(self.store.misses, {})
+
+    def test_failures_are_not_remembered(self):
+        session = FakeSession(FakeResponse(503, []), ClientError("Connection reset"), TimeoutError())
+        session.responses.append(FakeResponse(200, OTTAWA))
+        with self.assertLogs("Automated_Tasker", "WARNING") as logs:
+            positions = self.lookups(session, 0, 1, 1, 1)
+        self.assertEqual(positions, [(None, None)] * 3 + [(45.4, -75.6)])
+        self.assertEqual(len(logs.output), 3)
+        self.assertEqual(self.store.misses, {})
+
+    def test_old_files_forget_their_misses(self):
+        with open(self.store.file_path, "w") as file:
+            json.dump({"1 example st, ottawa": [None, None], "2 other st": [45.3, -75.7]}, file)
+        session = FakeSession(FakeResponse(200, OTTAWA))
+        self.assertEqual(self.lookups(session, 0), [(45.4, -75.6)])
+        self.assertEqual(self.store.positions, {"1 example st, ottawa": (45.4, -75.6), "2 other st": (45.3, -75.7)})
+
+
+if __name__ == "__main__":
+    unittest.main()
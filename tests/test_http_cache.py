@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import unittest
+from collections.abc import Awaitable, Callable
+from datetime import UTC, datetime
+from typing import Any, Self
+
+from Automated_Tasker.utils.http_cache import SAVE_DELAY, HTTPCache
+from tests import run_virtual
+
+START = datetime(2026, 3, 10, 20, 0, tzinfo=UTC)
+URL = "https://ottawa.ca/en/recreation-and-parks/facilities/place-listing/"
+VALIDATORS = {"ETag": '"v1"', "Last-Modified": "Tue, 10 Mar 2026 12:00:00 GMT"}
+
+
+class FakeResponse:
+    def __init__(self, status: int, body: str = "", headers: dict[str, str] | None = None):
+        self.status, self.body, self.headers = status, body, headers or {}
+
+    async def __aenter__(self) -> Self:
+        return self
+
+    async def __aexit__(self, *_: object) -> None:
+        pass
+
+    async def text(self) -> str:
+        return self.body
+
+
+class FakeSession:
+    """Answers each request with the next of its responses, keeping the headers each was sent with."""
+
+    def __init__(self, *responses: FakeResponse):
+        self.responses = list(responses)
+        self.sent: list[dict[str, str]] = []
+
+    def get(self, url: str, headers: dict[str, str], **_: Any) -> FakeResponse:
+        self.sent.append(headers)
+        return self.responses.pop(0)
+
+
+class TestHTTPCache(unittest.TestCase):
+    def setUp(self):
+        self.cache = HTTPCache(self.id(), limit=250)
+
+    def run_cache(self, test: Callable[[], Awaitable[Any]]) -> Any:
+        async def run() -> Any:
+            try:
+                return await test()
+            finally:
+                self.cache.flush()
+
+        return run_virtual(run, START)
+
+    def test_unchanged_pages_are_revalidated(self):
+        session = FakeSession(FakeResponse(200, "Lane swim", VALIDATORS), FakeResponse(304))
+
+        async def test() -> list[str | None]:
+            return [await self.cache.get(session, URL, headers={"User-Agent": "tests"}) for _ in range(2)]
+
+        self.assertEqual(self.run_cache(test), ["Lane swim", "Lane swim"])
+        self.assertEqual(session.sent[0], {"User-Agent": "tests"})
+        self.assertEqual(
+            session.sent[1],
+            {"User-Agent": "tests", "If-None-Match": '"v1"', "If-Modified-Since": VALIDATORS["Last-Modified"]},
+        )
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+    def test_either_validator_is_enough(self):
+        for name, header in (("ETag", "If-None-Match"), ("Last-Modified", "If-Modified-Since")):
+            with self.subTest(validator=name):
+                cache = HTTPCache(f"{self.id()}-{name}")
+                session = FakeSession(FakeResponse(200, "Lane swim", {name: VALIDATORS[name]}), FakeResponse(304))
+
+                async def test(cache: HTTPCache = cache, session: FakeSession = session) -> str | None:
+                    await cache.get(session, URL)
+                    return await cache.get(session, URL)
+
+                self.assertEqual(run_virtual(test, START), "Lane swim")
+                self.assertEqual(session.sent[1], {header: VALIDATORS[name]})
+
+    def test_pages_without_validators_are_not_kept(self):
+        session = FakeSession(FakeResponse(200, "Lane swim"), FakeResponse(200, "Public swim"))
+
+        async def test() -> list[str | None]:
+            return [await self.cache.get(session, URL) for _ in range(2)]
+
+        self.assertEqual(self.run_cache(test), ["Lane swim", "Public swim"])
+        self.assertEqual(session.sent, [{}, {}])
+        self.assertEqual(self.cache.index, {})
+
+    def test_least_recently_used_pages_are_evicted(self):
+        pages = [f"{URL}{pool}" for pool in ("a", "b", "c")]
+        session = FakeSession(*(FakeResponse(200, pool * 100, VALIDATORS) for pool in "ab"), FakeResponse(304))
+        session.responses.append(FakeResponse(200, "c" * 100, VALIDATORS))
+
+        async def test() -> None:
+            for page in pages[:2]:
+                await self.cache.get(session, page)
+                await asyncio.sleep(1)
+            await self.cache.get(session, pages[0])  # Revalidated, so b is now the least recently used
+            await asyncio.sleep(1)
+            await self.cache.get(session, pages[2])  # 300 bytes over a 250 byte limit
+
+        self.run_cache(test)
+        assert self.cache.index is not None
+        self.assertEqual(sorted(self.cache.index), [pages[0], pages[2]])
+        self.assertEqual(len(list(self.cache.directory.glob("[0-9a-f]*"))), 2)
+        with open(self.cache.index_path) as file:
+            self.assertEqual(sorted(json.load(file)), [pages[0], pages[2]])
+
+    def test_index_writes_are_batched(self):
+        session = FakeSession(FakeResponse(200, "Lane swim", VALIDATORS), *(FakeResponse(304) for _ in range(5)))
+
+        async def test() -> tuple[bool, bool]:
+            for _ in range(6):
+                await self.cache.get(session, URL)
+            written = self.cache.index_path.exists()
+            await asyncio.sleep(SAVE_DELAY)
+            return written, self.cache.index_path.exists()
+
+        self.assertEqual(self.run_cache(test), (False, True))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+import asyncio
+import re
+import time
+import unittest
+from typing import Any
+
+import tests  # noqa: F401
+from Automated_Tasker.utils.loop_monitor import LoopMonitor
+
+BLOCKED = 0.6  # seconds
+
+
+async def block() -> None:
+    time.sleep(BLOCKED)  # noqa: ASYNC251 - the stall being caught
+
+
+class TestLoopMonitor(unittest.TestCase):
+    def monitor(self) -> LoopMonitor:
+        # Real time, as the watchdog thread is timing the loop from outside it
+        async def test() -> LoopMonitor:
+            monitor = LoopMonitor(interval=0.05, threshold=0.2)
+            monitor.start()
+            try:
+                await asyncio.sleep(0.2)
+                await block()
+                await asyncio.sleep(0.2)  # Let the heartbeat catch up on the stall
+            finally:
+                monitor.stop()
+            return monitor
+
+        return asyncio.run(test())
+
+    def test_stall_is_captured(self):
+        with self.assertLogs("Automated_Tasker", "WARNING") as logs:
+            monitor = self.monitor()
+        self.assertEqual(len(monitor.stalls), 1)
+        stall: dict[str, Any] = monitor.stalls[0]
+        self.assertGreaterEqual(stall["lag"], BLOCKED - 0.1)  # Measured by the heartbeat once the loop was back
+        blocked = f"blocked in block ({__file__}:{block.__code__.co_firstlineno + 1})"
+        self.assertRegex(stall["culprit"], rf"^test \(.*\), {re.escape(blocked)}$")
+        self.assertIn("time.sleep(BLOCKED)", stall["stack"])
+        self.assertEqual(len(logs.output), 1)
+        self.assertIn(blocked, logs.output[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+import unittest
+
+import tests  # noqa: F401
+from Automated_Tasker.utils.metrics import MetricsRegistry
+
+
+class TestMetricsRegistry(unittest.TestCase):
+    def test_names_are_registered_once(self):
+        registry = MetricsRegistry()
+        failures = registry.counter("tasker_failures_total", "Failures.")
+        self.assertIs(registry.counter("tasker_failures_total", "Failures."), failures)
+        lag = registry.histogram("tasker_lag_seconds", "Lag.", (1, 5))
+        self.assertIs(registry.histogram("tasker_lag_seconds", "Lag.", (1, 5)), lag)
+
+    def test_names_keep_their_kind(self):
+        registry = MetricsRegistry()
+        registry.counter("tasker_failures_total", "Failures.")
+        registry.histogram("tasker_lag_seconds", "Lag.")
+        with self.assertRaises(TypeError):
+            registry.histogram("tasker_failures_total", "Failures.")
+        with self.assertRaises(TypeError):
+            registry.counter("tasker_lag_seconds", "Lag.")
+
+    def test_render(self):
+        registry = MetricsRegistry()
+        registry.counter("tasker_failures_total", "Failures.").inc(task="Weather")
+        registry.histogram("tasker_lag_seconds", "Lag.", (1, 5)).observe(2, task="Weather")
+        self.assertEqual(
+            registry.render().splitlines(),
+            [
+                "# HELP tasker_failures_total Failures.",
+                "# TYPE tasker_failures_total counter",
+                'tasker_failures_total{task="Weather"} 1',
+                "# HELP tasker_lag_seconds Lag.",
+                "# TYPE tasker_lag_seconds histogram",
+                'tasker_lag_seconds_bucket{le="1",task="Weather"} 0',
+                'tasker_lag_seconds_bucket{le="5",task="Weather"} 1',
+                'tasker_lag_seconds_bucket{le="+Inf",task="Weather"} 1',
+                'tasker_lag_seconds_sum{task="Weather"} 2',
+                'tasker_lag_seconds_count{task="Weather"} 1',
+            ],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import unittest
+from datetime import UTC, datetime
+from pathlib import Path
+from unittest import mock
+
+from aiohttp import ClientError
+
+from Automated_Tasker.utils import ottawa_swimschedule
+from Automated_Tasker.utils.ottawa_swimschedule import (
+    PAGE_VERSION,
+    WEEKLY_SCHEDULE_FILE,
+    ScheduleStore,
+    get_weekly_schedule,
+)
+from Automated_Tasker.utils.vault import Vault
+from Automated_Tasker.utils.weekly_schedule import Slot, WeeklySchedule
+from tests import run_virtual
+
+START = datetime(2026, 3, 10, 20, 0, tzinfo=UTC)  # The Tuesday post, 16:00 in Ottawa
+FACILITY_PAGE = (Path(__file__).parent / "fixtures" / "facility_page.html").read_text(encoding="utf-8")
+POOL = {"name": "Example Recreation Complex - Pool", "address": "1 Example St, Ottawa, ON"}
+SLUG = "example-recreation-complex-pool"
+LISTING = (
+    '<table class="table table-bordered table-condensed cols-2"><tbody>'
+    f"<tr><td>{POOL['name']}</td><td>1 Example St\nOttawa</td></tr>"
+    "</tbody></table>"
+)
+
+
+class TestScheduleStore(unittest.TestCase):
+    def setUp(self):
+        self.store = ScheduleStore(f"{self.id()}.json")
+        self.addCleanup(self.store.file_path.unlink, missing_ok=True)
+
+    def reloaded(self) -> ScheduleStore:
+        store = ScheduleStore(self.store.file_path.name)
+        store.load()
+        return store
+
+    def test_posted_schedules_are_not_new(self):
+        self.assertTrue(self.store.is_new("Tuesday Pools", "digest"))
+        self.store.mark_posted("Tuesday Pools", "digest")
+        for store in (self.store, self.reloaded()):
+            self.assertFalse(store.is_new("Tuesday Pools", "digest"))
+            self.assertTrue(store.is_new("Tuesday Pools", "changed"))
+            self.assertTrue(store.is_new("Wednesday Pools", "digest"))
+
+    def test_pages_are_parsed_once(self):
+        url = ottawa_swimschedule.facility_url + SLUG
+        tables = self.store.get_tables(url, FACILITY_PAGE)
+        self.assertTrue(tables)
+        self.store.save()
+        store = self.reloaded()
+        with mock.patch.object(ottawa_swimschedule, "parse_facility_page") as parse:
+            self.assertEqual(store.get_tables(url, FACILITY_PAGE), tables)
+            self.assertEqual(store.get_tables(url, None), tables)  # Couldn't be fetched, the last tables
+        parse.assert_not_called()
+        self.assertEqual(store.changed, set())
+
+    def test_new_page_versions_parse_again(self):
+        url = ottawa_swimschedule.facility_url + SLUG
+        self.store.get_tables(url, FACILITY_PAGE)
+        self.store.save()
+        with mock.patch.object(ottawa_swimschedule, "PAGE_VERSION", PAGE_VERSION + 1):
+            store = self.reloaded()
+            with mock.patch.object(ottawa_swimschedule, "parse_facility_page", return_value=[]) as parse:
+                self.assertEqual(store.get_tables(url, FACILITY_PAGE), [])
+            parse.assert_called_once_with(FACILITY_PAGE)
+            self.assertEqual(store.changed, {url})
+            self.assertEqual(store.pages[url]["version"], PAGE_VERSION + 1)
+
+
+class TestCrawlFailures(unittest.TestCase):
+    def setUp(self):
+        self.store = ScheduleStore(f"{self.id()}.json")
+        patcher = mock.patch.object(ottawa_swimschedule, "schedules", self.store)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.schedule_path = Vault.get_vault_directory() / WEEKLY_SCHEDULE_FILE
+        self.addCleanup(self.schedule_path.unlink, missing_ok=True)
+
+    def crawl(self, pages: dict[str, str | None | Exception], position: tuple[float | None, float | None]):
+        async def get(session, url: str) -> str | None:
+            page = pages.get(url.split("/")[-1], "")  # Past the last listing page, an empty one
+            if isinstance(page, Exception):
+                raise page
+            return page
+
+        async def get_position(session, address: str) -> tuple[float | None, float | None]:
+            return position
+
+        async def test():
+            with (
+                mock.patch.object(ottawa_swimschedule.http_cache, "get", get),
+                mock.patch.object(ottawa_swimschedule.geocodes, "get_position", get_position),
+            ):
+                return await get_weekly_schedule(session=mock.sentinel.session)
+
+        return run_virtual(test, START)
+
+    def listing(self, page: int) -> str:
+        return ottawa_swimschedule.listings_url.split("/")[-1] + f"&page={page}"
+
+    def test_crawl(self):
+        schedule = self.crawl({self.listing(0): LISTING, SLUG: FACILITY_PAGE}, (45.4, -75.6))
+        pool = {"pool": "Example Rec Complex", "address": POOL["address"], "latitude": 45.4, "longitude": -75.6}
+        self.assertEqual(schedule.pools(), [pool])
+        self.assertTrue(self.schedule_path.exists())
+
+    def test_missing_listing_page_keeps_the_last_schedule(self):
+        last = WeeklySchedule([Slot("Last Pool", "2 Last St", None, None, "Swim", "Lane swim", "Saturday", 540, 600)])
+        last.save(self.schedule_path)
+        for failure in (None, ClientError("Connection reset")):
+            with self.subTest(failure=failure), self.assertLogs(ottawa_swimschedule.logger, "WARNING"):
+                schedule = self.crawl({self.listing(0): LISTING, self.listing(1): failure}, (45.4, -75.6))
+                self.assertEqual(schedule.to_dict(), last.to_dict())
+
+    def test_missing_listing_page_without_a_last_schedule(self):
+        with self.assertRaises(ConnectionError):
+            self.crawl({self.listing(0): None}, (45.4, -75.6))
+
+    def test_failed_facility_falls_back_on_its_tables(self):
+        self.crawl({self.listing(0): LISTING, SLUG: FACILITY_PAGE}, (45.4, -75.6))
+        with self.assertLogs(ottawa_swimschedule.logger, "WARNING") as logs:
+            schedule = self.crawl(
+                {self.listing(0): LISTING, SLUG: ClientError("Connection reset")},
+                (None, None),  # Nominatim was down too
+            )
+        self.assertEqual(len(logs.output), 1)
+        pool = {"pool": "Example Rec Complex", "address": POOL["address"], "latitude": None, "longitude": None}
+        self.assertEqual(schedule.pools(), [pool])
+        self.assertEqual(len(schedule), len(self.crawl({self.listing(0): LISTING, SLUG: FACILITY_PAGE}, (45.4, -75.6))))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import unittest
+from datetime import UTC, datetime
+
+from Automated_Tasker.services.outbox import MAX_ATTEMPTS, NotificationOutbox
+from tests import run_virtual
+
+START = datetime(2026, 3, 9, 11, 30, 15, tzinfo=UTC)  # 06:30:15 in Ottawa, the first tick after 06:30
+
+
+class FakeNotifier:
+    def __init__(self, fail: int = 0, error: Exception | None = None):
+        self.pushes: list[tuple[str, str]] = []
+        self.fail = fail
+        self.error = error or ConnectionError("Pushbullet is down")
+
+    async def send_notification(self, title: str, message: str) -> None:
+        if self.fail:
+            self.fail -= 1
+            raise self.error
+        self.pushes.append((title, message))
+
+
+class FakeServices:
+    def __init__(self, notifier: FakeNotifier):
+        self.notifier = notifier
+
+    async def get(self, name: str) -> FakeNotifier:
+        return self.notifier
+
+
+class TestOutbox(unittest.TestCase):
+    def setUp(self):
+        self.notifier = FakeNotifier()
+        self.outbox = NotificationOutbox(file_name=f"{self.id()}.json", window=45)
+        self.outbox.start(FakeServices(self.notifier))
+
+    def run_outbox(self, notifications: list[tuple[float, str]], until: float = 300) -> None:
+        async def test():
+            started = asyncio.get_running_loop().time()
+            for at, title in notifications:
+                await asyncio.sleep(started + at - asyncio.get_running_loop().time())
+                self.outbox.notify(title, f"{title} message")
+            await asyncio.sleep(started + until - asyncio.get_running_loop().time())
+
+        run_virtual(test, START)
+
+    def test_morning_trio_is_one_push(self):
+        # ToDoList, Weather and MorningWordGame share 06:30, and used to fire a LOOP_WAIT apart
+        self.run_outbox([(0, "ToDo"), (15, "Weather"), (30, "Yesterday's Words")])
+        self.assertEqual(len(self.notifier.pushes), 1)
+        self.assertEqual(self.notifier.pushes[0][0], "ToDo, Weather, Yesterday's Words")
+        self.assertEqual(self.outbox.stats()["delivered"], 3)
+
+    def test_window_runs_from_the_first_push(self):
+        self.run_outbox([(0, "First"), (30, "Second"), (60, "Third")])
+        self.assertEqual([title for title, _ in self.notifier.pushes], ["First, Second", "Third"])
+
+    def test_failed_push_is_retried(self):
+        self.notifier.fail = 1
+        self.run_outbox([(0, "First"), (10, "Second")])
+        self.assertEqual([title for title, _ in self.notifier.pushes], ["First, Second"])
+        self.assertEqual(self.outbox.stats()["failures"], 1)
+
+    def test_rejected_push_is_dead_lettered(self):
+        self.notifier.fail, self.notifier.error = 1, PermissionError("Invalid access token")
+        with self.assertLogs("Automated_Tasker", "ERROR"):
+            self.run_outbox([(0, "First"), (60, "Second")])
+        self.assertEqual([title for title, _ in self.notifier.pushes], ["Second"])
+        self.assertEqual((self.outbox.stats()["dead"], self.outbox.stats()["failures"]), (1, 1))
+        with open(self.outbox.dead_letter_path) as file:
+            self.assertEqual([item["title"] for item in json.load(file)], ["First"])
+
+    def test_retries_give_up(self):
+        self.notifier.fail = MAX_ATTEMPTS
+        with self.assertLogs("Automated_Tasker", "WARNING") as logs:
+            self.run_outbox([(0, "First")], until=24 * 60 * 60)
+        self.assertEqual(self.notifier.pushes, [])
+        self.assertEqual(self.outbox.stats()["failures"], MAX_ATTEMPTS)
+        self.assertEqual((self.outbox.stats()["dead"], self.outbox.stats()["queued"]), (1, 0))
+        self.assertIn(f"still failing after {MAX_ATTEMPTS} attempts", logs.output[-1])
+
+    def test_stop_delivers_what_is_queued(self):
+        async def test():
+            self.outbox.notify("Last", "before shutting down")
+            await self.outbox.stop()
+            return self.outbox._worker
+
+        self.assertIsNone(run_virtual(test, START))
+        self.assertEqual([title for title, _ in self.notifier.pushes], ["Last"])
+        with open(self.outbox.file_path) as file:
+            self.assertEqual(json.load(file), [])
+
+    def test_saves_are_gathered(self):
+        async def test():
+            for title in ("First", "Second", "Third"):
+                self.outbox.notify(title, "queued")
+            before = self.outbox.file_path.exists()
+            await asyncio.sleep(5)
+            written = [item["title"] for item in json.loads(self.outbox.file_path.read_text())]
+            await self.outbox.stop()
+            return before, written
+
+        # Nothing written when the notifications came in, all of them in one write a moment later
+        self.assertEqual(run_virtual(test, START), (False, ["First", "Second", "Third"]))
+
+    def test_notify_without_a_loop_queues(self):
+        self.outbox.notify("Offline", "queued before the loop runs")
+        self.assertEqual(self.outbox.stats()["queued"], 1)
+        self.assertEqual(self.notifier.pushes, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import unittest
+from datetime import UTC, datetime, timedelta
+
+from Automated_Tasker.prefetch import PrefetchRegistry
+from tests import run_virtual
+
+START = datetime(2026, 3, 9, 8, 0, tzinfo=UTC)
+
+
+def consumer(name: str, time: timedelta) -> type:
+    return type(name, (), {"NAME": name, "TIME": time, "DEPENDS": ["calendar-events"]})
+
+
+ALARM = consumer("SetAlarm", timedelta(hours=4, minutes=20))
+TODO = consumer("ToDoList", timedelta(hours=6, minutes=30))
+TRAFFIC = consumer("SetTrafficAlerts", timedelta(hours=6, minutes=35))
+
+
+class TestPrefetch(unittest.TestCase):
+    def setUp(self):
+        self.prefetch = PrefetchRegistry(lead=timedelta(minutes=10))
+        self.fetches: list[int] = []
+
+        @self.prefetch.provider("calendar-events")
+        async def events(_) -> int:
+            self.fetches.append(len(self.fetches))
+            return len(self.fetches)
+
+    def run_consumers(self, *ticks: tuple[timedelta, type | None]) -> list[int]:
+        tasks = [ALARM, TODO, TRAFFIC]
+
+        async def test():
+            received = []
+            for now, task in ticks:
+                self.prefetch.schedule([task for task in tasks if task.TIME >= now], None, now)
+                if task is not None:
+                    received.append(await self.prefetch.get("calendar-events", None))
+                    self.prefetch.release(task)
+            return received
+
+        return run_virtual(test, START)
+
+    def test_consumers_within_the_lead_share_a_result(self):
+        ticks = [(TODO.TIME - timedelta(minutes=5), None), (TODO.TIME, TODO), (TRAFFIC.TIME, TRAFFIC)]
+        self.assertEqual(self.run_consumers(*ticks), [1, 1])
+        self.assertEqual(self.prefetch.results, {})
+
+    def test_later_consumers_fetch_again(self):
+        ticks = [(ALARM.TIME - timedelta(minutes=10), None), (ALARM.TIME, ALARM), (TODO.TIME, TODO)]
+        self.assertEqual(self.run_consumers(*ticks), [1, 2])
+
+    def test_resolves_what_was_not_prefetched(self):
+        self.assertEqual(self.run_consumers((ALARM.TIME - timedelta(hours=1), ALARM)), [1])
+        self.assertEqual(self.prefetch.results, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
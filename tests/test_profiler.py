@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+import asyncio
+import time
+import unittest
+from collections import Counter
+
+import tests  # noqa: F401
+from Automated_Tasker.utils.profiler import KEEP_PROFILES, TaskProfiler
+from Automated_Tasker.utils.vault import Vault
+
+
+async def busy() -> None:
+    time.sleep(0.2)  # noqa: ASYNC251 - holding the loop is what's being profiled
+
+
+async def wait() -> None:
+    await asyncio.sleep(0.2)
+
+
+async def run() -> None:
+    await busy()
+    await wait()
+
+
+class TestTaskProfiler(unittest.TestCase):
+    def setUp(self):
+        self.profiler = TaskProfiler(directory_name=self.id(), interval=0.002)
+        self.directory = Vault.get_vault_directory() / self.id()
+
+    def test_samples_are_classified(self):
+        with self.assertLogs("Automated_Tasker", "INFO"):
+            asyncio.run(self.profiler.profile("Run", run()))
+        (profile,) = self.directory.glob("*-Run.folded")
+        samples: Counter[str] = Counter()
+        for line in profile.read_text().splitlines():
+            stack, count = line.rsplit(" ", 1)
+            samples[stack] += int(count)
+
+        cpu = [stack.split(";") for stack in samples if stack.startswith("Run;[cpu];")]
+        waiting = [stack.split(";") for stack in samples if stack.startswith("Run;[await];")]
+        # On the loop, the stack runs from the task down to the blocking call; suspended, down to what it awaits
+        self.assertTrue(cpu and all(stack[2].startswith("run (") and stack[3].startswith("busy (") for stack in cpu))
+        self.assertTrue(waiting and all(stack[3].startswith("wait (") for stack in waiting))
+        self.assertTrue(any(label.startswith("sleep (tasks.py") for stack in waiting for label in stack))
+
+    def test_profiles_are_rotated(self):
+        for _ in range(KEEP_PROFILES + 5):
+            self.profiler._write("Run", Counter({"Run;[cpu];run (test.py:1)": 1}), 0.1)
+        profiles = sorted(path.name for path in self.directory.glob("*.folded"))
+        self.assertEqual(len(profiles), KEEP_PROFILES)
+        self.assertEqual(len(set(profiles)), KEEP_PROFILES)
+
+
+if __name__ == "__main__":
+    unittest.main()
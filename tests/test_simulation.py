@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import logging
+import unittest
+from datetime import datetime, timedelta
+from typing import Any
+
+import tests  # noqa: F401
+from Automated_Tasker.simulation import format_timeline, simulate
+
+TIMELINE = [
+    ("SetAlarm", "04:30"),
+    ("SetTrafficAlerts", "04:30"),
+    ("MorningWordGame", "06:30"),
+    ("ToDoList", "06:30"),
+    ("Weather", "06:30"),
+    ("NightWordGame", "23:30"),
+]
+LAG = timedelta(seconds=15)  # The first tick after a task's TIME, on the daemon's LOOP_WAIT
+
+
+class TestSimulation(unittest.TestCase):
+    def replay(self, day: str, days: float = 1) -> list[dict[str, Any]]:
+        with self.assertLogs("Automated_Tasker", logging.INFO):
+            return simulate(datetime.fromisoformat(f"{day}T00:00"), days)
+
+    def fired(self, history: list[dict[str, Any]]) -> list[tuple[str, str]]:
+        # Tasks due at the same TIME run in the order they were registered, which depends on the imports
+        fired = [(run["name"], f"{run['started']:%Y-%m-%d %H:%M %Z}") for run in history]
+        return sorted(fired, key=lambda run: (run[1], run[0]))
+
+    def test_one_day(self):
+        history = self.replay("2026-03-09")
+        self.assertEqual(self.fired(history), [(name, f"2026-03-09 {time} EDT") for name, time in TIMELINE])
+        for run in history:
+            self.assertEqual(run["started"].replace(tzinfo=None) - datetime(2026, 3, 9), run["scheduled"] + LAG)
+            self.assertFalse(run["failed"])
+        self.assertIn("NightWordGame     23:30:00     23:30:15 EDT", format_timeline(history))
+
+    def test_clocks_springing_forward(self):
+        history = self.replay("2026-03-08")  # 23 hours long, 02:00 EST is 03:00 EDT
+        self.assertEqual(self.fired(history), [(name, f"2026-03-08 {time} EDT") for name, time in TIMELINE])
+
+    def test_clocks_falling_back(self):
+        history = self.replay("2026-11-01")  # 25 hours long, 02:00 EDT is 01:00 EST
+        self.assertEqual(self.fired(history), [(name, f"2026-11-01 {time} EST") for name, time in TIMELINE])
+
+    def test_every_day_once(self):
+        history = self.replay("2026-10-31", days=3)
+        days = [f"{run['started']:%Y-%m-%d}" for run in history]
+        self.assertEqual(days, [day for day in ("2026-10-31", "2026-11-01", "2026-11-02") for _ in TIMELINE])
+
+
+if __name__ == "__main__":
+    unittest.main()
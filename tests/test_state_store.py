@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import asyncio
+import sqlite3
+import unittest
+from datetime import UTC, datetime, timedelta
+from unittest import mock
+
+from Automated_Tasker.subdaemons import litter_checker
+from Automated_Tasker.subdaemons.litter_checker import CheckLitterBox
+from Automated_Tasker.utils import clock
+from Automated_Tasker.utils.state_store import StateStore
+from tests import run_virtual
+
+START = datetime(2026, 11, 1, 5, 30, tzinfo=UTC)  # 01:30 EDT, half an hour before the clocks fall back
+
+
+class TestStateStore(unittest.TestCase):
+    def test_writes_are_committed_together(self):
+        async def test():
+            store = StateStore(f"{self.id()}.sqlite3", delay=5, max_delay=60)
+            store.set("Checker", "status", "open")
+            await asyncio.sleep(3)
+            store.set("Checker", "count", 1)
+            store.set("Checker", "status", "closed")
+            await asyncio.sleep(4)  # Still within the delay of the last write
+            before = store.flushes
+            await asyncio.sleep(2)
+            after = store.flushes
+            store.set("Checker", "status", "closed")  # Unchanged, nothing to commit
+            await asyncio.sleep(10)
+            store.close()
+            return before, after, store.flushes
+
+        self.assertEqual(run_virtual(test, START), (0, 1, 1))
+
+    def test_writes_wait_at_most_max_delay(self):
+        async def test():
+            store = StateStore(f"{self.id()}.sqlite3", delay=5, max_delay=12)
+            for count in range(5):
+                store.set("Checker", "count", count)
+                await asyncio.sleep(4)
+            flushes = store.flushes  # The ones from 0 to 8 at 12, while the later ones keep the delay going
+            store.close()
+            return flushes
+
+        self.assertEqual(run_virtual(test, START), 1)
+
+    def test_failed_commits_keep_their_writes(self):
+        async def test():
+            store = StateStore(f"{self.id()}.sqlite3", delay=5)
+            store.get("Checker", "status")  # Loads the scope, so only flushes connect from here on
+            connection = store._connect()
+            locked = sqlite3.OperationalError("database is locked")
+            with mock.patch.object(store, "_connect", side_effect=[locked, locked, connection, connection]):
+                store.set("Checker", "status", "open")
+                with self.assertRaises(sqlite3.OperationalError):
+                    store.flush()
+                pending = dict(store.pending)
+                with self.assertLogs("Automated_Tasker", "WARNING"):
+                    store.set("Checker", "count", 1)
+                    await asyncio.sleep(6)  # The timer's flush fails too, and retries
+                retried = store.flushes
+                await asyncio.sleep(6)
+            store.close()
+            resumed = StateStore(f"{self.id()}.sqlite3")
+            values = resumed.get("Checker", "status"), resumed.get("Checker", "count")
+            resumed.close()
+            return pending, retried, store.flushes, store.pending, values
+
+        pending, retried, flushes, left, values = run_virtual(test, START)
+        self.assertEqual(pending, {("Checker", "status"): '"open"'})
+        self.assertEqual((retried, flushes, left, values), (0, 1, {}, ("open", 1)))
+
+    def test_resumes_from_the_file(self):
+        async def test():
+            store = StateStore(f"{self.id()}.sqlite3")
+            store.set("Checker", "status", "open")
+            store.set("Checker", "seen", {"open": 2})
+            store.close()
+            resumed = StateStore(f"{self.id()}.sqlite3")
+            values = resumed.get("Checker", "status"), resumed.get("Checker", "seen"), resumed.get("Other", "status")
+            resumed.close()
+            return values
+
+        self.assertEqual(run_virtual(test, START), ("open", {"open": 2}, None))
+
+
+class FakeController:
+    def __init__(self):
+        self.polls: list[datetime] = []
+
+    async def status(self, session, device: str) -> dict[str, str]:
+        self.polls.append(clock.now(UTC))
+        return {"openState": "closed"}
+
+
+class FakeServices:
+    def __init__(self):
+        self.controller = FakeController()
+
+    async def get(self, name: str):
+        return self.controller if name == "switchbot" else None
+
+
+class TestLitterCheckerResume(unittest.TestCase):
+    def first_poll(self, stored: dict[str, str]) -> timedelta:
+        store = StateStore(f"{self.id()}.sqlite3")
+        for key, value in stored.items():
+            store.set(CheckLitterBox.NAME, key, value)
+        services = FakeServices()
+
+        async def test():
+            checker = asyncio.create_task(CheckLitterBox().start(None, services))
+            await asyncio.sleep(3600)
+            checker.cancel()
+
+        with mock.patch.object(litter_checker, "state", store):
+            run_virtual(test, START)
+        store.close()
+        return services.controller.polls[0] - START
+
+    def test_resumes_within_the_check_period(self):
+        stored = {"last_status": "closed", "last_poll": (START - timedelta(minutes=10)).isoformat()}
+        self.assertEqual(self.first_poll(stored), timedelta(minutes=20))
+
+    def test_polls_after_the_check_period(self):
+        stored = {"last_status": "closed", "last_poll": (START - timedelta(hours=2)).isoformat()}
+        self.assertEqual(self.first_poll(stored), timedelta(0))
+
+    def test_polls_right_away_if_the_last_poll_is_ahead(self):
+        # Written by a clock ahead of this one, like a simulation's, or by a local time an hour later than now
+        for last_poll in (START + timedelta(days=3), START + timedelta(minutes=20)):
+            with self.subTest(last_poll=last_poll):
+                stored = {"last_status": "closed", "last_poll": last_poll.isoformat()}
+                self.assertEqual(self.first_poll(stored), timedelta(0))
+
+    def test_naive_times_are_not_resumed_from(self):
+        # 01:20 local, before or after the clocks fall back, can't tell
+        stored = {"last_status": "closed", "last_poll": "2026-11-01T01:20:00"}
+        self.assertEqual(self.first_poll(stored), timedelta(0))
+
+
+if __name__ == "__main__":
+    unittest.main()
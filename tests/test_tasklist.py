@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import asyncio
+import unittest
+from datetime import UTC, date, datetime, timedelta
+from unittest import mock
+
+from Automated_Tasker.admission import PRIORITY_BULK, PRIORITY_NORMAL, AdmissionController
+from Automated_Tasker.tasklist import LOCAL_TIMEZONE, PRECOMPUTE_LEAD, TaskRegistry, local_midnight
+from tests import run_virtual
+
+START = datetime(2026, 3, 9, 16, 0, tzinfo=UTC)  # Noon in Ottawa
+
+
+def task(name: str, time: timedelta, priority: int = PRIORITY_NORMAL, seconds: float = 60) -> type:
+    async def execute(self, vault=None, services=None) -> None:
+        await asyncio.sleep(seconds)
+
+    attributes = {"NAME": name, "TIME": time, "DAYS": [], "DAY": 0, "DEPENDS": [], "PRIORITY": priority}
+    return type(name, (), {**attributes, "RESOURCES": ["cpu"], "execute": execute})
+
+
+class TestExecuteDailyTasks(unittest.TestCase):
+    def run_due(self, tasks: list[type], admission: AdmissionController) -> tuple[list[str], list[tuple[str, float]]]:
+        registry = TaskRegistry()
+        for due in tasks:
+            registry.add_daily_tasklist(due)
+
+        async def test():
+            with mock.patch("Automated_Tasker.tasklist.Admission", admission):
+                await registry.execute_daily_tasks()
+                returned = [run["name"] for run in registry.history]  # Nothing has run yet
+                await asyncio.wait(admission.tasks)
+            started = min(run["started"] for run in registry.history)
+            return returned, [(run["name"], (run["started"] - started).total_seconds()) for run in registry.history]
+
+        return run_virtual(test, START)
+
+    def test_due_tasks_run_in_time_order_within_a_priority(self):
+        # Registered out of order, all missed by a restart at noon, and sharing the one cpu slot
+        tasks = [task("Weather", timedelta(hours=6, minutes=30)), task("Alarm", timedelta(hours=4, minutes=30))]
+        tasks += [task("Traffic", timedelta(hours=6, minutes=35)), task("ToDo", timedelta(hours=6, minutes=30))]
+        returned, runs = self.run_due(tasks, AdmissionController(limits={"cpu": 1}, reserve=0))
+        self.assertEqual(returned, [])
+        # History is appended as tasks finish, each started once the one before it was done
+        self.assertEqual(runs, [("Alarm", 0), ("Weather", 60), ("ToDo", 120), ("Traffic", 180)])
+
+    def test_priority_comes_before_time(self):
+        tasks = [
+            task("Crawl", timedelta(hours=6), PRIORITY_BULK),
+            task("Words", timedelta(hours=6, minutes=30), PRIORITY_BULK),
+        ]
+        tasks += [task("ToDo", timedelta(hours=7))]
+        _, runs = self.run_due(tasks, AdmissionController(limits={"cpu": 1}, reserve=0))
+        # Crawl took the free slot, then ToDo goes ahead of Words despite being due later
+        self.assertEqual(runs, [("Crawl", 0), ("ToDo", 60), ("Words", 120)])
+
+    def test_due_tasks_run_concurrently(self):
+        tasks = [
+            task("Weather", timedelta(hours=6, minutes=30), seconds=60),
+            task("ToDo", timedelta(hours=6, minutes=30), seconds=10),
+        ]
+        _, runs = self.run_due(tasks, AdmissionController(limits={"cpu": 2}, reserve=0))
+        self.assertEqual(runs, [("ToDo", 0), ("Weather", 0)])
+
+
+class TestPrecompute(unittest.TestCase):
+    def test_local_midnight(self):
+        for day, offset, length in (
+            (date(2026, 3, 8), -5, 23),  # Clocks spring forward at 02:00, after an EST midnight
+            (date(2026, 3, 9), -4, 24),
+            (date(2026, 11, 1), -4, 25),  # Clocks fall back at 02:00, after an EDT midnight
+            (date(2026, 11, 2), -5, 24),
+        ):
+            with self.subTest(day=day):
+                midnight = local_midnight(day)
+                self.assertEqual((midnight.hour, midnight.minute), (0, 0))
+                self.assertEqual(midnight.utcoffset(), timedelta(hours=offset))
+                self.assertEqual(local_midnight(day + timedelta(days=1)) - midnight, timedelta(hours=length))
+
+    def precompute(self, start: datetime) -> tuple[list[bool], TaskRegistry]:
+        """Ask for tomorrow's tasklist twice, a minute apart, from start (naive, on the local wall clock) onward."""
+        registry = TaskRegistry()
+        registry.register(task("Weather", timedelta(hours=6, minutes=30)))
+
+        async def test() -> list[bool]:
+            started = []
+            for _ in range(2):
+                registry.precompute()
+                started.append(registry._precompute is not None)
+                await asyncio.sleep(60)
+            return started
+
+        return run_virtual(test, LOCAL_TIMEZONE.localize(start)), registry
+
+    def test_lead(self):
+        for day in (date(2026, 3, 7), date(2026, 10, 31)):  # The evenings before the clocks change
+            with self.subTest(day=day):
+                lead = datetime.combine(day + timedelta(days=1), datetime.min.time()) - PRECOMPUTE_LEAD
+                started, registry = self.precompute(lead - timedelta(minutes=1))
+                self.assertEqual(started, [False, True])  # An hour out, on the local wall clock
+                assert registry.next_tasklist is not None
+                self.assertEqual(registry.next_tasklist[0], day + timedelta(days=1))
+                self.assertEqual([task.NAME for task in registry.next_tasklist[1]], ["Weather"])
+
+    def test_once_a_day(self):
+        started, registry = self.precompute(datetime(2026, 3, 9, 23, 30))
+        self.assertEqual(started, [True, False])  # Already prepared, not built again
+        registry.roll_over(date(2026, 3, 10))
+        self.assertEqual((registry.current_day, registry.next_tasklist), (date(2026, 3, 10), None))
+        self.assertEqual([task.NAME for task in registry.current_tasklist], ["Weather"])
+
+
+if __name__ == "__main__":
+    unittest.main()
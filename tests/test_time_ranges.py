@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import json
+import unittest
+from pathlib import Path
+
+import tests  # noqa: F401  (sets up the home directory before Automated_Tasker is imported)
+from Automated_Tasker.utils.ottawa_swimschedule import get_weekday_columns, parse_facility_page
+from Automated_Tasker.utils.time_ranges import format_minutes, parse_time_ranges
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+class TestParseTimeRanges(unittest.TestCase):
+    def test_corpus(self):
+        for case in json.loads((FIXTURES / "time_ranges.json").read_text(encoding="utf-8")):
+            if case["expected"] is None:  # Harvested, not answered yet
+                continue
+            with self.subTest(text=case["text"]):
+                self.assertEqual([list(period) for period in parse_time_ranges(case["text"])], case["expected"])
+
+    def test_numbers_outside_ranges_are_not_times(self):
+        self.assertEqual(parse_time_ranges("7 - 8:30 am, lane 6 closed"), ((420, 510),))
+        self.assertEqual(parse_time_ranges("6:30 - 8 pm (2 lanes)"), ((1110, 1200),))
+        self.assertEqual(parse_time_ranges("closed mar 10"), ())
+
+    def test_zero_length_ranges_are_dropped(self):
+        self.assertEqual(parse_time_ranges("6 - 6 pm, 7 - 8 pm"), ((1140, 1200),))
+
+    def test_lone_times_are_dropped_with_a_warning(self):
+        parse_time_ranges.cache_clear()  # Cached texts aren't parsed (or warned about) again
+        for text in ("9 am", "7 - 8 pm, from 9:15", "starts at noon"):
+            with self.subTest(text=text), self.assertLogs("Automated_Tasker", "WARNING"):
+                self.assertEqual(parse_time_ranges(text), ((1140, 1200),) if "-" in text else ())
+        for text in ("7 - 8:30 am, lane 6 closed", "closed mar 10", "6:30 - 8 pm (2 lanes)"):
+            with self.subTest(text=text), self.assertNoLogs("Automated_Tasker", "WARNING"):
+                parse_time_ranges(text)
+
+    def test_facility_page(self):
+        (table,) = parse_facility_page((FIXTURES / "facility_page.html").read_text(encoding="utf-8"))
+        slots = []
+        for row in table["rows"]:
+            days = get_weekday_columns(table["columns"], len(row["cells"]))
+            for day, cell in zip(days, row["cells"]):
+                for start, stop in parse_time_ranges(cell.lower()):
+                    slots.append((row["header"], day, format_minutes(start), format_minutes(stop)))
+        self.assertEqual(
+            slots,
+            [
+                ("Lane swim", "Monday", "06:00", "07:15"),
+                ("Lane swim", "Monday", "11:30", "13:00"),
+                ("Lane swim", "Tuesday", "07:00", "08:30"),
+                ("Lane swim", "Wednesday", "06:00", "07:15"),
+                ("Lane swim", "Wednesday", "12:00", "13:00"),
+                ("Lane swim", "Wednesday", "20:15", "21:30"),
+                ("Lane swim", "Friday", "18:30", "20:00"),
+                ("Lane swim", "Saturday", "08:30", "09:30"),
+                ("Public swim", "Monday", "19:30", "21:00"),
+                ("Public swim", "Wednesday", "11:00", "13:00"),
+                ("Public swim", "Thursday", "19:00", "20:00"),
+                ("Public swim", "Friday", "22:30", "24:00"),
+                ("Public swim", "Saturday", "13:30", "15:00"),
+                ("Public swim", "Sunday", "14:00", "15:30"),
+            ],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import unittest
+from datetime import UTC, datetime
+
+from googlemaps.exceptions import ApiError
+
+from Automated_Tasker.tasks.traffic_alert import NUM_RETRIES, SetTrafficAlerts, get_travel_seconds
+from tests import run_virtual
+
+START = datetime(2026, 3, 9, 9, 30, tzinfo=UTC)
+
+
+class FakeMaps:
+    def __init__(self, *errors: Exception):
+        self.errors = list(errors)
+        self.calls = 0
+
+    async def get_distance(self, **_):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return {"duration": "25 mins"}
+
+
+class TestTravelSeconds(unittest.TestCase):
+    def lookup(self, maps: FakeMaps) -> int:
+        async def test():
+            return await get_travel_seconds(maps, {})
+
+        return run_virtual(test, START)
+
+    def test_transient_errors_are_retried(self):
+        maps = FakeMaps(ApiError("OVER_QUERY_LIMIT"), ApiError("UNKNOWN_ERROR"), ConnectionError())
+        self.assertEqual(self.lookup(maps), 25 * 60)
+        self.assertEqual(maps.calls, 4)
+
+    def test_rejected_requests_are_not_retried(self):
+        for status in ("REQUEST_DENIED", "INVALID_REQUEST", "MAX_ELEMENTS_EXCEEDED"):
+            with self.subTest(status=status):
+                maps = FakeMaps(ApiError(status))
+                with self.assertRaises(ApiError):
+                    self.lookup(maps)
+                self.assertEqual(maps.calls, 1)
+
+    def test_gives_up_after_the_retries(self):
+        maps = FakeMaps(*[ConnectionError()] * NUM_RETRIES)
+        with self.assertRaises(ConnectionError):
+            self.lookup(maps)
+        self.assertEqual(maps.calls, NUM_RETRIES)
+
+    def test_needs_an_attempt(self):
+        async def test():
+            return await get_travel_seconds(FakeMaps(), {}, retries=0)
+
+        with self.assertRaises(ValueError):
+            run_virtual(test, START)
+
+
+def event(summary: str, start: str, end: str, location: str | None = None) -> dict:
+    times = {"start": {"dateTime": f"2026-03-09T{start}:00-04:00"}, "end": {"dateTime": f"2026-03-09T{end}:00-04:00"}}
+    return {"summary": summary, **times, **({"location": location} if location else {})}
+
+
+class TestTrips(unittest.TestCase):
+    def test_origins(self):
+        events = [
+            event("Dentist", "09:00", "10:00", "1 Dentist Rd"),
+            event("Lunch", "10:30", "11:30", "2 Lunch St"),  # Straight from the dentist
+            event("Call", "12:00", "12:30"),  # Nowhere to go
+            event("Gym", "18:00", "19:00", "3 Gym Ave"),  # Hours after lunch, from home
+        ]
+        trips = [(name, api_dict["origin"]) for name, api_dict, _ in SetTrafficAlerts.get_trips(events, "Home")]
+        self.assertEqual(trips, [("Dentist", "Home"), ("Lunch", "1 Dentist Rd"), ("Gym", "Home")])
+
+
+if __name__ == "__main__":
+    unittest.main()
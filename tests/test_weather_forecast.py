@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+import re
+import unittest
+from pathlib import Path
+
+import tests  # noqa: F401
+from Automated_Tasker.utils.weather_forecast import FORECAST_CLASS, ForecastPeriod, extract_forecast
+
+PAGE = (Path(__file__).parent / "fixtures" / "forecast_page.html").read_text(encoding="utf-8")
+TONIGHT = ForecastPeriod("Tonight", "Cloudy periods. Low plus 2.")
+
+
+def is_tonight(period: ForecastPeriod) -> bool:
+    return "tonight" in period.period.lower()
+
+
+class TestExtractForecast(unittest.TestCase):
+    def test_page(self):
+        forecast = extract_forecast(PAGE)
+        self.assertEqual(len(forecast), 12)
+        self.assertEqual(forecast[0].period, "Today")
+        self.assertEqual(forecast[1], TONIGHT)
+        self.assertEqual(forecast[-1].period, "Fri night")
+
+    def test_stops_at_until(self):
+        self.assertEqual(extract_forecast(PAGE, until=is_tonight)[-1], TONIGHT)
+
+    def test_missing_forecast(self):
+        self.assertEqual(extract_forecast(PAGE.replace(FORECAST_CLASS, "obsolete")), [])
+        # A table without tonight's row is read to its end
+        without_tonight = re.sub(
+            r"<tr>\s*<td[^>]*><strong>Tonight</strong>.*?</tr>", "", PAGE, count=1, flags=re.DOTALL
+        )
+        forecast = extract_forecast(without_tonight, until=is_tonight)
+        self.assertEqual((len(forecast), TONIGHT in forecast), (11, False))
+
+    def test_feeds_split_inside_tags_and_text(self):
+        start = PAGE.rfind("<table", 0, PAGE.find(FORECAST_CLASS))
+        tonight = PAGE.find("<strong>Tonight", start) - start
+        expected = extract_forecast(PAGE)
+        for feed_size in (*range(1, 40), tonight + 3, tonight + 12):  # The latter inside <strong>, then its text
+            with self.subTest(feed_size=feed_size):
+                self.assertEqual(extract_forecast(PAGE, feed_size=feed_size), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import unittest
+from math import isnan, pi
+from pathlib import Path
+
+import tests
+from Automated_Tasker.utils.pool_index import EARTH_RADIUS, PoolIndex
+from Automated_Tasker.utils.weekly_schedule import Slot, WeeklySchedule
+
+HOME = (45.4215, -75.6972)  # Parliament Hill
+NEAR = ("Near Pool", "1 Near St, Ottawa, ON", 45.4215, -75.6872)
+FAR = ("Far Pool", "2 Far St, Ottawa, ON", 45.5215, -75.6972)
+LOST = ("Lost Pool", "3 Lost St, Ottawa, ON", None, None)  # Couldn't be geocoded
+
+
+def slot(pool: tuple[str, str, float | None, float | None], weekday: str, start: str, stop: str, activity: str) -> Slot:
+    minutes = [int(time[:2]) * 60 + int(time[3:]) for time in (start, stop)]
+    return Slot(*pool, table="Swim", activity=activity, weekday=weekday, start=minutes[0], stop=minutes[1])
+
+
+SLOTS = [
+    slot(FAR, "Saturday", "09:00", "10:30", "Lane swim"),
+    slot(NEAR, "Saturday", "13:00", "14:00", "Public swim"),
+    slot(NEAR, "Saturday", "07:00", "08:00", "Lane swim"),
+    slot(LOST, "Saturday", "10:00", "11:00", "Public swim - family"),
+    slot(NEAR, "Sunday", "09:00", "10:00", "Public swim"),
+]
+
+
+class TestPoolIndex(unittest.TestCase):
+    def test_haversine_distances(self):
+        pools = [(0, 0), (1, 0), (0, 90), (0, 180), (45.5019, -73.5674), (None, None)]
+        index = PoolIndex({"latitude": latitude, "longitude": longitude} for latitude, longitude in pools)
+        distances = index.distances((0, 0))
+        self.assertEqual(distances[0], 0)
+        self.assertAlmostEqual(distances[1], 2 * pi * EARTH_RADIUS / 360)  # A degree along a meridian, 111.2 km
+        self.assertAlmostEqual(distances[2], pi * EARTH_RADIUS / 2)  # A quarter of the equator
+        self.assertAlmostEqual(distances[3], pi * EARTH_RADIUS)  # The antipode
+        self.assertTrue(isnan(distances[5]))
+        # Ottawa to Montreal, 166.8 km along the WGS84 geodesic
+        self.assertAlmostEqual(index.distances(HOME)[4], 166.8, delta=166.8 * 0.005)
+
+
+class TestWeeklySchedule(unittest.TestCase):
+    def setUp(self):
+        self.schedule = WeeklySchedule(SLOTS)
+
+    def found(self, **filters) -> list[tuple[str, str, int]]:
+        return [(slot.pool, slot.weekday, slot.start) for slot, _ in self.schedule.query(**filters)]
+
+    def test_days_and_times(self):
+        self.assertEqual(len(self.found()), len(SLOTS))
+        self.assertEqual(self.found(days=["Sunday"]), [("Near Pool", "Sunday", 540)])
+        # Slots overlapping 10:00-13:00, ordered by pool
+        self.assertEqual(
+            self.found(days=["Saturday"], start=600, stop=780),
+            [("Far Pool", "Saturday", 540), ("Lost Pool", "Saturday", 600)],
+        )
+        self.assertEqual(self.found(days=["Saturday"], start=480, stop=540), [])  # Touching isn't overlapping
+
+    def test_activities(self):
+        self.assertEqual(
+            self.found(activity="PUBLIC swim"),
+            [("Lost Pool", "Saturday", 600), ("Near Pool", "Saturday", 780), ("Near Pool", "Sunday", 540)],
+        )
+        self.assertEqual(self.found(activity="family swim"), [("Lost Pool", "Saturday", 600)])
+
+    def test_distances(self):
+        results = self.schedule.query(days=["Saturday"], origin=HOME)
+        pools = [(slot.pool, round(distance, 2)) for slot, distance in results]
+        self.assertEqual(pools[:3], [("Near Pool", 0.78), ("Near Pool", 0.78), ("Far Pool", 11.12)])
+        self.assertEqual(pools[3][0], "Lost Pool")  # Kept, without a distance, after every pool that has one
+        self.assertTrue(isnan(pools[3][1]))
+
+        results = self.schedule.query(days=["Saturday"], origin=HOME, radius=5)
+        self.assertEqual([slot.pool for slot, _ in results], ["Near Pool", "Near Pool", "Lost Pool"])
+        for origin in (None, (None, None)):
+            self.assertTrue(all(isnan(distance) for _, distance in self.schedule.query(origin=origin)))
+
+    def test_json_round_trip(self):
+        file_path = Path(tests.HOME) / f"{self.id()}.json"
+        self.schedule.save(file_path)
+        loaded = WeeklySchedule.load(file_path)
+        self.assertEqual(loaded.slots, self.schedule.slots)
+        self.assertEqual(loaded.pools(), self.schedule.pools())
+
+        def ranked(schedule: WeeklySchedule) -> list[tuple[Slot, float | None]]:
+            return [(slot, None if isnan(distance) else distance) for slot, distance in schedule.query(origin=HOME)]
+
+        self.assertEqual(ranked(loaded), ranked(self.schedule))
+
+
+if __name__ == "__main__":
+    unittest.main()